@@ -16,10 +16,43 @@ class NetboxScriptManagerConfig(PluginConfig):
     base_url = "script-manager"
     default_settings = {
         "DEFAULT_QUEUE": "default",
+        "CONCURRENCY_RETRY_DELAY": 10,
+        "MAX_CONCURRENT_EXECUTIONS_PER_USER": None,
+        "MAX_CONCURRENT_EXECUTIONS_PER_TENANT": None,
+        "MAX_QUEUED_EXECUTIONS_PER_USER": None,
+        "MAX_QUEUED_EXECUTIONS_PER_TENANT": None,
+        "FAIR_SHARE_QUEUED_JOBS": None,
+        "SPOOL_ROOT": None,
+        "MAX_WAIT_TIMEOUT": 60,
+        "LOG_BUFFER": False,
+        "LOG_BUFFER_FLUSH_INTERVAL": 2,
+        "LOG_DEDUPLICATE": True,
+        "LOG_RATE_LIMIT": None,
+        "LOG_RATE_BURST": None,
+        "LOG_MAX_LINES": None,
+        "LOG_MAX_BYTES": None,
+        "LOG_MAX_MESSAGE_LENGTH": None,
+        "HEARTBEAT_INTERVAL": 30,
+        "HEARTBEAT_TIMEOUT": 300,
+        "REAPER_REQUEUE": False,
+        "SCRIPT_BUNDLES": False,
+        "BUNDLE_CACHE_ROOT": None,
+        "SCRIPT_WATCHER": False,
+        "SCRIPT_WATCHER_INTERVAL": 2,
+        "BASE_URL": None,
+        "CALLBACK_ALLOWED_HOSTS": None,
     }
     required_settings = ["SCRIPT_ROOT"]
     min_version = "3.5.0"
 
+    def ready(self):
+        super().ready()
+
+        # The plugin module is imported while the NetBox settings are loaded, so util can't be imported at the top
+        from . import util
+
+        util.add_script_root_to_path()
+
 
 config = NetboxScriptManagerConfig
 
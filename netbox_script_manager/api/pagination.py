@@ -0,0 +1,76 @@
+from django.conf import settings
+from netbox.api.pagination import OptionalLimitOffsetPagination
+from netbox.config import get_config
+from rest_framework.pagination import CursorPagination
+
+
+class ScriptCursorPagination(CursorPagination):
+    page_size_query_param = "limit"
+
+    def get_page_size(self, request):
+        self.page_size = get_config().PAGINATE_COUNT
+        self.max_page_size = settings.MAX_PAGE_SIZE
+
+        return super().get_page_size(request)
+
+
+class LogLineCursorPagination(ScriptCursorPagination):
+    ordering = ("id",)
+
+
+class ScriptExecutionCursorPagination(ScriptCursorPagination):
+    ordering = ("-created", "-id")
+
+
+class OptionalCursorPagination:
+    """
+    Offset pagination like the rest of the API, unless the `cursor` query parameter is present, in which case keyset
+    pagination is used. Pass an empty `cursor` to get the first page, and follow the `next` links from there. Keyset
+    pagination stays fast no matter how deep you page, but doesn't support jumping to a page.
+    """
+
+    cursor_pagination_class = None
+    cursor_query_param = "cursor"
+
+    def __init__(self):
+        self.offset_paginator = OptionalLimitOffsetPagination()
+        self.cursor_paginator = self.cursor_pagination_class()
+        self.paginator = self.offset_paginator
+
+    def __getattr__(self, name):
+        # Anything else, like rendering the page controls of the browsable API, is handled by the active paginator
+        if name.startswith("__") or "paginator" not in self.__dict__:
+            raise AttributeError(name)
+
+        return getattr(self.paginator, name)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param in request.query_params:
+            self.paginator = self.cursor_paginator
+
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.offset_paginator.get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        return self.offset_paginator.get_schema_operation_parameters(view) + [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Use keyset pagination, starting at the given cursor. Pass an empty value for the first page.",
+                "schema": {"type": "string"},
+            }
+        ]
+
+
+class LogLinePagination(OptionalCursorPagination):
+    cursor_pagination_class = LogLineCursorPagination
+
+
+class ScriptExecutionPagination(OptionalCursorPagination):
+    cursor_pagination_class = ScriptExecutionCursorPagination
@@ -10,7 +10,16 @@ from tenancy.api.serializers import TenantSerializer
 from utilities.templatetags.builtins.filters import render_markdown
 
 from netbox_script_manager.choices import ScriptExecutionStatusChoices
-from netbox_script_manager.models import ScriptArtifact, ScriptExecution, ScriptInstance, ScriptLogLine
+from netbox_script_manager.notifications import validate_callback_url
+from netbox_script_manager.models import (
+    ScriptArtifact,
+    ScriptExecution,
+    ScriptInstance,
+    ScriptLogLine,
+    ScriptPipeline,
+    ScriptPipelineRun,
+    ScriptStatistic,
+)
 
 
 @extend_schema_field(OpenApiTypes.STR)
@@ -48,6 +57,11 @@ class ScriptInstanceSerializer(NetBoxModelSerializer):
             "class_name",
             "display",
             "task_queues",
+            "max_concurrency",
+            "concurrency_policy",
+            "memory_limit",
+            "cpu_time_limit",
+            "open_files_limit",
             "tenant",
             "tags",
             "created",
@@ -69,10 +83,8 @@ class NestedScriptInstanceSerializer(NetBoxModelSerializer):
         )
 
 
-class ScriptExecutionSerializer(NetBoxModelSerializer):
+class NestedScriptExecutionSerializer(NetBoxModelSerializer):
     url = serializers.HyperlinkedIdentityField(view_name="plugins-api:netbox_script_manager-api:scriptexecution-detail")
-    script_instance = NestedScriptInstanceSerializer(read_only=True)
-    status = ChoiceField(choices=ScriptExecutionStatusChoices)
 
     class Meta:
         model = ScriptExecution
@@ -80,19 +92,15 @@ class ScriptExecutionSerializer(NetBoxModelSerializer):
             "id",
             "url",
             "display",
-            "created",
-            "started",
-            "completed",
-            "scheduled",
-            "interval",
             "status",
-            "task_id",
-            "script_instance",
         )
 
 
-class NestedScriptExecutionSerializer(NetBoxModelSerializer):
+class ScriptExecutionSerializer(NetBoxModelSerializer):
     url = serializers.HyperlinkedIdentityField(view_name="plugins-api:netbox_script_manager-api:scriptexecution-detail")
+    script_instance = NestedScriptInstanceSerializer(read_only=True)
+    parent = NestedScriptExecutionSerializer(read_only=True)
+    status = ChoiceField(choices=ScriptExecutionStatusChoices)
 
     class Meta:
         model = ScriptExecution
@@ -100,7 +108,19 @@ class NestedScriptExecutionSerializer(NetBoxModelSerializer):
             "id",
             "url",
             "display",
+            "created",
+            "started",
+            "completed",
+            "scheduled",
+            "interval",
             "status",
+            "task_id",
+            "script_instance",
+            "parent",
+            "pipeline_run",
+            "bundle",
+            "source",
+            "callback_url",
         )
 
 
@@ -156,12 +176,103 @@ class ScriptArtifactSerializer(NetBoxModelSerializer):
         )
 
 
+class ScriptStatisticSerializer(NetBoxModelSerializer):
+    url = serializers.HyperlinkedIdentityField(view_name="plugins-api:netbox_script_manager-api:scriptstatistic-detail")
+    script_instance = NestedScriptInstanceSerializer(read_only=True)
+    runs = serializers.IntegerField(read_only=True)
+    duration_avg = serializers.FloatField(read_only=True)
+    duration_p50 = serializers.FloatField(read_only=True)
+    duration_p95 = serializers.FloatField(read_only=True)
+    queue_wait_avg = serializers.FloatField(read_only=True)
+    queue_wait_p95 = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = ScriptStatistic
+        fields = (
+            "id",
+            "url",
+            "display",
+            "script_instance",
+            "date",
+            "runs",
+            "status_counts",
+            "duration_min",
+            "duration_avg",
+            "duration_p50",
+            "duration_p95",
+            "duration_max",
+            "queue_wait_avg",
+            "queue_wait_p95",
+            "queue_wait_max",
+        )
+
+
+class ScriptPipelineSerializer(NetBoxModelSerializer):
+    url = serializers.HyperlinkedIdentityField(view_name="plugins-api:netbox_script_manager-api:scriptpipeline-detail")
+
+    class Meta:
+        model = ScriptPipeline
+        fields = (
+            "id",
+            "url",
+            "display",
+            "name",
+            "description",
+            "steps",
+            "comments",
+            "tags",
+            "created",
+            "last_updated",
+        )
+
+
+class NestedScriptPipelineSerializer(NetBoxModelSerializer):
+    url = serializers.HyperlinkedIdentityField(view_name="plugins-api:netbox_script_manager-api:scriptpipeline-detail")
+
+    class Meta:
+        model = ScriptPipeline
+        fields = (
+            "id",
+            "url",
+            "display",
+            "name",
+        )
+
+
+class ScriptPipelineRunSerializer(NetBoxModelSerializer):
+    url = serializers.HyperlinkedIdentityField(view_name="plugins-api:netbox_script_manager-api:scriptpipelinerun-detail")
+    pipeline = NestedScriptPipelineSerializer(read_only=True)
+    status = serializers.CharField(read_only=True)
+    completed = serializers.DateTimeField(read_only=True)
+    script_executions = NestedScriptExecutionSerializer(source="ordered_executions", many=True, read_only=True)
+
+    class Meta:
+        model = ScriptPipelineRun
+        fields = (
+            "id",
+            "url",
+            "display",
+            "pipeline",
+            "user",
+            "commit",
+            "created",
+            "completed",
+            "status",
+            "script_executions",
+        )
+
+
+class ScriptPipelineRunInputSerializer(serializers.Serializer):
+    commit = serializers.BooleanField()
+
+
 class ScriptInputSerializer(serializers.Serializer):
     data = serializers.JSONField()
     commit = serializers.BooleanField()
     schedule_at = serializers.DateTimeField(required=False, allow_null=True)
     interval = serializers.IntegerField(required=False, allow_null=True)
     task_queue = serializers.CharField(required=False, allow_null=True)
+    callback_url = serializers.URLField(required=False, allow_blank=True, max_length=500)
 
     def validate_schedule_at(self, value):
         if value and not self.context["script"].scheduling_enabled:
@@ -172,3 +283,11 @@ class ScriptInputSerializer(serializers.Serializer):
         if value and not self.context["script"].scheduling_enabled:
             raise serializers.ValidationError("Scheduling is not enabled for this script.")
         return value
+
+    def validate_callback_url(self, value):
+        if value:
+            try:
+                validate_callback_url(value)
+            except ValueError as e:
+                raise serializers.ValidationError(str(e))
+        return value
@@ -7,6 +7,9 @@ from netbox_script_manager.api.views import (
     ScriptExecutionViewSet,
     ScriptInstanceViewSet,
     ScriptLogLineViewSet,
+    ScriptPipelineRunViewSet,
+    ScriptPipelineViewSet,
+    ScriptStatisticViewSet,
 )
 
 router = NetBoxRouter()
@@ -16,6 +19,9 @@ router.register("script-instances", ScriptInstanceViewSet)
 router.register("script-executions", ScriptExecutionViewSet)
 router.register("script-log-lines", ScriptLogLineViewSet)
 router.register("script-artifacts", ScriptArtifactViewSet)
+router.register("script-statistics", ScriptStatisticViewSet)
+router.register("script-pipelines", ScriptPipelineViewSet)
+router.register("script-pipeline-runs", ScriptPipelineRunViewSet)
 router.register("rq-status", RqStatusViewSet, basename="rq-status")
 
 urlpatterns = router.urls
@@ -1,36 +1,52 @@
 import uuid
 
-import django_rq
 from django.conf import settings
-from django_rq.views import get_statistics
+from django.utils.dateparse import parse_datetime
 from drf_spectacular.types import OpenApiTypes
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.utils import OpenApiParameter, extend_schema
 from netbox.api.authentication import IsAuthenticatedOrLoginNotRequired
 from netbox.api.viewsets import NetBoxModelViewSet, NetBoxReadOnlyModelViewSet
 from rest_framework import status as http_status
 from rest_framework import viewsets
 from rest_framework.decorators import action
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.response import Response
 from rest_framework.routers import APIRootView
 from utilities.permissions import get_permission_for_model
-from utilities.request import copy_safe_request
 
-from .. import util
+from .. import bundles, logbuffer, util
 from ..choices import ScriptExecutionStatusChoices
-from ..filtersets import ScriptArtifactFilterSet, ScriptExecutionFilterSet, ScriptInstanceFilterSet, ScriptLogLineFilterSet
-from ..models import ScriptArtifact, ScriptExecution, ScriptInstance, ScriptLogLine
-from ..scripts import run_script
+from ..export import LOG_EXPORT_FORMATS, get_artifacts_response, get_log_response
+from ..filtersets import (
+    ScriptArtifactFilterSet,
+    ScriptExecutionFilterSet,
+    ScriptInstanceFilterSet,
+    ScriptLogLineFilterSet,
+    ScriptPipelineFilterSet,
+    ScriptPipelineRunFilterSet,
+    ScriptStatisticFilterSet,
+)
+from ..models import ScriptArtifact, ScriptExecution, ScriptInstance, ScriptLogLine, ScriptPipeline, ScriptPipelineRun, ScriptStatistic
+from ..notifications import wait_for_status_change
+from .pagination import LogLinePagination, ScriptExecutionPagination
 from .serializers import (
     ScriptArtifactSerializer,
     ScriptExecutionSerializer,
     ScriptInputSerializer,
     ScriptInstanceSerializer,
+    ScriptLogLineMinimalSerializer,
     ScriptLogLineSerializer,
+    ScriptPipelineRunInputSerializer,
+    ScriptPipelineRunSerializer,
+    ScriptPipelineSerializer,
+    ScriptStatisticSerializer,
 )
 
 plugin_config = settings.PLUGINS_CONFIG.get("netbox_script_manager")
 
+# The scripts, manifests and concurrency limits import django_rq, rq and extras.scripts, so the views import them when
+# they are used instead of when the URLs are loaded
+
 
 class NetBoxScriptManagerView(APIRootView):
     def get_view_name(self):
@@ -38,10 +54,27 @@ class NetBoxScriptManagerView(APIRootView):
 
 
 class ScriptInstanceViewSet(NetBoxModelViewSet):
-    queryset = ScriptInstance.objects.all()
+    queryset = ScriptInstance.objects.select_related("tenant").prefetch_related("tags")
     serializer_class = ScriptInstanceSerializer
     filterset_class = ScriptInstanceFilterSet
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+
+        # The manifest is only needed to run a script
+        if self.action == "list":
+            queryset = queryset.defer("manifest")
+
+        return queryset
+
+    def get_script(self, script_instance):
+        from ..manifest import ManifestError, get_manifest_script
+
+        try:
+            return get_manifest_script(script_instance)
+        except ManifestError as e:
+            raise ValidationError(f"Script {script_instance.script_path} failed to load: {e}")
+
     @extend_schema(
         methods=["post"],
         responses={200: ScriptInstanceSerializer(many=True)},
@@ -52,12 +85,14 @@ class ScriptInstanceViewSet(NetBoxModelViewSet):
         """
         Load new scripts from `SCRIPT_ROOT`.
         """
+        from ..manifest import update_manifests
+
         permission = get_permission_for_model(self.queryset.model, "add")
 
         if not request.user.has_perm(permission):
             raise PermissionDenied(f"Missing permission: {permission}")
 
-        scripts, _ = util.load_scripts()
+        scripts, failed_modules = util.load_scripts()
         script_instances = {script_instance.script_path: script_instance for script_instance in ScriptInstance.objects.all()}
         loaded_scripts = []
 
@@ -72,6 +107,11 @@ class ScriptInstanceViewSet(NetBoxModelViewSet):
                     class_name=class_name,
                     description=script.description,
                     task_queues=script.task_queues,
+                    max_concurrency=script.max_concurrency,
+                    concurrency_policy=script.concurrency_policy,
+                    memory_limit=script.memory_limit,
+                    cpu_time_limit=script.cpu_time_limit,
+                    open_files_limit=script.open_files_limit,
                     group=script.group,
                     weight=script.weight,
                 )
@@ -79,6 +119,11 @@ class ScriptInstanceViewSet(NetBoxModelViewSet):
                 script_instance.save()
                 loaded_scripts.append(script_instance)
 
+        update_manifests(scripts, failed_modules)
+
+        if bundles.is_enabled():
+            bundles.publish_bundle()
+
         return Response(ScriptInstanceSerializer(loaded_scripts, many=True, context={"request": request}).data)
 
     @extend_schema(
@@ -91,6 +136,8 @@ class ScriptInstanceViewSet(NetBoxModelViewSet):
         """
         Pull script changes from git.
         """
+        from ..manifest import update_manifests
+
         permission = get_permission_for_model(self.queryset.model, "sync")
 
         if not request.user.has_perm(permission):
@@ -101,9 +148,13 @@ class ScriptInstanceViewSet(NetBoxModelViewSet):
         except Exception as e:
             return Response({"error": f"Failed to pull git repository: {e}"}, status=http_status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+        update_manifests(*util.load_scripts())
+
         messages = [f"Pulled git repository"]
         if result:
             messages.append(result)
+        if bundles.is_enabled():
+            messages.append(f"Published script bundle {bundles.publish_bundle()}")
 
         return Response({"messages": messages}, status=http_status.HTTP_200_OK)
 
@@ -114,18 +165,27 @@ class ScriptInstanceViewSet(NetBoxModelViewSet):
     )
     @action(detail=True, methods=["post"])
     def run(self, request, pk):
+        from ..concurrency import QuotaExceeded, check_queued_quota
+        from ..scripts import enqueue_script_execution, resolve_task_queue
+
         permission = get_permission_for_model(self.queryset.model, "run")
         if not request.user.has_perm(permission):
             raise PermissionDenied(f"Missing permission: {permission}")
 
         script_instance = self.get_object()
-        input_serializer = ScriptInputSerializer(data=request.data, context={"script": script_instance.script})
+        script = self.get_script(script_instance)
+        input_serializer = ScriptInputSerializer(data=request.data, context={"script": script})
 
         # TODO: Decide if we want this check
         # if not Worker.count(get_connection('default')):
         #    raise RQWorkerNotRunningException()
 
         if input_serializer.is_valid():
+            try:
+                check_queued_quota(request.user, script_instance)
+            except QuotaExceeded as e:
+                return Response({"error": str(e)}, status=http_status.HTTP_429_TOO_MANY_REQUESTS)
+
             schedule_at = input_serializer.validated_data.get("schedule_at")
             interval = input_serializer.validated_data.get("interval")
             status = ScriptExecutionStatusChoices.STATUS_SCHEDULED if schedule_at else ScriptExecutionStatusChoices.STATUS_PENDING
@@ -141,38 +201,20 @@ class ScriptInstanceViewSet(NetBoxModelViewSet):
                 scheduled=schedule_at,
                 interval=interval,
                 task_queue=task_queue,
+                commit=input_serializer.data["commit"],
+                callback_url=input_serializer.validated_data.get("callback_url", ""),
             )
+            resolve_task_queue(script_execution)
 
-            # Save input data
+            # Save input data and the request context, which are loaded by the worker when the script is run
             script_execution.data["input"] = input_serializer.data["data"]
+            script_execution.data["input_type"] = util.INPUT_TYPE_API
+            script_execution.data["request"] = util.get_request_context(request)
 
             script_execution.full_clean()
             script_execution.save()
 
-            queue = django_rq.get_queue(task_queue)
-
-            if script_execution.scheduled:
-                queue.enqueue_at(
-                    script_execution.scheduled,
-                    run_script,
-                    job_id=str(script_execution.task_id),
-                    data=input_serializer.data["data"],
-                    request=copy_safe_request(request),
-                    commit=input_serializer.data["commit"],
-                    script_execution=script_execution,
-                    interval=script_execution.interval,
-                    job_timeout=script_instance.script.job_timeout,
-                )
-            else:
-                queue.enqueue(
-                    run_script,
-                    job_id=str(script_execution.task_id),
-                    data=input_serializer.data["data"],
-                    request=copy_safe_request(request),
-                    commit=input_serializer.data["commit"],
-                    script_execution=script_execution,
-                    job_timeout=script_instance.script.job_timeout,
-                )
+            enqueue_script_execution(script_execution, job_timeout=script.job_timeout)
 
             serializer = ScriptExecutionSerializer(script_execution, context={"request": request})
 
@@ -180,24 +222,240 @@ class ScriptInstanceViewSet(NetBoxModelViewSet):
 
         return Response(input_serializer.errors, status=http_status.HTTP_400_BAD_REQUEST)
 
+    @extend_schema(
+        methods=["post"],
+        responses={200: ScriptExecutionSerializer(many=True)},
+        request=ScriptInputSerializer(many=True),
+    )
+    @action(detail=True, methods=["post"], url_path="bulk-run")
+    def bulk_run(self, request, pk):
+        """
+        Enqueue an execution for each input in a list of script inputs. Alternatively a CSV file can be uploaded as
+        `csv` with one row per execution, in which case `commit` and `task_queue` apply to all rows.
+        """
+        from ..concurrency import QuotaExceeded, check_queued_quota
+        from ..scripts import enqueue_script_executions
+
+        permission = get_permission_for_model(self.queryset.model, "run")
+        if not request.user.has_perm(permission):
+            raise PermissionDenied(f"Missing permission: {permission}")
+
+        script_instance = self.get_object()
+
+        if "csv" in request.FILES:
+            try:
+                rows = util.parse_csv_inputs(request.FILES["csv"].read())
+            except (ValueError, UnicodeDecodeError) as e:
+                return Response({"csv": [f"Invalid CSV data: {e}"]}, status=http_status.HTTP_400_BAD_REQUEST)
+
+            inputs = [
+                {"data": row, "commit": request.data.get("commit", False), "task_queue": request.data.get("task_queue")} for row in rows
+            ]
+        else:
+            inputs = request.data
+
+        script = self.get_script(script_instance)
+        input_serializer = ScriptInputSerializer(data=inputs, many=True, context={"script": script})
+
+        if not input_serializer.is_valid():
+            return Response(input_serializer.errors, status=http_status.HTTP_400_BAD_REQUEST)
+
+        try:
+            check_queued_quota(request.user, script_instance, count=len(input_serializer.validated_data))
+        except QuotaExceeded as e:
+            return Response({"error": str(e)}, status=http_status.HTTP_429_TOO_MANY_REQUESTS)
+
+        script_executions = enqueue_script_executions(
+            script_instance,
+            request,
+            [
+                {
+                    "input": script_input["data"],
+                    "input_type": util.INPUT_TYPE_API,
+                    "commit": script_input["commit"],
+                    "schedule_at": script_input.get("schedule_at"),
+                    "interval": script_input.get("interval"),
+                    "task_queue": script_input.get("task_queue") or plugin_config.get("DEFAULT_QUEUE"),
+                    "callback_url": script_input.get("callback_url"),
+                }
+                for script_input in input_serializer.validated_data
+            ],
+            job_timeout=script.job_timeout,
+        )
+
+        serializer = ScriptExecutionSerializer(script_executions, many=True, context={"request": request})
+
+        return Response(serializer.data)
+
 
 class ScriptExecutionViewSet(NetBoxReadOnlyModelViewSet):
-    queryset = ScriptExecution.objects.all()
+    queryset = ScriptExecution.objects.for_list()
     serializer_class = ScriptExecutionSerializer
     filterset_class = ScriptExecutionFilterSet
+    pagination_class = ScriptExecutionPagination
+
+    @extend_schema(
+        methods=["get"],
+        parameters=[
+            OpenApiParameter("status", OpenApiTypes.STR, description="Wait for the status to change from this status"),
+            OpenApiParameter("timeout", OpenApiTypes.INT, description="Maximum number of seconds to wait"),
+        ],
+        responses={200: ScriptExecutionSerializer()},
+    )
+    @action(detail=True, methods=["get"])
+    def wait(self, request, pk):
+        """
+        Block until the status of the execution changes from `status`, which defaults to the current status, or until
+        the timeout is reached. Returns the execution, so the caller should compare the returned status to tell a
+        timeout from a status change.
+        """
+        script_execution = self.get_object()
+        status = request.query_params.get("status", script_execution.status)
+        max_timeout = plugin_config.get("MAX_WAIT_TIMEOUT")
+
+        try:
+            timeout = min(int(request.query_params.get("timeout", max_timeout)), max_timeout)
+        except ValueError:
+            raise ValidationError({"timeout": "The timeout must be an integer."})
+
+        if script_execution.status == status and status not in ScriptExecutionStatusChoices.TERMINAL_STATE_CHOICES:
+            wait_for_status_change(script_execution, status, timeout)
+
+        return Response(self.get_serializer(script_execution).data)
+
+    @extend_schema(
+        methods=["get"],
+        parameters=[
+            OpenApiParameter("log_format", OpenApiTypes.STR, enum=list(LOG_EXPORT_FORMATS), description="Defaults to text"),
+            OpenApiParameter("gzip", OpenApiTypes.BOOL, description="Gzip compress the log"),
+        ],
+        responses={200: OpenApiTypes.BINARY},
+    )
+    @action(detail=True, methods=["get"])
+    def log(self, request, pk):
+        """
+        Stream all log lines of the execution as NDJSON, CSV or plain text.
+        """
+        script_execution = self.get_object()
+        log_format = request.query_params.get("log_format", "text")
+
+        if log_format not in LOG_EXPORT_FORMATS:
+            raise ValidationError({"log_format": f"Choices are: {', '.join(LOG_EXPORT_FORMATS)}"})
+
+        if logbuffer.is_enabled():
+            logbuffer.flush_log_buffer(script_execution.pk)
+
+        return get_log_response(script_execution, log_format, compress=request.query_params.get("gzip", "").lower() in ("1", "true"))
 
 
 class ScriptLogLineViewSet(NetBoxReadOnlyModelViewSet):
     queryset = ScriptLogLine.objects.all()
     serializer_class = ScriptLogLineSerializer
     filterset_class = ScriptLogLineFilterSet
+    pagination_class = LogLinePagination
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+
+        # The last page of the log lines of an execution also lists the lines still in the log buffer, so live logs
+        # are up to date without writing to the database. They have no id yet and are listed until they're written.
+        script_execution_ids = request.query_params.getlist("script_execution")
+        if logbuffer.is_enabled() and len(script_execution_ids) == 1 and script_execution_ids[0].isdigit():
+            if isinstance(response.data, dict) and not response.data.get("next"):
+                response.data["buffered"] = self.get_buffered_log_lines(int(script_execution_ids[0]), response.data["results"])
+
+        return response
+
+    def get_buffered_log_lines(self, script_execution_id, results):
+        log_lines = logbuffer.get_buffered_log_lines(script_execution_id)
+
+        # Lines being flushed can be in the database and the buffer at the same time
+        written = {(result["level"], result["message"], parse_datetime(result["timestamp"])) for result in results}
+        log_lines = [line for line in log_lines if (line.level, line.message, line.timestamp) not in written]
+
+        return ScriptLogLineMinimalSerializer(log_lines, many=True).data
+
+
+class ScriptStatisticViewSet(NetBoxReadOnlyModelViewSet):
+    queryset = ScriptStatistic.objects.select_related("script_instance")
+    serializer_class = ScriptStatisticSerializer
+    filterset_class = ScriptStatisticFilterSet
+
+
+class ScriptPipelineViewSet(NetBoxModelViewSet):
+    queryset = ScriptPipeline.objects.prefetch_related("tags")
+    serializer_class = ScriptPipelineSerializer
+    filterset_class = ScriptPipelineFilterSet
+
+    @extend_schema(
+        methods=["post"],
+        responses={200: ScriptPipelineRunSerializer()},
+        request=ScriptPipelineRunInputSerializer(),
+    )
+    @action(detail=True, methods=["post"])
+    def run(self, request, pk):
+        """
+        Start a run of the pipeline.
+        """
+        from ..concurrency import QuotaExceeded, check_pipeline_quota
+        from ..scripts import run_pipeline
+
+        for model in (ScriptPipeline, ScriptInstance):
+            permission = get_permission_for_model(model, "run")
+            if not request.user.has_perm(permission):
+                raise PermissionDenied(f"Missing permission: {permission}")
+
+        pipeline = self.get_object()
+        input_serializer = ScriptPipelineRunInputSerializer(data=request.data)
+
+        if not input_serializer.is_valid():
+            return Response(input_serializer.errors, status=http_status.HTTP_400_BAD_REQUEST)
+
+        try:
+            check_pipeline_quota(request.user, pipeline)
+        except QuotaExceeded as e:
+            return Response({"error": str(e)}, status=http_status.HTTP_429_TOO_MANY_REQUESTS)
+
+        pipeline_run = run_pipeline(pipeline, request, commit=input_serializer.validated_data["commit"])
+
+        return Response(ScriptPipelineRunSerializer(pipeline_run, context={"request": request}).data)
+
+
+class ScriptPipelineRunViewSet(NetBoxReadOnlyModelViewSet):
+    queryset = ScriptPipelineRun.objects.for_list()
+    serializer_class = ScriptPipelineRunSerializer
+    filterset_class = ScriptPipelineRunFilterSet
 
 
 class ScriptArtifactViewSet(NetBoxModelViewSet):
-    queryset = ScriptArtifact.objects.all()
+    queryset = ScriptArtifact.objects.for_list()
     serializer_class = ScriptArtifactSerializer
     filterset_class = ScriptArtifactFilterSet
 
+    @extend_schema(
+        methods=["get"],
+        parameters=[
+            OpenApiParameter("script_execution_id", OpenApiTypes.INT, many=True, required=True),
+            OpenApiParameter("name", OpenApiTypes.STR, description="Only include artifacts matching this glob pattern"),
+        ],
+        responses={200: OpenApiTypes.BINARY},
+    )
+    @action(detail=False, methods=["get"], filterset_class=None, pagination_class=None)
+    def download(self, request):
+        """
+        Stream the artifacts of one or more script executions as a ZIP archive.
+        """
+        script_execution_ids = request.query_params.getlist("script_execution_id")
+
+        if not script_execution_ids or not all(pk.isdigit() for pk in script_execution_ids):
+            raise ValidationError({"script_execution_id": "One or more script execution ids are required."})
+
+        script_execution_ids = list(
+            ScriptExecution.objects.restrict(request.user, "view").filter(pk__in=script_execution_ids).values_list("pk", flat=True)
+        )
+
+        return get_artifacts_response(script_execution_ids, pattern=request.query_params.get("name"), queryset=self.get_queryset())
+
 
 class RqStatusViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticatedOrLoginNotRequired]
@@ -205,6 +463,23 @@ class RqStatusViewSet(viewsets.ViewSet):
     @extend_schema(responses={200: OpenApiTypes.OBJECT})
     def list(self, request):
         """
-        Returns the status of the RQ workers.
+        Returns the status of the RQ workers, the execution quota usage per user and tenant and the fair share backlogs.
+        The usage of other users and of tenants is only shown to superusers.
         """
-        return Response(get_statistics())
+        from django_rq.views import get_statistics
+
+        from ..concurrency import get_fair_share_usage, get_quota_usage
+
+        statistics = get_statistics()
+
+        if request.user.is_superuser:
+            statistics["quotas"] = get_quota_usage()
+            statistics["fair_share"] = get_fair_share_usage()
+        elif request.user.is_authenticated:
+            statistics["quotas"] = get_quota_usage(user=request.user)
+            statistics["fair_share"] = get_fair_share_usage(owner=str(request.user.pk))
+        else:
+            statistics["quotas"] = {"users": [], "tenants": []}
+            statistics["fair_share"] = []
+
+        return Response(statistics)
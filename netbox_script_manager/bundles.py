@@ -0,0 +1,165 @@
+import hashlib
+import io
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import zipfile
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import util
+from .models import ScriptBundle
+
+logger = logging.getLogger("netbox.plugins.netbox_script_manager")
+
+plugin_config = settings.PLUGINS_CONFIG.get("netbox_script_manager")
+
+# Fixed timestamp of the files in a bundle, so the same tree always results in the same archive
+BUNDLE_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+def is_enabled():
+    return plugin_config.get("SCRIPT_BUNDLES")
+
+
+def get_bundle_cache_root():
+    """
+    Returns the directory bundles are extracted to by the workers. Every node has its own cache.
+    """
+    return plugin_config.get("BUNDLE_CACHE_ROOT") or os.path.join(tempfile.gettempdir(), "netbox_script_manager_bundles")
+
+
+def iter_script_files(custom_script_root):
+    """
+    Yield the path relative to the script root and the content of every file in the customscripts tree, in a stable
+    order. Hidden files and folders and bytecode caches are skipped.
+    """
+    for root, dirs, files in os.walk(custom_script_root):
+        dirs[:] = sorted(d for d in dirs if not d.startswith(".") and d != "__pycache__")
+
+        for filename in sorted(files):
+            if filename.startswith(".") or filename.endswith(".pyc"):
+                continue
+
+            path = os.path.join(root, filename)
+            relative_path = os.path.relpath(path, os.path.dirname(custom_script_root)).replace(os.sep, "/")
+
+            with open(path, "rb") as f:
+                yield relative_path, f.read()
+
+
+def get_content_hash(files):
+    """
+    Returns the hash of a list of (path, content) tuples, which identifies the content of a bundle.
+    """
+    content_hash = hashlib.sha256()
+
+    for path, content in files:
+        content_hash.update(f"{path}\0{len(content)}\0".encode())
+        content_hash.update(content)
+
+    return content_hash.hexdigest()
+
+
+def get_commit(custom_script_root):
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=custom_script_root,
+            check=True,
+            capture_output=True,
+            timeout=util.GIT_TIMEOUT,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+    return result.stdout.decode().strip()
+
+
+def publish_bundle():
+    """
+    Publish the customscripts tree of this node as the current script bundle. Bundles are stored in the database by
+    the hash of their content, so publishing an unchanged tree only marks the existing bundle as current. Returns the
+    bundle.
+    """
+    custom_script_root = util.get_custom_script_root()
+    files = list(iter_script_files(custom_script_root))
+    content_hash = get_content_hash(files)
+
+    bundle = ScriptBundle.objects.defer("data").filter(hash=content_hash).first()
+
+    if bundle is None:
+        buffer = io.BytesIO()
+
+        with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for path, content in files:
+                archive.writestr(zipfile.ZipInfo(path, date_time=BUNDLE_DATE_TIME), content, compress_type=zipfile.ZIP_DEFLATED)
+
+        bundle = ScriptBundle(hash=content_hash, data=buffer.getvalue(), size=len(buffer.getvalue()))
+
+    bundle.commit = get_commit(custom_script_root)
+    bundle.published = timezone.now()
+    bundle.save()
+
+    logger.info(f"Published script bundle {bundle.hash} (commit {bundle.commit or 'unknown'})")
+
+    return bundle
+
+
+def get_current_bundle_id():
+    """
+    Returns the id of the most recently published bundle, which new executions are pinned to.
+    """
+    return ScriptBundle.objects.order_by("-published").values_list("pk", flat=True).first()
+
+
+def get_bundle_root(bundle_id):
+    """
+    Returns the local script root of a bundle, fetching and extracting the bundle if it's not in the local cache yet.
+    Bundles are extracted to a temporary directory and moved in place, so a partially extracted bundle is never used.
+    """
+    content_hash = ScriptBundle.objects.filter(pk=bundle_id).values_list("hash", flat=True).get()
+    cache_root = get_bundle_cache_root()
+    bundle_root = os.path.join(cache_root, content_hash)
+
+    if os.path.isdir(bundle_root):
+        return bundle_root
+
+    os.makedirs(cache_root, exist_ok=True)
+    data = ScriptBundle.objects.filter(pk=bundle_id).values_list("data", flat=True).get()
+    extract_root = tempfile.mkdtemp(dir=cache_root, prefix=".extract-")
+
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            files = [(name, archive.read(name)) for name in archive.namelist()]
+
+            # Everything in a bundle is inside customscripts, and the content must match the hash it's stored by
+            if any(not name.startswith(f"{util.CUSTOM_SCRIPT_SUBPACKAGE}/") or ".." in name.split("/") for name, _ in files):
+                raise ValueError(f"Script bundle {content_hash} contains files outside of {util.CUSTOM_SCRIPT_SUBPACKAGE}")
+            if get_content_hash(files) != content_hash:
+                raise ValueError(f"Script bundle {content_hash} does not match its hash")
+
+            archive.extractall(extract_root)
+
+        try:
+            os.rename(extract_root, bundle_root)
+        except OSError:
+            # Extracted by another process in the meantime
+            if not os.path.isdir(bundle_root):
+                raise
+    finally:
+        shutil.rmtree(extract_root, ignore_errors=True)
+
+    logger.info(f"Extracted script bundle {content_hash} to {bundle_root}")
+
+    return bundle_root
+
+
+def activate_bundle(bundle_id):
+    """
+    Import scripts from the given bundle from now on. With no bundle, scripts are imported from SCRIPT_ROOT.
+    """
+    util.set_active_script_root(get_bundle_root(bundle_id) if bundle_id else None)
@@ -24,18 +24,54 @@ class ScriptExecutionStatusChoices(ChoiceSet):
     STATUS_COMPLETED = "completed"
     STATUS_ERRORED = "errored"
     STATUS_FAILED = "failed"
+    STATUS_WAITING = "waiting"
+    STATUS_REJECTED = "rejected"
+    STATUS_COALESCED = "coalesced"
+    STATUS_LIMIT_EXCEEDED = "limit_exceeded"
+    STATUS_SKIPPED = "skipped"
 
     CHOICES = (
         (STATUS_PENDING, "Pending", "cyan"),
         (STATUS_SCHEDULED, "Scheduled", "gray"),
+        (STATUS_WAITING, "Waiting", "orange"),
         (STATUS_RUNNING, "Running", "blue"),
         (STATUS_COMPLETED, "Completed", "green"),
         (STATUS_ERRORED, "Errored", "red"),
         (STATUS_FAILED, "Failed", "red"),
+        (STATUS_REJECTED, "Rejected", "orange"),
+        (STATUS_COALESCED, "Coalesced", "gray"),
+        (STATUS_LIMIT_EXCEEDED, "Limit Exceeded", "red"),
+        (STATUS_SKIPPED, "Skipped", "gray"),
     )
 
     TERMINAL_STATE_CHOICES = (
         STATUS_COMPLETED,
         STATUS_ERRORED,
         STATUS_FAILED,
+        STATUS_REJECTED,
+        STATUS_COALESCED,
+        STATUS_LIMIT_EXCEEDED,
+        STATUS_SKIPPED,
+    )
+
+
+class TransactionModeChoices(ChoiceSet):
+    MODE_ATOMIC = "atomic"
+    MODE_CHUNKED = "chunked"
+
+    CHOICES = (
+        (MODE_ATOMIC, "Atomic"),
+        (MODE_CHUNKED, "Chunked"),
+    )
+
+
+class ConcurrencyPolicyChoices(ChoiceSet):
+    POLICY_QUEUE = "queue"
+    POLICY_COALESCE = "coalesce"
+    POLICY_REJECT = "reject"
+
+    CHOICES = (
+        (POLICY_QUEUE, "Queue"),
+        (POLICY_COALESCE, "Coalesce"),
+        (POLICY_REJECT, "Reject"),
     )
@@ -0,0 +1,421 @@
+import time
+from collections import defaultdict
+
+import django_rq
+from django.conf import settings
+from django.db.models import Count
+from rq.exceptions import NoSuchJobError
+from rq.job import Job, JobStatus
+
+from .choices import ScriptExecutionStatusChoices
+from .models import ScriptExecution, ScriptInstance
+from .util import get_redis_connection
+
+plugin_config = settings.PLUGINS_CONFIG.get("netbox_script_manager")
+
+# Prefix of all redis keys used for concurrency control
+KEY_PREFIX = "netbox_script_manager:concurrency"
+
+# Lease used when the job has no timeout, in seconds
+DEFAULT_LEASE = 24 * 60 * 60
+
+# Grace period added to all leases, in seconds
+LEASE_GRACE = 60
+
+# Prefix of all redis keys used for fair share dispatch
+FAIR_SHARE_KEY_PREFIX = "netbox_script_manager:fair_share"
+
+# Job meta key holding the owner of a job dispatched by fair share
+FAIR_SHARE_OWNER = "fair_share_owner"
+
+# Statuses of jobs no longer waiting in the queue, whose fair share slot can be reclaimed
+FAIR_SHARE_DONE_STATUSES = (
+    JobStatus.STARTED,
+    JobStatus.FINISHED,
+    JobStatus.FAILED,
+    JobStatus.STOPPED,
+    JobStatus.CANCELED,
+)
+
+# Statuses counted towards the queued executions quotas
+QUEUED_STATUSES = (
+    ScriptExecutionStatusChoices.STATUS_PENDING,
+    ScriptExecutionStatusChoices.STATUS_WAITING,
+)
+
+# Atomically drop expired holders and add the holder if there's a free slot.
+# KEYS[1]: semaphore key, ARGV: now, lease expiry, holder, limit, key ttl
+ACQUIRE_SCRIPT = """
+redis.call("ZREMRANGEBYSCORE", KEYS[1], "-inf", ARGV[1])
+if redis.call("ZSCORE", KEYS[1], ARGV[3]) or redis.call("ZCARD", KEYS[1]) < tonumber(ARGV[4]) then
+    redis.call("ZADD", KEYS[1], ARGV[2], ARGV[3])
+    redis.call("EXPIRE", KEYS[1], ARGV[5])
+    return 1
+end
+return 0
+"""
+
+
+# Admit jobs to the queue while the owner has free slots and no backlog, and add the others to the backlog.
+# KEYS[1]: queued job ids of the owner, KEYS[2]: backlog of the owner, ARGV: slots, job ids
+# Returns the number of jobs admitted, which are the first ones given.
+SUBMIT_SCRIPT = """
+local free = tonumber(ARGV[1]) - redis.call("SCARD", KEYS[1])
+local admitted = 0
+for i = 2, #ARGV do
+    if admitted < free and redis.call("LLEN", KEYS[2]) == 0 then
+        redis.call("SADD", KEYS[1], ARGV[i])
+        admitted = admitted + 1
+    else
+        redis.call("RPUSH", KEYS[2], ARGV[i])
+    end
+end
+return admitted
+"""
+
+# Free the slots of the given jobs and move jobs from the backlog of the owner into the free slots.
+# KEYS[1]: queued job ids of the owner, KEYS[2]: backlog of the owner, ARGV: slots, job ids to free
+# Returns the ids of the jobs to enqueue.
+DISPATCH_SCRIPT = """
+for i = 2, #ARGV do
+    redis.call("SREM", KEYS[1], ARGV[i])
+    redis.call("LREM", KEYS[2], 0, ARGV[i])
+end
+local job_ids = {}
+while redis.call("SCARD", KEYS[1]) < tonumber(ARGV[1]) do
+    local job_id = redis.call("LPOP", KEYS[2])
+    if not job_id then
+        break
+    end
+    redis.call("SADD", KEYS[1], job_id)
+    table.insert(job_ids, job_id)
+end
+return job_ids
+"""
+
+
+class QuotaExceeded(Exception):
+    pass
+
+
+class Semaphore:
+    """
+    A counting semaphore stored in redis and shared by all workers.
+
+    Holders are kept in a sorted set scored by the expiry of their lease. A slot held by a worker that died without
+    releasing it is reclaimed once the lease runs out.
+    """
+
+    def __init__(self, name, limit, connection=None):
+        self.key = f"{KEY_PREFIX}:{name}"
+        self.limit = limit
+        self.connection = connection or get_redis_connection()
+
+    def acquire(self, holder, lease=DEFAULT_LEASE):
+        now = time.time()
+        acquired = self.connection.eval(ACQUIRE_SCRIPT, 1, self.key, now, now + lease, holder, self.limit, int(lease))
+        return bool(acquired)
+
+    def release(self, holder):
+        self.connection.zrem(self.key, holder)
+
+    def holders(self):
+        self.connection.zremrangebyscore(self.key, "-inf", time.time())
+        return [holder.decode() for holder in self.connection.zrange(self.key, 0, -1)]
+
+
+def get_execution_semaphores(script_execution):
+    """
+    Returns the semaphores a script execution must hold while running as a list of (scope, semaphore) tuples. The
+    scope is either script, user or tenant.
+    """
+    connection = get_redis_connection()
+    script_instance = script_execution.script_instance
+    semaphores = []
+
+    if script_instance.max_concurrency:
+        semaphores.append(("script", Semaphore(f"script:{script_instance.pk}", script_instance.max_concurrency, connection)))
+
+    user_limit = plugin_config.get("MAX_CONCURRENT_EXECUTIONS_PER_USER")
+    if user_limit and script_execution.user_id:
+        semaphores.append(("user", Semaphore(f"user:{script_execution.user_id}", user_limit, connection)))
+
+    tenant_limit = plugin_config.get("MAX_CONCURRENT_EXECUTIONS_PER_TENANT")
+    if tenant_limit and script_instance.tenant_id:
+        semaphores.append(("tenant", Semaphore(f"tenant:{script_instance.tenant_id}", tenant_limit, connection)))
+
+    return semaphores
+
+
+def acquire_semaphores(semaphores, holder, lease=DEFAULT_LEASE):
+    """
+    Acquire all the given semaphores. If one of them is exhausted, the semaphores acquired so far are released and
+    the scope of the exhausted semaphore is returned. Returns None if all semaphores were acquired.
+    """
+    acquired = []
+
+    for scope, semaphore in semaphores:
+        if not semaphore.acquire(holder, lease=lease):
+            release_semaphores(acquired, holder)
+            return scope
+        acquired.append((scope, semaphore))
+
+    return None
+
+
+def release_semaphores(semaphores, holder):
+    for _, semaphore in semaphores:
+        semaphore.release(holder)
+
+
+def check_queued_quota(user, script_instance, count=1):
+    """
+    Raises QuotaExceeded if enqueuing `count` more executions would exceed the queued executions quota of the user or
+    the tenant of the script instance.
+    """
+    queued = ScriptExecution.objects.filter(status__in=QUEUED_STATUSES)
+
+    user_limit = plugin_config.get("MAX_QUEUED_EXECUTIONS_PER_USER")
+    if user_limit and user and user.is_authenticated:
+        if queued.filter(user=user).count() + count > user_limit:
+            raise QuotaExceeded(f"User {user} has reached the limit of {user_limit} queued executions.")
+
+    tenant_limit = plugin_config.get("MAX_QUEUED_EXECUTIONS_PER_TENANT")
+    if tenant_limit and script_instance and script_instance.tenant_id:
+        if queued.filter(script_instance__tenant_id=script_instance.tenant_id).count() + count > tenant_limit:
+            raise QuotaExceeded(f"Tenant {script_instance.tenant} has reached the limit of {tenant_limit} queued executions.")
+
+
+def check_pipeline_quota(user, pipeline):
+    """
+    Raises QuotaExceeded if enqueuing the executions of a pipeline run would exceed the queued executions quota of the
+    user or of the tenants of the script instances of the pipeline.
+    """
+    check_queued_quota(user, None, count=len(pipeline.steps))
+
+    script_instances = ScriptInstance.objects.in_bulk({step["script"] for step in pipeline.steps})
+    steps_by_tenant = defaultdict(list)
+
+    for step in pipeline.steps:
+        script_instance = script_instances.get(step["script"])
+        if script_instance and script_instance.tenant_id:
+            steps_by_tenant[script_instance.tenant_id].append(script_instance)
+
+    for tenant_script_instances in steps_by_tenant.values():
+        check_queued_quota(None, tenant_script_instances[0], count=len(tenant_script_instances))
+
+
+def get_quota_usage(user=None):
+    """
+    Returns the number of running and queued executions per user and per tenant along with the configured limits. If a
+    user is given, only the usage of that user is returned.
+    """
+    active = ScriptExecution.objects.filter(status__in=(ScriptExecutionStatusChoices.STATUS_RUNNING, *QUEUED_STATUSES))
+
+    if user is not None:
+        active = active.filter(user=user)
+
+    def usage(owner_field, name_field, concurrent_setting, queued_setting):
+        owners = {}
+        rows = active.filter(**{f"{owner_field}__isnull": False}).values(owner_field, name_field, "status").annotate(count=Count("pk"))
+
+        for row in rows:
+            owner = owners.setdefault(
+                row[owner_field],
+                {
+                    "id": row[owner_field],
+                    "name": row[name_field],
+                    "running": 0,
+                    "queued": 0,
+                    "max_concurrent": plugin_config.get(concurrent_setting),
+                    "max_queued": plugin_config.get(queued_setting),
+                },
+            )
+            key = "running" if row["status"] == ScriptExecutionStatusChoices.STATUS_RUNNING else "queued"
+            owner[key] += row["count"]
+
+        return list(owners.values())
+
+    users = usage("user", "user__username", "MAX_CONCURRENT_EXECUTIONS_PER_USER", "MAX_QUEUED_EXECUTIONS_PER_USER")
+
+    # The usage of a tenant includes the executions of other users
+    if user is not None:
+        return {"users": users, "tenants": []}
+
+    return {
+        "users": users,
+        "tenants": usage(
+            "script_instance__tenant",
+            "script_instance__tenant__name",
+            "MAX_CONCURRENT_EXECUTIONS_PER_TENANT",
+            "MAX_QUEUED_EXECUTIONS_PER_TENANT",
+        ),
+    }
+
+
+def get_lease_timeout(job):
+    """
+    Returns a lease long enough to cover the runtime of the given RQ job.
+    """
+    timeout = job.timeout if job and job.timeout and job.timeout > 0 else DEFAULT_LEASE
+    return timeout + LEASE_GRACE
+
+
+def get_fair_share_slots():
+    """
+    Returns the number of jobs every owner may have waiting in a queue, or None if fair share dispatch is disabled.
+    """
+    return plugin_config.get("FAIR_SHARE_QUEUED_JOBS")
+
+
+def get_fair_share_owner(script_execution):
+    """
+    Returns the owner whose jobs are dispatched in turn with the jobs of the other owners, which is the user who
+    created the script execution.
+    """
+    return str(script_execution.user_id) if script_execution.user_id else "system"
+
+
+def get_fair_share_keys(queue_name, owner):
+    """
+    Returns the keys of the set of queued job ids and the backlog list of an owner on a queue.
+    """
+    return f"{FAIR_SHARE_KEY_PREFIX}:{queue_name}:{owner}:queued", f"{FAIR_SHARE_KEY_PREFIX}:{queue_name}:{owner}:backlog"
+
+
+def parse_fair_share_key(key):
+    """
+    Returns the queue name, owner and kind of a fair share key.
+    """
+    return key.decode()[len(FAIR_SHARE_KEY_PREFIX) + 1 :].rsplit(":", 2)
+
+
+def fair_share_enqueue(queue, owner, jobs):
+    """
+    Enqueue the given jobs of an owner with fair share. At most FAIR_SHARE_QUEUED_JOBS jobs of every owner are waiting
+    in the queue at a time, the other jobs are kept in a backlog per owner. Whenever a job of the owner is started,
+    the next job of the backlog is enqueued at the back of the queue, behind the jobs of the other owners, so the jobs
+    of different owners are run round-robin.
+
+    The jobs must be created with the deferred status. They are saved before being added to the backlog, so a worker
+    taking them from the backlog always finds them. The backlogs are kept in the redis shared by all workers.
+    """
+    if not jobs:
+        return
+
+    with queue.connection.pipeline() as pipeline:
+        for job in jobs:
+            job.meta[FAIR_SHARE_OWNER] = owner
+            job.save(pipeline=pipeline)
+        pipeline.execute()
+
+    admitted = get_redis_connection().eval(
+        SUBMIT_SCRIPT,
+        2,
+        *get_fair_share_keys(queue.name, owner),
+        get_fair_share_slots(),
+        *[job.id for job in jobs],
+    )
+
+    with queue.connection.pipeline() as pipeline:
+        for job in jobs[:admitted]:
+            queue.enqueue_job(job, pipeline=pipeline)
+        pipeline.execute()
+
+
+def fair_share_dispatch(queue_name, owner, freed=()):
+    """
+    Free the fair share slots of the given job ids of an owner and enqueue the next jobs of the backlog of the owner.
+    Jobs deleted or canceled while in the backlog are skipped.
+    """
+    connection = get_redis_connection()
+    queue = django_rq.get_queue(queue_name)
+    keys = get_fair_share_keys(queue_name, owner)
+    # Slots are still freed if fair share was disabled in the meantime, but no more jobs are held back
+    slots = get_fair_share_slots() or 2**31
+    freed = list(freed)
+
+    while True:
+        job_ids = connection.eval(DISPATCH_SCRIPT, 2, *keys, slots, *freed)
+        freed = []
+
+        for job_id in job_ids:
+            job_id = job_id.decode()
+
+            try:
+                job = Job.fetch(job_id, connection=queue.connection)
+            except NoSuchJobError:
+                freed.append(job_id)
+                continue
+
+            if job.get_status() == JobStatus.CANCELED:
+                freed.append(job_id)
+                continue
+
+            queue.enqueue_job(job)
+
+        if not freed:
+            return
+
+
+def fair_share_release(job):
+    """
+    Free the fair share slot of a job which was started or removed from the queue, and enqueue the next jobs of its
+    owner.
+    """
+    owner = job.meta.get(FAIR_SHARE_OWNER) if job else None
+
+    if owner:
+        fair_share_dispatch(job.origin, owner, freed=[job.id])
+
+
+def reclaim_fair_share_slots():
+    """
+    Free the fair share slots of jobs which are no longer waiting in their queue, e.g. when the work horse running
+    them died before freeing the slot, and enqueue the next jobs of the backlogs. Returns the number of freed slots.
+    """
+    connection = get_redis_connection()
+    reclaimed = 0
+
+    for key in connection.scan_iter(match=f"{FAIR_SHARE_KEY_PREFIX}:*:queued"):
+        queue_name, owner, _ = parse_fair_share_key(key)
+        queue_connection = django_rq.get_connection(queue_name)
+        freed = []
+
+        for job_id in connection.smembers(key):
+            job_id = job_id.decode()
+
+            try:
+                job = Job.fetch(job_id, connection=queue_connection)
+            except NoSuchJobError:
+                freed.append(job_id)
+                continue
+
+            if job.get_status() in FAIR_SHARE_DONE_STATUSES:
+                freed.append(job_id)
+
+        if freed:
+            fair_share_dispatch(queue_name, owner, freed=freed)
+            reclaimed += len(freed)
+
+    return reclaimed
+
+
+def get_fair_share_usage(owner=None):
+    """
+    Returns the number of jobs waiting in the queue and in the backlog per owner and queue dispatched with fair share,
+    optionally limited to the given owner.
+    """
+    connection = get_redis_connection()
+    owners = {}
+
+    for key in connection.scan_iter(match=f"{FAIR_SHARE_KEY_PREFIX}:*"):
+        queue_name, key_owner, kind = parse_fair_share_key(key)
+        if owner is not None and key_owner != owner:
+            continue
+        count = connection.scard(key) if kind == "queued" else connection.llen(key)
+
+        usage = owners.setdefault((queue_name, key_owner), {"queue": queue_name, "owner": key_owner, "queued": 0, "backlog": 0})
+        usage[kind] = count
+
+    return list(owners.values())
@@ -0,0 +1,215 @@
+import csv
+import fnmatch
+import json
+import zipfile
+import zlib
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import ScriptArtifact, ScriptLogLine
+
+# Number of rows fetched from the server side cursor at a time
+EXPORT_CHUNK_SIZE = 2000
+
+# Artifacts can be large, so only a few are fetched at a time
+ARTIFACT_CHUNK_SIZE = 10
+
+# Size of the chunks artifacts are compressed and sent in
+ZIP_WRITE_SIZE = 1024 * 1024
+
+# Content type and file extension of each log export format
+LOG_EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+    "text": ("text/plain", "log"),
+}
+
+
+class Echo:
+    """
+    A file-like object returning what is written to it, used to stream the output of csv.writer.
+    """
+
+    def write(self, value):
+        return value
+
+
+class StreamBuffer:
+    """
+    A write-only file-like object keeping what is written to it until it's collected with pop(). ZipFile supports
+    writing to unseekable files like this one, which makes it possible to stream an archive while it's written.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_log_lines(script_execution):
+    return (
+        ScriptLogLine.objects.filter(script_execution=script_execution)
+        .order_by("timestamp", "pk")
+        .values_list("timestamp", "level", "message")
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+
+def _format_ndjson(log_lines):
+    for timestamp, level, message in log_lines:
+        yield json.dumps({"timestamp": timestamp.isoformat(), "level": level, "message": message}) + "\n"
+
+
+def _format_csv(log_lines):
+    writer = csv.writer(Echo())
+
+    yield writer.writerow(("timestamp", "level", "message"))
+
+    for timestamp, level, message in log_lines:
+        yield writer.writerow((timestamp.isoformat(), level, message))
+
+
+def _format_text(log_lines):
+    for timestamp, level, message in log_lines:
+        yield f"{timestamp.isoformat()} [{level.upper()}] {message}\n"
+
+
+LOG_FORMATTERS = {
+    "ndjson": _format_ndjson,
+    "csv": _format_csv,
+    "text": _format_text,
+}
+
+
+def gzip_stream(chunks):
+    """
+    Gzip compress a stream of byte chunks.
+    """
+    # wbits=31 produces the gzip container format
+    compressor = zlib.compressobj(wbits=31)
+
+    for chunk in chunks:
+        if compressed := compressor.compress(chunk):
+            yield compressed
+
+    yield compressor.flush()
+
+
+def export_log(script_execution, log_format, compress=False):
+    """
+    Returns a generator streaming the log of the script execution in the given format, gzip compressed if requested.
+    The log lines are read in chunks through a server side cursor, so memory usage doesn't depend on the log size.
+    """
+    chunks = (chunk.encode() for chunk in LOG_FORMATTERS[log_format](iter_log_lines(script_execution)))
+
+    if compress:
+        return gzip_stream(chunks)
+
+    return chunks
+
+
+def get_log_filename(script_execution, log_format, compress=False):
+    _, extension = LOG_EXPORT_FORMATS[log_format]
+    filename = f"script-execution-{script_execution.pk}.{extension}"
+
+    return f"{filename}.gz" if compress else filename
+
+
+def _get_archive_name(artifact, prefix_execution, used_names):
+    # Artifact names are chosen by the scripts, so keep them from escaping the archive
+    name = "/".join(part for part in artifact.name.replace("\\", "/").split("/") if part not in ("", ".", "..")) or "artifact"
+
+    if prefix_execution:
+        name = f"{artifact.script_execution_id}/{name}"
+
+    if name in used_names:
+        stem, dot, extension = name.rpartition(".")
+        name = f"{stem}-{artifact.pk}.{extension}" if dot else f"{name}-{artifact.pk}"
+
+    used_names.add(name)
+
+    return name
+
+
+def export_artifacts(script_execution_ids, pattern=None, queryset=None):
+    """
+    Returns a generator streaming a ZIP archive of the artifacts of the script executions, optionally limited to the
+    artifacts with names matching the glob pattern. The archive is written while it's sent and only a few artifacts
+    are held in memory at a time. Artifacts are stored in a folder per execution if there's more than one execution.
+    """
+    queryset = (queryset if queryset is not None else ScriptArtifact.objects.all()).filter(script_execution_id__in=script_execution_ids)
+
+    # Match the names first to avoid fetching the data of artifacts that are not included
+    artifact_ids = [pk for pk, name in queryset.values_list("pk", "name") if not pattern or fnmatch.fnmatch(name, pattern)]
+    artifacts = ScriptArtifact.objects.filter(pk__in=artifact_ids).order_by("script_execution_id", "pk")
+
+    prefix_execution = len(set(script_execution_ids)) > 1
+    used_names = set()
+    date_time = timezone.localtime().timetuple()[:6]
+
+    buffer = StreamBuffer()
+
+    with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for artifact in artifacts.iterator(chunk_size=ARTIFACT_CHUNK_SIZE):
+            data = artifact.data
+
+            info = zipfile.ZipInfo(_get_archive_name(artifact, prefix_execution, used_names), date_time=date_time)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            # The size decides if the entry needs zip64 extensions
+            info.file_size = len(data)
+
+            with archive.open(info, mode="w") as entry:
+                for offset in range(0, len(data), ZIP_WRITE_SIZE):
+                    entry.write(data[offset : offset + ZIP_WRITE_SIZE])
+                    yield buffer.pop()
+
+            yield buffer.pop()
+
+    yield buffer.pop()
+
+
+def get_artifacts_response(script_execution_ids, pattern=None, queryset=None):
+    """
+    Returns a response streaming a ZIP archive of the artifacts of the script executions as a file download.
+    """
+    if len(script_execution_ids) == 1:
+        filename = f"script-execution-{script_execution_ids[0]}-artifacts.zip"
+    else:
+        filename = "script-execution-artifacts.zip"
+
+    response = StreamingHttpResponse(export_artifacts(script_execution_ids, pattern, queryset), content_type="application/zip")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+    return response
+
+
+def get_log_response(script_execution, log_format, compress=False):
+    """
+    Returns a response streaming the log of the script execution as a file download.
+    """
+    content_type, _ = LOG_EXPORT_FORMATS[log_format]
+
+    # Compressed logs are downloaded as a .gz file rather than using Content-Encoding
+    if compress:
+        content_type = "application/gzip"
+
+    response = StreamingHttpResponse(export_log(script_execution, log_format, compress), content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{get_log_filename(script_execution, log_format, compress)}"'
+
+    return response
@@ -5,7 +5,15 @@ from netbox.filtersets import BaseFilterSet, NetBoxModelFilterSet
 from tenancy.models import Tenant
 
 from .choices import LogLevelChoices, ScriptExecutionStatusChoices
-from .models import ScriptArtifact, ScriptExecution, ScriptInstance, ScriptLogLine
+from .models import (
+    ScriptArtifact,
+    ScriptExecution,
+    ScriptInstance,
+    ScriptLogLine,
+    ScriptPipeline,
+    ScriptPipelineRun,
+    ScriptStatistic,
+)
 
 
 class ScriptInstanceFilterSet(NetBoxModelFilterSet):
@@ -65,6 +73,14 @@ class ScriptExecutionFilterSet(BaseFilterSet):
     completed__before = django_filters.DateTimeFilter(field_name="completed", lookup_expr="lte")
     completed__after = django_filters.DateTimeFilter(field_name="completed", lookup_expr="gte")
     status = django_filters.MultipleChoiceFilter(choices=ScriptExecutionStatusChoices, null_value=None)
+    parent_id = django_filters.ModelMultipleChoiceFilter(
+        queryset=ScriptExecution.objects.all(),
+        label=_("Parent execution (ID)"),
+    )
+    pipeline_run_id = django_filters.ModelMultipleChoiceFilter(
+        queryset=ScriptPipelineRun.objects.all(),
+        label=_("Pipeline run (ID)"),
+    )
 
     class Meta:
         model = ScriptExecution
@@ -91,3 +107,42 @@ class ScriptLogLineFilterSet(BaseFilterSet):
         if not value.strip():
             return queryset
         return queryset.filter(Q(message__icontains=value) | Q(script_execution__script_instance__name__icontains=value))
+
+
+class ScriptStatisticFilterSet(BaseFilterSet):
+    date = django_filters.DateFilter()
+    date__before = django_filters.DateFilter(field_name="date", lookup_expr="lte")
+    date__after = django_filters.DateFilter(field_name="date", lookup_expr="gte")
+    script_instance_id = django_filters.ModelMultipleChoiceFilter(
+        queryset=ScriptInstance.objects.all(),
+        label=_("Script instance (ID)"),
+    )
+
+    class Meta:
+        model = ScriptStatistic
+        fields = ("id", "date")
+
+
+class ScriptPipelineFilterSet(NetBoxModelFilterSet):
+    class Meta:
+        model = ScriptPipeline
+        fields = ["name", "description"]
+
+    def search(self, queryset, name, value):
+        if not value.strip():
+            return queryset
+        return queryset.filter(Q(name__icontains=value) | Q(description__icontains=value))
+
+
+class ScriptPipelineRunFilterSet(BaseFilterSet):
+    created = django_filters.DateTimeFilter()
+    created__before = django_filters.DateTimeFilter(field_name="created", lookup_expr="lte")
+    created__after = django_filters.DateTimeFilter(field_name="created", lookup_expr="gte")
+    pipeline_id = django_filters.ModelMultipleChoiceFilter(
+        queryset=ScriptPipeline.objects.all(),
+        label=_("Pipeline (ID)"),
+    )
+
+    class Meta:
+        model = ScriptPipelineRun
+        fields = ("id", "commit", "user")
@@ -6,13 +6,13 @@ from netbox.forms.mixins import SavedFiltersMixin
 from netbox.forms import NetBoxModelFilterSetForm, NetBoxModelForm
 from tenancy.models import Tenant
 from utilities.forms import FilterForm
-from utilities.forms.fields import DynamicModelChoiceField, DynamicModelMultipleChoiceField, TagFilterField
+from utilities.forms.fields import DynamicModelChoiceField, DynamicModelMultipleChoiceField, JSONField, TagFilterField
 from utilities.forms.widgets import APISelectMultiple, DateTimePicker, NumberWithOptions
 from utilities.datetime import local_now
 from utilities.forms.rendering import FieldSet
 
 from .choices import ScriptExecutionStatusChoices
-from .models import ScriptExecution, ScriptInstance
+from .models import ScriptExecution, ScriptInstance, ScriptPipeline
 
 
 class ScriptInstanceForm(NetBoxModelForm):
@@ -35,7 +35,23 @@ class ScriptInstanceForm(NetBoxModelForm):
 
     class Meta:
         model = ScriptInstance
-        fields = ("name", "module_path", "class_name", "group", "weight", "description", "task_queues", "comments", "tenant", "tags")
+        fields = (
+            "name",
+            "module_path",
+            "class_name",
+            "group",
+            "weight",
+            "description",
+            "task_queues",
+            "max_concurrency",
+            "concurrency_policy",
+            "memory_limit",
+            "cpu_time_limit",
+            "open_files_limit",
+            "comments",
+            "tenant",
+            "tags",
+        )
 
         widgets = {
             "description": forms.Textarea(attrs={"rows": 3}),
@@ -56,6 +72,42 @@ class ScriptInstanceFilterForm(NetBoxModelFilterSetForm):
     )
 
 
+class ScriptPipelineForm(NetBoxModelForm):
+    steps = JSONField(
+        help_text=_(
+            "List of steps, e.g. "
+            '<code>[{"name": "sync", "script": 1}, {"name": "report", "script": 2, "depends_on": ["sync"], '
+            '"inputs_from": {"summary": "sync"}}]</code>'
+        ),
+    )
+
+    class Meta:
+        model = ScriptPipeline
+        fields = (
+            "name",
+            "description",
+            "steps",
+            "comments",
+            "tags",
+        )
+
+        widgets = {
+            "description": forms.Textarea(attrs={"rows": 3}),
+        }
+
+
+class ScriptPipelineFilterForm(NetBoxModelFilterSetForm):
+    model = ScriptPipeline
+    name = forms.CharField(required=False)
+    tag = TagFilterField(model)
+
+
+class ScriptPipelineRunForm(forms.Form):
+    _commit = forms.BooleanField(
+        required=False, initial=True, label=_("Commit changes"), help_text=_("Commit changes to the database (uncheck for a dry-run)")
+    )
+
+
 class ScriptExecutionFilterForm(SavedFiltersMixin, FilterForm):
     fieldsets = (
         FieldSet("q", "filter_id", name="Query Filters"),
@@ -154,3 +206,30 @@ class ScriptForm(forms.Form):
             self.cleaned_data["_schedule_at"] = local_now()
 
         return self.cleaned_data
+
+
+class ScriptBulkRunForm(forms.Form):
+    csv_data = forms.CharField(
+        required=False,
+        widget=forms.Textarea(attrs={"class": "font-monospace", "rows": 10}),
+        label=_("CSV data"),
+        help_text=_("One execution is enqueued per row. The header row holds the names of the script variables."),
+    )
+    csv_file = forms.FileField(
+        required=False,
+        label=_("CSV file"),
+    )
+    _commit = forms.BooleanField(
+        required=False, initial=True, label=_("Commit changes"), help_text=_("Commit changes to the database (uncheck for a dry-run)")
+    )
+    _task_queue = forms.ChoiceField(
+        required=False,
+        help_text="The executions will be run on the chosen queue",
+        label=_("Task queue"),
+    )
+
+    def clean(self):
+        if bool(self.cleaned_data.get("csv_data")) == bool(self.cleaned_data.get("csv_file")):
+            raise forms.ValidationError(_("Provide either CSV data or a CSV file."))
+
+        return self.cleaned_data
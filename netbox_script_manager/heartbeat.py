@@ -0,0 +1,89 @@
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+
+from .util import get_redis_connection
+
+logger = logging.getLogger("netbox.plugins.netbox_script_manager")
+
+plugin_config = settings.PLUGINS_CONFIG.get("netbox_script_manager")
+
+# Sorted set of the running script executions scored by the time of their last heartbeat
+HEARTBEAT_KEY = "netbox_script_manager:heartbeats"
+
+# The heartbeat thread of the current process, see get_heartbeat()
+heartbeat = None
+
+
+def beat(*script_execution_ids):
+    if script_execution_ids:
+        now = time.time()
+        get_redis_connection().zadd(HEARTBEAT_KEY, {str(script_execution_id): now for script_execution_id in script_execution_ids})
+
+
+def remove_heartbeats(*script_execution_ids):
+    if script_execution_ids:
+        get_redis_connection().zrem(HEARTBEAT_KEY, *(str(script_execution_id) for script_execution_id in script_execution_ids))
+
+
+def get_heartbeats():
+    """
+    Returns a dict of script execution id to the time of its last heartbeat.
+    """
+    beats = get_redis_connection().zrange(HEARTBEAT_KEY, 0, -1, withscores=True)
+
+    return {int(script_execution_id): score for script_execution_id, score in beats}
+
+
+class Heartbeat(threading.Thread):
+    """
+    Periodically records a heartbeat in redis for the script executions running in the current process. The
+    heartbeats of all executions are written with a single command, and the database is not touched.
+    """
+
+    def __init__(self):
+        super().__init__(name="netbox-script-manager-heartbeat", daemon=True)
+        self.pid = os.getpid()
+        self.script_execution_ids = set()
+        self.lock = threading.Lock()
+
+    def add(self, script_execution_id):
+        beat(script_execution_id)
+
+        with self.lock:
+            self.script_execution_ids.add(script_execution_id)
+
+    def remove(self, script_execution_id):
+        with self.lock:
+            self.script_execution_ids.discard(script_execution_id)
+
+        remove_heartbeats(script_execution_id)
+
+    def run(self):
+        while True:
+            time.sleep(plugin_config.get("HEARTBEAT_INTERVAL"))
+
+            with self.lock:
+                script_execution_ids = list(self.script_execution_ids)
+
+            try:
+                beat(*script_execution_ids)
+            except Exception as e:
+                logger.warning(f"Failed to record heartbeat of script executions {script_execution_ids}: {e}")
+
+
+def get_heartbeat():
+    """
+    Returns the heartbeat thread of the current process, starting it if needed. Threads are not copied when a worker
+    forks, so forked processes start their own heartbeat.
+    """
+    global heartbeat
+
+    if heartbeat is None or heartbeat.pid != os.getpid():
+        heartbeat = Heartbeat()
+        heartbeat.start()
+
+    return heartbeat
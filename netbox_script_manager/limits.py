@@ -0,0 +1,100 @@
+import errno
+import logging
+import os
+import resource
+import signal
+
+from django.db import connections
+
+logger = logging.getLogger("netbox.plugins.netbox_script_manager")
+
+# Maps the resource limit fields of script instances to the rlimits enforcing them
+RESOURCE_LIMITS = {
+    "memory_limit": resource.RLIMIT_AS,
+    "cpu_time_limit": resource.RLIMIT_CPU,
+    "open_files_limit": resource.RLIMIT_NOFILE,
+}
+
+# Signals the kernel uses to stop a process exceeding its limits
+LIMIT_SIGNALS = (signal.SIGXCPU, signal.SIGKILL)
+
+
+def get_resource_limits(script_instance):
+    """
+    Returns the resource limits set on the script instance.
+    """
+    return {name: getattr(script_instance, name) for name in RESOURCE_LIMITS if getattr(script_instance, name)}
+
+
+def apply_resource_limits(limits):
+    """
+    Apply the resource limits to the current process. The memory limit is given in megabytes and limits the address
+    space of the process. The CPU time limit sends SIGXCPU when reached and SIGKILL a second later.
+    """
+    for name, value in limits.items():
+        rlimit = RESOURCE_LIMITS[name]
+        _, hard = resource.getrlimit(rlimit)
+
+        if name == "memory_limit":
+            value *= 1024 * 1024
+
+        limit_hard = value + 1 if name == "cpu_time_limit" else value
+
+        # Limits can't be raised above the current hard limit
+        if hard != resource.RLIM_INFINITY:
+            value = min(value, hard)
+            limit_hard = min(limit_hard, hard)
+
+        resource.setrlimit(rlimit, (value, limit_hard))
+
+
+def is_resource_limit_error(exception):
+    """
+    Returns True if the exception is raised when a process runs into its memory or open files limit.
+    """
+    return isinstance(exception, MemoryError) or (isinstance(exception, OSError) and exception.errno == errno.EMFILE)
+
+
+def run_with_resource_limits(func, limits):
+    """
+    Call func in a forked child process with the resource limits applied. Returns the exit code of the child, which
+    is negative if the child was killed by a signal, and the resource usage of the child.
+    """
+    # The child must not share the database connections of the parent, both reconnect when needed
+    connections.close_all()
+
+    pid = os.fork()
+
+    if pid == 0:
+        exit_code = 0
+
+        try:
+            apply_resource_limits(limits)
+            func()
+        except BaseException as e:
+            logger.exception(f"Unhandled exception in resource limited process: {e}")
+            exit_code = 1
+        finally:
+            connections.close_all()
+            os._exit(exit_code)
+
+    try:
+        _, status, rusage = os.wait4(pid, 0)
+    except BaseException:
+        # Don't leave the child running if the job is interrupted, e.g. by the job timeout
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+        raise
+
+    return os.waitstatus_to_exitcode(status), rusage
+
+
+def get_resource_usage(rusage):
+    """
+    Returns the peak resource usage of a child process in a JSON serializable form.
+    """
+    return {
+        # ru_maxrss is in kilobytes on Linux
+        "peak_memory": rusage.ru_maxrss * 1024,
+        "cpu_time": round(rusage.ru_utime + rusage.ru_stime, 3),
+    }
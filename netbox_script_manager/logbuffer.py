@@ -0,0 +1,190 @@
+import logging
+import os
+import threading
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .util import get_redis_connection
+
+logger = logging.getLogger("netbox.plugins.netbox_script_manager")
+
+plugin_config = settings.PLUGINS_CONFIG.get("netbox_script_manager")
+
+STREAM_PREFIX = "netbox_script_manager:logs"
+FLUSH_BATCH_SIZE = 1000
+LOCK_TIMEOUT = 30
+
+# The flusher thread of the current process, see get_flusher()
+flusher = None
+
+
+def get_stream(script_execution_id):
+    return f"{STREAM_PREFIX}:{script_execution_id}"
+
+
+def is_enabled():
+    return plugin_config.get("LOG_BUFFER")
+
+
+def append_log_line(script_execution_id, level, message):
+    """
+    Append a log line to the buffer of the script execution. The line is written to the database by the flusher
+    thread, when the execution terminates, or when the complete log is downloaded. Until then, live log views read it
+    from the buffer with `get_buffered_log_lines()`.
+    """
+    get_redis_connection().xadd(
+        get_stream(script_execution_id),
+        {"level": level, "message": message, "timestamp": timezone.now().isoformat()},
+    )
+
+    get_flusher().add(script_execution_id)
+
+
+def flush_log_buffer(script_execution_id, blocking=True):
+    """
+    Write the buffered log lines of the script execution to the database. Returns False if the buffer is being
+    flushed by someone else and `blocking` is False.
+
+    Log lines are written with the id of their stream entry and entries already written are skipped, so lines are not
+    written twice if a flush is interrupted before the entries are removed from the buffer, or if the lock expires
+    during a long flush.
+    """
+    from redis.exceptions import LockNotOwnedError
+
+    ScriptExecution = apps.get_model("netbox_script_manager", "ScriptExecution")
+    ScriptLogLine = apps.get_model("netbox_script_manager", "ScriptLogLine")
+
+    connection = get_redis_connection()
+    stream = get_stream(script_execution_id)
+    lock = connection.lock(f"{stream}:lock", timeout=LOCK_TIMEOUT)
+
+    if not lock.acquire(blocking=blocking, blocking_timeout=LOCK_TIMEOUT):
+        return False
+
+    try:
+        # Nothing to write if the execution has been deleted in the meantime
+        if not ScriptExecution.objects.filter(pk=script_execution_id).exists():
+            connection.delete(stream)
+            return True
+
+        while entries := connection.xrange(stream, count=FLUSH_BATCH_SIZE):
+            log_lines = [
+                ScriptLogLine(
+                    script_execution_id=script_execution_id,
+                    level=fields[b"level"].decode(),
+                    message=fields[b"message"].decode(),
+                    timestamp=parse_datetime(fields[b"timestamp"].decode()),
+                    buffer_entry=entry_id.decode(),
+                )
+                for entry_id, fields in entries
+            ]
+
+            # Written through the script log connection to stay outside of the transaction of the script
+            ScriptLogLine.objects.using("script_log").bulk_create(log_lines, ignore_conflicts=True)
+            connection.xdel(stream, *[entry_id for entry_id, _ in entries])
+
+            # Hold the lock for the next batch
+            try:
+                lock.reacquire()
+            except LockNotOwnedError:
+                logger.warning(f"The log buffer lock of script execution {script_execution_id} expired while flushing")
+
+        connection.delete(stream)
+    finally:
+        try:
+            lock.release()
+        except LockNotOwnedError:
+            # Expired during the flush, which is harmless as the lines are only written once
+            pass
+
+    return True
+
+
+def get_buffered_log_lines(script_execution_id):
+    """
+    Returns the log lines of the script execution which have not been written to the database yet, as unsaved
+    ScriptLogLine instances. Only reads from redis, the buffer is left to the flusher.
+    """
+    ScriptLogLine = apps.get_model("netbox_script_manager", "ScriptLogLine")
+
+    return [
+        ScriptLogLine(
+            script_execution_id=script_execution_id,
+            level=fields[b"level"].decode(),
+            message=fields[b"message"].decode(),
+            timestamp=parse_datetime(fields[b"timestamp"].decode()),
+        )
+        for _, fields in get_redis_connection().xrange(get_stream(script_execution_id))
+    ]
+
+
+def recover_log_buffers():
+    """
+    Flush the log buffers left behind by workers that died before flushing them. Returns the number of flushed buffers.
+    """
+    connection = get_redis_connection()
+    recovered = 0
+
+    for stream in connection.scan_iter(match=f"{STREAM_PREFIX}:*", _type="stream"):
+        script_execution_id = int(stream.decode().rsplit(":", 1)[1])
+
+        if flush_log_buffer(script_execution_id, blocking=False):
+            recovered += 1
+
+    return recovered
+
+
+class LogFlusher(threading.Thread):
+    """
+    Periodically flushes the log buffers of the script executions running in the current process.
+    """
+
+    def __init__(self):
+        super().__init__(name="netbox-script-manager-log-flusher", daemon=True)
+        self.pid = os.getpid()
+        self.script_execution_ids = set()
+        self.lock = threading.Lock()
+
+    def add(self, script_execution_id):
+        with self.lock:
+            self.script_execution_ids.add(script_execution_id)
+
+    def run(self):
+        try:
+            while True:
+                time.sleep(plugin_config.get("LOG_BUFFER_FLUSH_INTERVAL"))
+
+                with self.lock:
+                    script_execution_ids = list(self.script_execution_ids)
+                    self.script_execution_ids.clear()
+
+                for script_execution_id in script_execution_ids:
+                    try:
+                        flush_log_buffer(script_execution_id)
+                    except Exception as e:
+                        logger.warning(f"Failed to flush log buffer of script execution {script_execution_id}: {e}")
+                        self.add(script_execution_id)
+
+                # The thread is idle most of the time, so don't keep its connections open
+                connections.close_all()
+        finally:
+            connections.close_all()
+
+
+def get_flusher():
+    """
+    Returns the flusher thread of the current process, starting it if needed. Threads are not copied when a worker
+    forks, so forked processes start their own flusher.
+    """
+    global flusher
+
+    if flusher is None or flusher.pid != os.getpid():
+        flusher = LogFlusher()
+        flusher.start()
+
+    return flusher
@@ -0,0 +1,130 @@
+import time
+from collections import defaultdict
+
+from .choices import LogLevelChoices
+
+
+class TokenBucket:
+    """
+    Allows `rate` events per second on average, with bursts of up to `burst` events.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def consume(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens < 1:
+            return False
+
+        self.tokens -= 1
+        return True
+
+
+class LogLimiter:
+    """
+    Decides which log lines of a script execution are written. Identical consecutive messages are collapsed into a
+    repeat count, each level is rate limited by a token bucket, and the execution is capped at a number of lines and
+    bytes. Settings left as None are not enforced.
+
+    `process()` and `finish()` return the lines to write as (level, message, full_message) tuples, where full_message
+    is the original message if it was truncated.
+    """
+
+    def __init__(self, deduplicate=True, rate_limit=None, rate_burst=None, max_lines=None, max_bytes=None, max_message_length=None):
+        self.deduplicate = deduplicate
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        self.max_message_length = max_message_length
+
+        self.buckets = defaultdict(lambda: TokenBucket(rate_limit, rate_burst or rate_limit)) if rate_limit else None
+        self.dropped = defaultdict(int)
+        self.last_message = None
+        self.repeats = 0
+        self.lines = 0
+        self.bytes = 0
+        self.overflowed = False
+
+    def process(self, level, message):
+        if self.deduplicate and (level, message) == self.last_message:
+            self.repeats += 1
+            return []
+
+        lines = self._flush_repeats()
+
+        # Repeats of a message dropped by the rate limit are dropped as well instead of counted as repeats
+        self.last_message = None
+
+        if self.buckets is not None:
+            if not self.buckets[level].consume():
+                self.dropped[level] += 1
+                return lines
+
+            lines.extend(self._flush_dropped(level))
+
+        self.last_message = (level, message)
+
+        full_message = None
+        if self.max_message_length and len(message) > self.max_message_length:
+            full_message = message
+            message = message[: self.max_message_length]
+
+        lines.append((level, message, full_message))
+
+        return self._apply_caps(lines)
+
+    def finish(self):
+        """
+        Returns the lines summarizing repeated and dropped messages which have not been written yet.
+        """
+        lines = self._flush_repeats()
+
+        for level in list(self.dropped):
+            lines.extend(self._flush_dropped(level))
+
+        return self._apply_caps(lines)
+
+    def _flush_repeats(self):
+        if not self.repeats:
+            return []
+
+        level, _ = self.last_message
+        repeats, self.repeats = self.repeats, 0
+
+        return [(level, f"Previous message repeated {repeats} more times.", None)]
+
+    def _flush_dropped(self, level):
+        dropped = self.dropped.pop(level, 0)
+
+        if not dropped:
+            return []
+
+        return [(LogLevelChoices.LOG_WARNING, f"{dropped} {level} messages were dropped by the log rate limit.", None)]
+
+    def _apply_caps(self, lines):
+        allowed = []
+
+        for level, message, full_message in lines:
+            if self.overflowed:
+                break
+
+            size = len(message.encode())
+
+            if (self.max_lines and self.lines >= self.max_lines) or (self.max_bytes and self.bytes + size > self.max_bytes):
+                self.overflowed = True
+                allowed.append(
+                    (LogLevelChoices.LOG_WARNING, "The log limit of the execution was reached, further messages are discarded.", None)
+                )
+                break
+
+            self.lines += 1
+            self.bytes += size
+            allowed.append((level, message, full_message))
+
+        return allowed
@@ -0,0 +1,78 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from netbox_script_manager import util
+from netbox_script_manager.models import ScriptInstance
+
+
+class Command(BaseCommand):
+    help = "Compare the overhead of dispatching a script with and without the script class cache used by ScriptWorker"
+
+    def add_arguments(self, parser):
+        parser.add_argument("script_instance", type=int, help="ID of the script instance to benchmark")
+        parser.add_argument("--iterations", type=int, default=100, help="Number of jobs per mode")
+
+    def handle(self, *args, **options):
+        try:
+            script_instance = ScriptInstance.objects.get(pk=options["script_instance"])
+        except ScriptInstance.DoesNotExist:
+            raise CommandError(f"Script instance {options['script_instance']} does not exist")
+
+        iterations = options["iterations"]
+
+        # Forked processes must not share the database connections
+        connections.close_all()
+
+        cold = self.benchmark(script_instance, iterations)
+        cold_dispatch = self.benchmark_dispatch(script_instance, iterations)
+
+        util.enable_script_class_cache(check_version=False)
+        util.refresh_script_class_cache()
+        util.get_script_class(script_instance.module_path, script_instance.class_name)
+        warm = self.benchmark(script_instance, iterations)
+        warm_dispatch = self.benchmark_dispatch(script_instance, iterations, preload=True)
+
+        self.stdout.write(f"Script: {script_instance.script_path} ({iterations} iterations)")
+        self.stdout.write(f"Reimport on every job: {cold * 1000:.3f} ms to instantiate, {cold_dispatch * 1000:.3f} ms to dispatch")
+        self.stdout.write(f"Script class cache:    {warm * 1000:.3f} ms to instantiate, {warm_dispatch * 1000:.3f} ms to dispatch")
+        speedup = f"Speedup: {cold / warm:.1f}x to instantiate, {cold_dispatch / warm_dispatch:.1f}x to dispatch"
+        self.stdout.write(self.style.SUCCESS(speedup))
+
+    def benchmark(self, script_instance, iterations):
+        start = time.perf_counter()
+
+        for _ in range(iterations):
+            script_class = util.get_script_class(script_instance.module_path, script_instance.class_name)
+            script_class()
+
+        return (time.perf_counter() - start) / iterations
+
+    def benchmark_dispatch(self, script_instance, iterations, preload=False):
+        """
+        Time the path of a job through ScriptWorker: the code version check and preload in the worker, forking the
+        work horse and instantiating the script in it.
+        """
+        start = time.perf_counter()
+
+        for _ in range(iterations):
+            if preload:
+                util.refresh_script_class_cache()
+                util.get_script_class(script_instance.module_path, script_instance.class_name)
+
+            pid = os.fork()
+            if pid == 0:
+                exit_code = 1
+                try:
+                    util.get_script_class(script_instance.module_path, script_instance.class_name)()
+                    exit_code = 0
+                finally:
+                    os._exit(exit_code)
+
+            _, status = os.waitpid(pid, 0)
+            if os.waitstatus_to_exitcode(status) != 0:
+                raise CommandError(f"Failed to instantiate {script_instance.script_path} in the forked process")
+
+        return (time.perf_counter() - start) / iterations
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from netbox_script_manager import bundles
+
+
+class Command(BaseCommand):
+    help = "Publish the customscripts tree of this node as the script bundle run by all workers"
+
+    def handle(self, *args, **options):
+        if not bundles.is_enabled():
+            raise CommandError("Script bundles are not enabled, set SCRIPT_BUNDLES to True in the plugin settings")
+
+        bundle = bundles.publish_bundle()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Published script bundle {bundle.hash} (commit {bundle.commit or 'unknown'}, {bundle.size} bytes)")
+        )
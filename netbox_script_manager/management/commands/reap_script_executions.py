@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from netbox_script_manager.concurrency import reclaim_fair_share_slots
+from netbox_script_manager.scripts import get_stale_executions, reap_stale_executions
+
+
+class Command(BaseCommand):
+    help = "Terminate script executions left running by dead workers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requeue", action="store_true", help="Enqueue a new execution with the same input for every reaped execution")
+        parser.add_argument("--dry-run", action="store_true", help="Only list the executions which would be reaped")
+
+    def handle(self, *args, **options):
+        if options["dry_run"]:
+            for script_execution in get_stale_executions():
+                self.stdout.write(f"{script_execution.pk}: {script_execution.script_instance.name} (started {script_execution.started})")
+            return
+
+        reaped = reap_stale_executions(requeue=options["requeue"] or None)
+
+        reclaimed = reclaim_fair_share_slots()
+
+        self.stdout.write(self.style.SUCCESS(f"Reaped {len(reaped)} script executions and reclaimed {reclaimed} fair share slots"))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from netbox_script_manager import logbuffer
+
+
+class Command(BaseCommand):
+    help = "Write log lines left in the redis log buffer by crashed workers to the database"
+
+    def handle(self, *args, **options):
+        if not logbuffer.is_enabled():
+            raise CommandError("The log buffer is not enabled (LOG_BUFFER)")
+
+        recovered = logbuffer.recover_log_buffers()
+
+        self.stdout.write(self.style.SUCCESS(f"Recovered {recovered} log buffers"))
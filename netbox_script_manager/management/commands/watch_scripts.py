@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from netbox_script_manager import util
+from netbox_script_manager.watcher import ScriptWatcher
+
+
+class Command(BaseCommand):
+    help = "Watch the script root and reload changed script modules in the script workers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--poll", action="store_true", help="Poll for changes instead of using inotify, e.g. for network file systems")
+
+    def handle(self, *args, **options):
+        if not util.plugin_config.get("SCRIPT_WATCHER"):
+            raise CommandError("The script watcher is not enabled, set SCRIPT_WATCHER to True in the plugin settings")
+
+        # Refreshing the manifests imports only the changed modules
+        util.enable_script_class_cache(check_version=False)
+
+        ScriptWatcher(polling=options["poll"]).run()
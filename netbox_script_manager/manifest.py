@@ -0,0 +1,253 @@
+import datetime
+import decimal
+import logging
+
+from django import forms
+from django.apps import apps
+from django.db.models import QuerySet
+from django.utils.functional import Promise
+from django.utils.module_loading import import_string
+
+from .models import ScriptInstance
+from .scripts import CustomScript
+from .templatetags.scriptmanager import format_exception
+from .util import CUSTOM_SCRIPT_SUBPACKAGE, get_script_class, is_module_in
+
+logger = logging.getLogger("netbox.plugins.netbox_script_manager")
+
+# Bump when the manifest format changes, manifests of other versions are ignored until the scripts are loaded again
+MANIFEST_VERSION = 1
+
+# Meta options of the script copied to the manifest
+MANIFEST_META = (
+    "name",
+    "description",
+    "field_order",
+    "fieldsets",
+    "commit_default",
+    "job_timeout",
+    "scheduling_enabled",
+    "task_queues",
+    "max_concurrency",
+    "concurrency_policy",
+    "transaction_mode",
+    "checkpoint_size",
+    "memory_limit",
+    "cpu_time_limit",
+    "open_files_limit",
+)
+
+
+class ManifestError(Exception):
+    pass
+
+
+def _get_import_path(obj):
+    path = f"{obj.__module__}.{obj.__qualname__}"
+
+    # Anything defined by the scripts themselves can only be rebuilt by importing the scripts
+    if path.startswith(f"{CUSTOM_SCRIPT_SUBPACKAGE}."):
+        raise ManifestError(f"{path} is defined in a script module")
+
+    return path
+
+
+def serialize_value(value):
+    """
+    Serialize a value of the field attributes of a script variable to JSON. Values which are not plain JSON are
+    stored as a dict with a `__type__` key.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+
+    if isinstance(value, Promise):
+        return str(value)
+
+    if isinstance(value, (list, tuple)):
+        return [serialize_value(item) for item in value]
+
+    if isinstance(value, dict):
+        return {str(key): serialize_value(item) for key, item in value.items()}
+
+    if isinstance(value, QuerySet):
+        # Filters of the queryset are still enforced when the worker validates the input
+        return {"__type__": "queryset", "model": value.model._meta.label_lower}
+
+    if isinstance(value, decimal.Decimal):
+        return {"__type__": "decimal", "value": str(value)}
+
+    if isinstance(value, datetime.datetime):
+        return {"__type__": "datetime", "value": value.isoformat()}
+
+    if isinstance(value, datetime.date):
+        return {"__type__": "date", "value": value.isoformat()}
+
+    if isinstance(value, type):
+        return {"__type__": "class", "path": _get_import_path(value)}
+
+    if isinstance(value, forms.Widget):
+        return {"__type__": "widget", "path": _get_import_path(type(value)), "attrs": serialize_value(value.attrs)}
+
+    # Validators and most other Django utilities can be deconstructed into their constructor arguments
+    if hasattr(value, "deconstruct"):
+        path, args, kwargs = value.deconstruct()
+        if path.startswith(f"{CUSTOM_SCRIPT_SUBPACKAGE}."):
+            raise ManifestError(f"{path} is defined in a script module")
+
+        return {"__type__": "deconstructed", "path": path, "args": serialize_value(args), "kwargs": serialize_value(kwargs)}
+
+    raise ManifestError(f"Unable to serialize {value!r}")
+
+
+def deserialize_value(value):
+    if isinstance(value, list):
+        return [deserialize_value(item) for item in value]
+
+    if not isinstance(value, dict):
+        return value
+
+    value_type = value.get("__type__")
+
+    if value_type is None:
+        return {key: deserialize_value(item) for key, item in value.items()}
+
+    if value_type == "queryset":
+        app_label, model_name = value["model"].split(".")
+        return apps.get_model(app_label, model_name).objects.all()
+
+    if value_type == "decimal":
+        return decimal.Decimal(value["value"])
+
+    if value_type == "datetime":
+        return datetime.datetime.fromisoformat(value["value"])
+
+    if value_type == "date":
+        return datetime.date.fromisoformat(value["value"])
+
+    if value_type == "class":
+        return import_string(value["path"])
+
+    if value_type == "widget":
+        return import_string(value["path"])(attrs=deserialize_value(value["attrs"]))
+
+    if value_type == "deconstructed":
+        return import_string(value["path"])(*deserialize_value(value["args"]), **deserialize_value(value["kwargs"]))
+
+    raise ManifestError(f"Unknown manifest value type {value_type}")
+
+
+def build_manifest(script_class):
+    """
+    Capture the variables and Meta options of a script class. If a variable can't be described without the script
+    module, the variables are left out and the script is imported when its form is needed.
+    """
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "meta": serialize_value({option: getattr(script_class, option) for option in MANIFEST_META}),
+        "vars": None,
+        "error": None,
+    }
+
+    try:
+        # A list of pairs as the variable order is not kept by jsonb
+        manifest["vars"] = [
+            [name, {"class": _get_import_path(type(var)), "field_attrs": serialize_value(var.field_attrs)}]
+            for name, var in script_class._get_vars().items()
+        ]
+    except ManifestError as e:
+        logger.info(f"Script {script_class.full_name} will be imported to render its form: {e}")
+
+    return manifest
+
+
+def update_manifests(scripts, failed_modules, script_instances=None):
+    """
+    Update the manifests of the given script instances, or all script instances, from the scripts returned by
+    `load_scripts()`.
+    """
+    if script_instances is None:
+        script_instances = ScriptInstance.objects.all()
+
+    for script_instance in script_instances:
+        if script_instance.script_path in scripts:
+            manifest = build_manifest(scripts[script_instance.script_path])
+        elif script_instance.module_path in failed_modules:
+            manifest = {"version": MANIFEST_VERSION, "error": format_exception(failed_modules[script_instance.module_path])}
+        else:
+            manifest = {"version": MANIFEST_VERSION, "error": f"Script {script_instance.script_path} was not found."}
+
+        # Not a change made by the user, so the change log is bypassed
+        ScriptInstance.objects.filter(pk=script_instance.pk).update(manifest=manifest)
+
+
+def refresh_manifests(module_names):
+    """
+    Update the manifests of the script instances in the given modules, or in submodules of them. Only these modules
+    are imported.
+    """
+    script_instances = [
+        script_instance for script_instance in ScriptInstance.objects.all() if is_module_in(script_instance.module_path, module_names)
+    ]
+    scripts = {}
+    failed_modules = {}
+
+    for script_instance in script_instances:
+        try:
+            script_class = get_script_class(script_instance.module_path, script_instance.class_name)
+        except Exception as e:
+            failed_modules[script_instance.module_path] = e
+            continue
+
+        if script_class is not None:
+            scripts[script_instance.script_path] = script_class
+
+    update_manifests(scripts, failed_modules, script_instances)
+
+
+class ManifestScript:
+    """
+    A stand-in for a script built from the manifest of a script instance. It provides the parts of CustomScript used
+    to render and validate script input, without importing the script.
+    """
+
+    as_form = CustomScript.as_form
+    as_input_form = CustomScript.as_input_form
+    get_fieldsets = CustomScript.get_fieldsets
+
+    def __init__(self, manifest):
+        self.manifest = manifest
+
+        for option, value in manifest["meta"].items():
+            setattr(self, option, value)
+
+    def _get_vars(self):
+        vars = {}
+
+        for name, spec in self.manifest["vars"]:
+            var_class = import_string(spec["class"])
+
+            # The field attributes are all a script variable needs to create its form field
+            var = var_class.__new__(var_class)
+            var.field_attrs = deserialize_value(spec["field_attrs"])
+            vars[name] = var
+
+        return vars
+
+
+def get_manifest_script(script_instance):
+    """
+    Returns the script of the script instance built from its manifest. Raises ManifestError if the script failed to
+    load, and falls back to importing the script if the manifest can't describe it.
+    """
+    manifest = script_instance.manifest or {}
+
+    if manifest.get("version") != MANIFEST_VERSION:
+        return script_instance.script
+
+    if manifest.get("error"):
+        raise ManifestError(manifest["error"])
+
+    if manifest.get("vars") is None:
+        return script_instance.script
+
+    return ManifestScript(manifest)
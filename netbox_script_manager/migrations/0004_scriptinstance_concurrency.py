@@ -0,0 +1,31 @@
+# Generated by Django 5.1.4 on 2026-10-19 09:12
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("netbox_script_manager", "0003_scriptinstance_tenant"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scriptinstance",
+            name="max_concurrency",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text=(
+                    "Maximum number of concurrently running executions of the script. Set to 1 to only allow a single execution at a "
+                    "time."
+                ),
+                null=True,
+                validators=[django.core.validators.MinValueValidator(1)],
+            ),
+        ),
+        migrations.AddField(
+            model_name="scriptinstance",
+            name="concurrency_policy",
+            field=models.CharField(default="queue", help_text="How executions exceeding the concurrency limit are handled", max_length=30),
+        ),
+    ]
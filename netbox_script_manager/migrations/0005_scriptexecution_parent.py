@@ -0,0 +1,24 @@
+# Generated by Django 5.1.4 on 2026-10-19 10:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("netbox_script_manager", "0004_scriptinstance_concurrency"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scriptexecution",
+            name="parent",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="children",
+                to="netbox_script_manager.scriptexecution",
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-19 10:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("netbox_script_manager", "0005_scriptexecution_parent"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scriptexecution",
+            name="commit",
+            field=models.BooleanField(default=True),
+        ),
+    ]
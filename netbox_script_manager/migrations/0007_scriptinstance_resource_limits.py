@@ -0,0 +1,43 @@
+# Generated by Django 5.1.4 on 2026-10-19 11:05
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("netbox_script_manager", "0006_scriptexecution_commit"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scriptinstance",
+            name="memory_limit",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Maximum address space of the script process in megabytes",
+                null=True,
+                validators=[django.core.validators.MinValueValidator(1)],
+            ),
+        ),
+        migrations.AddField(
+            model_name="scriptinstance",
+            name="cpu_time_limit",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Maximum CPU time of the script process in seconds",
+                null=True,
+                validators=[django.core.validators.MinValueValidator(1)],
+            ),
+        ),
+        migrations.AddField(
+            model_name="scriptinstance",
+            name="open_files_limit",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Maximum number of open files of the script process",
+                null=True,
+                validators=[django.core.validators.MinValueValidator(1)],
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-19 11:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("netbox_script_manager", "0007_scriptinstance_resource_limits"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scriptinstance",
+            name="manifest",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
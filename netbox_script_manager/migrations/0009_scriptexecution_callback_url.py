@@ -0,0 +1,21 @@
+# Generated by Django 5.1.4 on 2026-10-19 11:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("netbox_script_manager", "0008_scriptinstance_manifest"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scriptexecution",
+            name="callback_url",
+            field=models.URLField(
+                blank=True,
+                help_text="URL notified with a POST request when the execution completes",
+                max_length=500,
+            ),
+        ),
+    ]
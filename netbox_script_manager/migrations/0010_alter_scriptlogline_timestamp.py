@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-19 12:14
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("netbox_script_manager", "0009_scriptexecution_callback_url"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="scriptlogline",
+            name="timestamp",
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.4 on 2026-10-19 13:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("netbox_script_manager", "0010_alter_scriptlogline_timestamp"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="scriptlogline",
+            index=models.Index(fields=["script_execution", "id"], name="nsm_scriptlogline_cursor"),
+        ),
+        migrations.AddIndex(
+            model_name="scriptexecution",
+            index=models.Index(fields=["created", "id"], name="nsm_scriptexecution_cursor"),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.4 on 2026-10-19 13:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("netbox_script_manager", "0011_cursor_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScriptStatistic",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False)),
+                ("date", models.DateField()),
+                ("status_counts", models.JSONField(default=dict)),
+                ("duration_count", models.PositiveIntegerField(default=0)),
+                ("duration_total", models.FloatField(default=0)),
+                ("duration_min", models.FloatField(blank=True, null=True)),
+                ("duration_max", models.FloatField(blank=True, null=True)),
+                ("duration_histogram", models.JSONField(default=list)),
+                ("queue_wait_count", models.PositiveIntegerField(default=0)),
+                ("queue_wait_total", models.FloatField(default=0)),
+                ("queue_wait_max", models.FloatField(blank=True, null=True)),
+                ("queue_wait_histogram", models.JSONField(default=list)),
+                (
+                    "script_instance",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="statistics",
+                        to="netbox_script_manager.scriptinstance",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("-date",),
+                "constraints": [
+                    models.UniqueConstraint(fields=("script_instance", "date"), name="nsm_scriptstatistic_unique_date"),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.4 on 2026-10-19 15:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("netbox_script_manager", "0013_scriptpipeline"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScriptBundle",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False)),
+                ("hash", models.CharField(max_length=64, unique=True)),
+                ("commit", models.CharField(blank=True, max_length=40)),
+                ("size", models.PositiveIntegerField()),
+                ("data", models.BinaryField()),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("published", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                "ordering": ("-published",),
+            },
+        ),
+        migrations.AddField(
+            model_name="scriptexecution",
+            name="bundle",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="netbox_script_manager.scriptbundle",
+            ),
+        ),
+    ]
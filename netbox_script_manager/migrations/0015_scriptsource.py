@@ -0,0 +1,37 @@
+# Generated by Django 5.1.4 on 2026-10-19 16:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("netbox_script_manager", "0014_scriptbundle"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScriptSource",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False)),
+                ("hash", models.CharField(max_length=64, unique=True)),
+                ("filename", models.CharField(blank=True, max_length=500)),
+                ("source", models.TextField()),
+                ("created", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "ordering": ("-created",),
+            },
+        ),
+        migrations.AddField(
+            model_name="scriptexecution",
+            name="source",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="netbox_script_manager.scriptsource",
+            ),
+        ),
+    ]
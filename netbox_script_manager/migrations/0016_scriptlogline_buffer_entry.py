@@ -0,0 +1,25 @@
+# Generated by Django 5.1.4 on 2026-10-19 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("netbox_script_manager", "0015_scriptsource"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scriptlogline",
+            name="buffer_entry",
+            field=models.CharField(blank=True, editable=False, max_length=50, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name="scriptlogline",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("buffer_entry__isnull", False)),
+                fields=("script_execution", "buffer_entry"),
+                name="nsm_scriptlogline_unique_buffer_entry",
+            ),
+        ),
+    ]
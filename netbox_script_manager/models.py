@@ -1,28 +1,80 @@
-import importlib
+import hashlib
 import json
-import threading
 from functools import cached_property
 
-import django_rq
 from django.conf import settings
 from users.models import User
 from django.contrib.postgres.fields import ArrayField
 from django.core import serializers
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import models, transaction
 from django.urls import reverse
 from django.utils import timezone
 from netbox.models import PrimaryModel
 from netbox.models.features import ChangeLoggingMixin, ExportTemplatesMixin, EventRulesMixin
 from utilities.querysets import RestrictedQuerySet
 
-from .choices import LogLevelChoices, ScriptExecutionStatusChoices
-from .util import clear_module_cache
+from . import logbuffer
+from .choices import ConcurrencyPolicyChoices, LogLevelChoices, ScriptExecutionStatusChoices
+from .notifications import enqueue_callback, publish_status
+from .pipelines import get_step_order, validate_steps
+from .spool import remove_spool
+from .stats import add_to_histogram, get_percentile, merge_histograms
+from .util import get_script_class
 
-lock = threading.Lock()
 plugin_config = settings.PLUGINS_CONFIG.get("netbox_script_manager")
 
 
+class ScriptExecutionQuerySet(RestrictedQuerySet):
+    def for_list(self):
+        """
+        Fetch everything needed to display executions in lists and the API in a fixed number of queries. The data
+        field can be large and is not displayed, so it's deferred.
+        """
+        return self.select_related("script_instance", "user", "parent", "parent__script_instance").defer("data", "parent__data")
+
+
+class ScriptArtifactQuerySet(RestrictedQuerySet):
+    def for_list(self):
+        """
+        Fetch everything needed to display artifacts in lists and the API without loading the artifact data.
+        """
+        return self.select_related("script_execution", "script_execution__script_instance").defer("data", "script_execution__data")
+
+
+class ScriptInstanceQuerySet(RestrictedQuerySet):
+    def for_list(self):
+        """
+        Fetch everything needed to display script instances in lists and the API in a fixed number of queries.
+        """
+        return self.with_last_execution().select_related("tenant").prefetch_related("tags").defer("manifest")
+
+    def with_last_execution(self):
+        """
+        Annotate the id and creation time of the last execution, avoiding a query per script instance in lists.
+        """
+        last_execution = ScriptExecution.objects.filter(script_instance=models.OuterRef("pk")).order_by("-created")
+
+        return self.annotate(
+            last_execution_id=models.Subquery(last_execution.values("pk")[:1]),
+            last_execution_created=models.Subquery(last_execution.values("created")[:1]),
+        )
+
+
+class ScriptPipelineRunQuerySet(RestrictedQuerySet):
+    def for_list(self):
+        """
+        Fetch everything needed to display pipeline runs in lists and the API in a fixed number of queries. The
+        completion time of the last execution is annotated to avoid a query per run.
+        """
+        return (
+            self.select_related("pipeline", "user")
+            .prefetch_related("script_executions__script_instance")
+            .annotate(last_completed=models.Max("script_executions__completed"))
+        )
+
+
 class ScriptLogLine(models.Model):
     script_execution = models.ForeignKey(
         to="ScriptExecution",
@@ -31,7 +83,10 @@ class ScriptLogLine(models.Model):
     )
     level = models.CharField(max_length=50, choices=LogLevelChoices)
     message = models.TextField()
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add, as buffered log lines are written with the time they were logged
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
+    # Id of the stream entry of a line written from the log buffer, so it's only written once
+    buffer_entry = models.CharField(max_length=50, null=True, blank=True, editable=False)
 
     objects = RestrictedQuerySet.as_manager()
 
@@ -40,7 +95,16 @@ class ScriptLogLine(models.Model):
         indexes = [
             models.Index(fields=["level"]),
             models.Index(fields=["timestamp"]),
+            # Used by the keyset pagination of the log lines of an execution
+            models.Index(fields=["script_execution", "id"], name="nsm_scriptlogline_cursor"),
         ]
+        constraints = (
+            models.UniqueConstraint(
+                fields=("script_execution", "buffer_entry"),
+                condition=models.Q(buffer_entry__isnull=False),
+                name="nsm_scriptlogline_unique_buffer_entry",
+            ),
+        )
 
     def __str__(self):
         return str(self.pk)
@@ -59,7 +123,7 @@ class ScriptArtifact(models.Model):
         related_name="script_artifacts",
     )
 
-    objects = RestrictedQuerySet.as_manager()
+    objects = ScriptArtifactQuerySet.as_manager()
 
     class Meta:
         ordering = ("id",)
@@ -77,6 +141,34 @@ class ScriptExecution(ExportTemplatesMixin, EventRulesMixin, ChangeLoggingMixin,
         on_delete=models.CASCADE,
         related_name="script_executions",
     )
+    parent = models.ForeignKey(
+        to="self",
+        on_delete=models.CASCADE,
+        related_name="children",
+        blank=True,
+        null=True,
+    )
+    pipeline_run = models.ForeignKey(
+        to="ScriptPipelineRun",
+        on_delete=models.SET_NULL,
+        related_name="script_executions",
+        blank=True,
+        null=True,
+    )
+    bundle = models.ForeignKey(
+        to="ScriptBundle",
+        on_delete=models.SET_NULL,
+        related_name="+",
+        blank=True,
+        null=True,
+    )
+    source = models.ForeignKey(
+        to="ScriptSource",
+        on_delete=models.SET_NULL,
+        related_name="+",
+        blank=True,
+        null=True,
+    )
     user = models.ForeignKey(to=User, on_delete=models.SET_NULL, related_name="+", blank=True, null=True)
     created = models.DateTimeField(auto_now_add=True)
     started = models.DateTimeField(
@@ -97,6 +189,12 @@ class ScriptExecution(ExportTemplatesMixin, EventRulesMixin, ChangeLoggingMixin,
         blank=True,
     )
     task_queue = models.CharField(max_length=100, default="default")
+    commit = models.BooleanField(default=True)
+    callback_url = models.URLField(
+        max_length=500,
+        blank=True,
+        help_text="URL notified with a POST request when the execution completes",
+    )
     interval = models.PositiveIntegerField(
         blank=True,
         null=True,
@@ -114,13 +212,15 @@ class ScriptExecution(ExportTemplatesMixin, EventRulesMixin, ChangeLoggingMixin,
         default=dict,
     )
 
-    objects = RestrictedQuerySet.as_manager()
+    objects = ScriptExecutionQuerySet.as_manager()
 
     class Meta:
         ordering = ("-created",)
         indexes = [
             models.Index(fields=["started"]),
             models.Index(fields=["completed"]),
+            # Used by the keyset pagination of executions
+            models.Index(fields=["created", "id"], name="nsm_scriptexecution_cursor"),
         ]
 
     def start(self):
@@ -131,25 +231,84 @@ class ScriptExecution(ExportTemplatesMixin, EventRulesMixin, ChangeLoggingMixin,
         self.status = ScriptExecutionStatusChoices.STATUS_RUNNING
         self.save()
 
+        publish_status(self)
+
     def terminate(self, status=ScriptExecutionStatusChoices.STATUS_COMPLETED):
         valid_statuses = ScriptExecutionStatusChoices.TERMINAL_STATE_CHOICES
 
         if status not in valid_statuses:
             raise ValueError(f"Invalid status for job termination. Choices are: {', '.join(valid_statuses)}")
 
+        # Make sure the complete log is in the database before anyone is told the execution completed
+        if logbuffer.is_enabled():
+            logbuffer.flush_log_buffer(self.pk)
+
         self.status = status
         self.completed = timezone.now()
         self.save()
 
+        publish_status(self)
+
+        if self.callback_url:
+            enqueue_callback(self)
+
+        # Shards are accounted for by their parent execution
+        if self.parent_id is None:
+            ScriptStatistic.record(self)
+
+    def save(self, *args, **kwargs):
+        # New executions run the scripts of the current bundle, whichever node picks them up
+        if self._state.adding and self.bundle_id is None:
+            from . import bundles
+
+            if bundles.is_enabled():
+                self.bundle_id = bundles.get_current_bundle_id()
+
+        super().save(*args, **kwargs)
+
     def delete(self, *args, **kwargs):
         super().delete(*args, **kwargs)
 
+        # The parent of a shard deleted before it finished can't wait for it
+        if self.parent_id and self.status not in ScriptExecutionStatusChoices.TERMINAL_STATE_CHOICES:
+            from .scripts import complete_fanned_out_execution
+
+            complete_fanned_out_execution(self.parent_id)
+
+        import django_rq
+
         queue = django_rq.get_queue(self.task_queue)
         task = queue.fetch_job(str(self.task_id))
 
         if task:
             task.cancel()
 
+            from .concurrency import fair_share_release
+
+            fair_share_release(task)
+
+        self.release_spooled_files()
+
+    def release_spooled_files(self):
+        """
+        Remove the uploaded files of the execution from the spool, unless they are still needed by another execution
+        sharing them, like the next execution of an interval or the shards of a fanned out execution.
+        """
+        spool_id = self.data.get("spool_id") if self.data else None
+
+        if not spool_id:
+            return
+
+        in_use = (
+            ScriptExecution.objects.filter(data__spool_id=spool_id)
+            .exclude(pk=self.pk)
+            .exclude(status__in=ScriptExecutionStatusChoices.TERMINAL_STATE_CHOICES)
+            .exists()
+        )
+
+        if not in_use:
+            remove_spool(spool_id)
+
     def serialize_object(obj, resolve_tags=True, extra=None, exclude=None):
         """
         While the netbox serialize_object claims to support excluding fields, it doesn't in reality.
@@ -204,6 +363,36 @@ class ScriptInstance(PrimaryModel):
         default=list,
         help_text="Comma separated list of available task queues for the script",
     )
+    max_concurrency = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        validators=(MinValueValidator(1),),
+        help_text="Maximum number of concurrently running executions of the script. Set to 1 to only allow a single execution at a time.",
+    )
+    concurrency_policy = models.CharField(
+        max_length=30,
+        choices=ConcurrencyPolicyChoices,
+        default=ConcurrencyPolicyChoices.POLICY_QUEUE,
+        help_text="How executions exceeding the concurrency limit are handled",
+    )
+    memory_limit = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        validators=(MinValueValidator(1),),
+        help_text="Maximum address space of the script process in megabytes",
+    )
+    cpu_time_limit = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        validators=(MinValueValidator(1),),
+        help_text="Maximum CPU time of the script process in seconds",
+    )
+    open_files_limit = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        validators=(MinValueValidator(1),),
+        help_text="Maximum number of open files of the script process",
+    )
     tenant = models.ForeignKey(
         to="tenancy.Tenant",
         on_delete=models.SET_NULL,
@@ -211,16 +400,19 @@ class ScriptInstance(PrimaryModel):
         blank=True,
         null=True,
     )
+    manifest = models.JSONField(
+        blank=True,
+        default=dict,
+        editable=False,
+    )
+
+    objects = ScriptInstanceQuerySet.as_manager()
 
     @cached_property
     def script(self):
-        with lock:
-            clear_module_cache()
-
-            module = importlib.import_module(self.module_path)
-            script_class = getattr(module, self.class_name, None)
+        script_class = get_script_class(self.module_path, self.class_name)
 
-            return script_class()
+        return script_class()
 
     @property
     def last_execution(self):
@@ -244,3 +436,280 @@ class ScriptInstance(PrimaryModel):
 
     def get_absolute_url(self):
         return reverse("plugins:netbox_script_manager:scriptinstance", args=[self.pk])
+
+
+class ScriptStatistic(models.Model):
+    """
+    Daily rollup of the executions of a script instance, updated as executions terminate. Durations and queue wait
+    times are in seconds, and percentiles are estimated from histograms.
+    """
+
+    script_instance = models.ForeignKey(
+        to="ScriptInstance",
+        on_delete=models.CASCADE,
+        related_name="statistics",
+    )
+    date = models.DateField()
+    status_counts = models.JSONField(default=dict)
+    duration_count = models.PositiveIntegerField(default=0)
+    duration_total = models.FloatField(default=0)
+    duration_min = models.FloatField(null=True, blank=True)
+    duration_max = models.FloatField(null=True, blank=True)
+    duration_histogram = models.JSONField(default=list)
+    queue_wait_count = models.PositiveIntegerField(default=0)
+    queue_wait_total = models.FloatField(default=0)
+    queue_wait_max = models.FloatField(null=True, blank=True)
+    queue_wait_histogram = models.JSONField(default=list)
+
+    objects = RestrictedQuerySet.as_manager()
+
+    class Meta:
+        ordering = ("-date",)
+        constraints = (models.UniqueConstraint(fields=("script_instance", "date"), name="nsm_scriptstatistic_unique_date"),)
+
+    def __str__(self):
+        return f"{self.script_instance_id} ({self.date})"
+
+    @classmethod
+    def record(cls, script_execution):
+        """
+        Add a terminated execution to the statistics of its day.
+        """
+        date = timezone.localdate(script_execution.completed)
+
+        with transaction.atomic():
+            statistic, _ = cls.objects.select_for_update().get_or_create(script_instance_id=script_execution.script_instance_id, date=date)
+
+            statistic.status_counts[script_execution.status] = statistic.status_counts.get(script_execution.status, 0) + 1
+
+            # Executions dropped before starting, like rejected executions, have no duration
+            if script_execution.started:
+                duration = (script_execution.completed - script_execution.started).total_seconds()
+                statistic.duration_count += 1
+                statistic.duration_total += duration
+                statistic.duration_min = duration if statistic.duration_min is None else min(statistic.duration_min, duration)
+                statistic.duration_max = duration if statistic.duration_max is None else max(statistic.duration_max, duration)
+                statistic.duration_histogram = add_to_histogram(statistic.duration_histogram, duration)
+
+                queued_since = script_execution.scheduled or script_execution.created
+                queue_wait = max((script_execution.started - queued_since).total_seconds(), 0)
+                statistic.queue_wait_count += 1
+                statistic.queue_wait_total += queue_wait
+                statistic.queue_wait_max = queue_wait if statistic.queue_wait_max is None else max(statistic.queue_wait_max, queue_wait)
+                statistic.queue_wait_histogram = add_to_histogram(statistic.queue_wait_histogram, queue_wait)
+
+            statistic.save()
+
+    @classmethod
+    def combine(cls, statistics):
+        """
+        Returns an unsaved statistic combining the given statistics, e.g. to summarize a week.
+        """
+        combined = cls(status_counts={})
+        statistics = list(statistics)
+
+        for statistic in statistics:
+            for status, count in statistic.status_counts.items():
+                combined.status_counts[status] = combined.status_counts.get(status, 0) + count
+
+            combined.duration_count += statistic.duration_count
+            combined.duration_total += statistic.duration_total
+            combined.queue_wait_count += statistic.queue_wait_count
+            combined.queue_wait_total += statistic.queue_wait_total
+
+        durations_min = [statistic.duration_min for statistic in statistics if statistic.duration_min is not None]
+        durations_max = [statistic.duration_max for statistic in statistics if statistic.duration_max is not None]
+        queue_waits_max = [statistic.queue_wait_max for statistic in statistics if statistic.queue_wait_max is not None]
+
+        combined.duration_min = min(durations_min, default=None)
+        combined.duration_max = max(durations_max, default=None)
+        combined.queue_wait_max = max(queue_waits_max, default=None)
+        combined.duration_histogram = merge_histograms(statistic.duration_histogram for statistic in statistics)
+        combined.queue_wait_histogram = merge_histograms(statistic.queue_wait_histogram for statistic in statistics)
+
+        return combined
+
+    @property
+    def runs(self):
+        return sum(self.status_counts.values())
+
+    @property
+    def duration_avg(self):
+        return self.duration_total / self.duration_count if self.duration_count else None
+
+    @property
+    def duration_p50(self):
+        return get_percentile(self.duration_histogram, 50, self.duration_max)
+
+    @property
+    def duration_p95(self):
+        return get_percentile(self.duration_histogram, 95, self.duration_max)
+
+    @property
+    def queue_wait_avg(self):
+        return self.queue_wait_total / self.queue_wait_count if self.queue_wait_count else None
+
+    @property
+    def queue_wait_p95(self):
+        return get_percentile(self.queue_wait_histogram, 95, self.queue_wait_max)
+
+
+class ScriptPipeline(PrimaryModel):
+    """
+    A pipeline of script instances run as a directed acyclic graph. The steps are defined as a list of step
+    definitions, see validate_steps() for the format.
+    """
+
+    name = models.CharField(max_length=100, unique=True)
+    steps = models.JSONField(
+        default=list,
+        help_text=(
+            "List of steps, each with a name, the ID of a script instance and optionally depends_on, input, inputs_from and "
+            "task_queue"
+        ),
+    )
+
+    objects = RestrictedQuerySet.as_manager()
+
+    class Meta:
+        ordering = ("name",)
+
+    def __str__(self):
+        return self.name
+
+    def clean(self):
+        super().clean()
+
+        validate_steps(self.steps)
+
+        script_ids = {step["script"] for step in self.steps}
+        existing_ids = set(ScriptInstance.objects.filter(pk__in=script_ids).values_list("pk", flat=True))
+        missing_ids = script_ids - existing_ids
+
+        if missing_ids:
+            raise ValidationError({"steps": f"Unknown script instances: {', '.join(map(str, sorted(missing_ids)))}"})
+
+    @property
+    def ordered_steps(self):
+        return get_step_order(self.steps)
+
+    def get_absolute_url(self):
+        return reverse("plugins:netbox_script_manager:scriptpipeline", args=[self.pk])
+
+
+class ScriptPipelineRun(models.Model):
+    """
+    A run of a pipeline. Every step is run as a script execution linked to the run, and the status of the run is
+    derived from the status of its executions.
+    """
+
+    pipeline = models.ForeignKey(
+        to="ScriptPipeline",
+        on_delete=models.CASCADE,
+        related_name="runs",
+    )
+    user = models.ForeignKey(to=User, on_delete=models.SET_NULL, related_name="+", blank=True, null=True)
+    created = models.DateTimeField(auto_now_add=True)
+    commit = models.BooleanField(default=True)
+
+    objects = ScriptPipelineRunQuerySet.as_manager()
+
+    class Meta:
+        ordering = ("-created",)
+
+    def __str__(self):
+        return f"{self.pipeline.name} ({self.pk})"
+
+    def get_absolute_url(self):
+        return reverse("plugins:netbox_script_manager:scriptpipelinerun", args=[self.pk])
+
+    @property
+    def status(self):
+        statuses = [script_execution.status for script_execution in self.script_executions.all()]
+        terminal_statuses = ScriptExecutionStatusChoices.TERMINAL_STATE_CHOICES
+
+        if any(status not in terminal_statuses for status in statuses):
+            if ScriptExecutionStatusChoices.STATUS_RUNNING in statuses:
+                return ScriptExecutionStatusChoices.STATUS_RUNNING
+            return ScriptExecutionStatusChoices.STATUS_PENDING
+
+        if all(status == ScriptExecutionStatusChoices.STATUS_COMPLETED for status in statuses):
+            return ScriptExecutionStatusChoices.STATUS_COMPLETED
+
+        return ScriptExecutionStatusChoices.STATUS_FAILED
+
+    def get_status_display(self):
+        return dict(ScriptExecutionStatusChoices).get(self.status)
+
+    def get_status_color(self):
+        return ScriptExecutionStatusChoices.colors.get(self.status)
+
+    @property
+    def completed(self):
+        if self.status not in ScriptExecutionStatusChoices.TERMINAL_STATE_CHOICES:
+            return None
+
+        # Annotated by ScriptPipelineRunQuerySet.for_list()
+        if hasattr(self, "last_completed"):
+            return self.last_completed
+
+        return self.script_executions.aggregate(last_completed=models.Max("completed"))["last_completed"]
+
+    @property
+    def ordered_executions(self):
+        """
+        Returns the executions of the run in the order of the pipeline steps at the time the run was started.
+        """
+        return sorted(self.script_executions.all(), key=lambda script_execution: script_execution.data.get("pipeline_order", 0))
+
+
+class ScriptBundle(models.Model):
+    """
+    A zip archive of the customscripts tree, stored by the hash of its content. Executions are pinned to the bundle
+    which was current when they were created, so every worker runs the same revision of the scripts.
+    """
+
+    hash = models.CharField(max_length=64, unique=True)
+    commit = models.CharField(max_length=40, blank=True)
+    size = models.PositiveIntegerField()
+    data = models.BinaryField()
+    created = models.DateTimeField(auto_now_add=True)
+    published = models.DateTimeField(default=timezone.now)
+
+    objects = RestrictedQuerySet.as_manager()
+
+    class Meta:
+        ordering = ("-published",)
+
+    def __str__(self):
+        return self.hash[:12]
+
+
+class ScriptSource(models.Model):
+    """
+    A snapshot of the source of a script module, stored once per distinct file name and content. Executions link to the
+    snapshot of the source they ran.
+    """
+
+    hash = models.CharField(max_length=64, unique=True)
+    filename = models.CharField(max_length=500, blank=True)
+    source = models.TextField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    objects = RestrictedQuerySet.as_manager()
+
+    class Meta:
+        ordering = ("-created",)
+
+    def __str__(self):
+        return self.hash[:12]
+
+    @classmethod
+    def snapshot(cls, source, filename=""):
+        """
+        Returns the snapshot of the given source, creating it if the source hasn't been seen before.
+        """
+        source_hash = hashlib.sha256(f"{filename}\0{source}".encode()).hexdigest()
+        snapshot, _ = cls.objects.get_or_create(hash=source_hash, defaults={"source": source, "filename": filename})
+
+        return snapshot
@@ -19,4 +19,17 @@ menu_items = (
         link_text="Executions",
         permissions=["netbox_script_manager.view_scriptexecution"],
     ),
+    PluginMenuItem(
+        link="plugins:netbox_script_manager:scriptpipeline_list",
+        link_text="Pipelines",
+        permissions=["netbox_script_manager.view_scriptpipeline"],
+        buttons=(
+            PluginMenuButton(
+                link="plugins:netbox_script_manager:scriptpipeline_add",
+                title="Add",
+                icon_class="mdi mdi-plus-thick",
+                permissions=["netbox_script_manager.add_scriptpipeline"],
+            ),
+        ),
+    ),
 )
@@ -0,0 +1,164 @@
+import ipaddress
+import logging
+import socket
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import transaction
+from django.http.request import validate_host
+
+from .util import get_redis_connection
+
+logger = logging.getLogger("netbox.plugins.netbox_script_manager")
+
+plugin_config = settings.PLUGINS_CONFIG.get("netbox_script_manager")
+
+CHANNEL_PREFIX = "netbox_script_manager:execution"
+CALLBACK_TIMEOUT = 10
+CALLBACK_RETRY_INTERVALS = [10, 60, 300]
+
+
+def get_channel(script_execution_id):
+    return f"{CHANNEL_PREFIX}:{script_execution_id}"
+
+
+def publish_status(script_execution):
+    """
+    Publish the status of the script execution to anyone waiting for it. The status is published when the current
+    transaction is committed, so waiters always read the new status from the database.
+    """
+    channel = get_channel(script_execution.pk)
+    status = script_execution.status
+
+    def _publish():
+        from redis.exceptions import RedisError
+
+        try:
+            get_redis_connection().publish(channel, status)
+        except RedisError as e:
+            logger.warning(f"Failed to publish status of script execution {script_execution.pk}: {e}")
+
+    transaction.on_commit(_publish)
+
+
+def wait_for_status_change(script_execution, status, timeout):
+    """
+    Block until the status of the script execution is no longer `status` or the timeout is reached. The script
+    execution is refreshed from the database.
+    """
+    pubsub = get_redis_connection().pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(get_channel(script_execution.pk))
+
+    try:
+        deadline = time.monotonic() + timeout
+
+        # The status is read after subscribing to not miss a change in between
+        script_execution.refresh_from_db()
+
+        while script_execution.status == status:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            if pubsub.get_message(timeout=remaining):
+                script_execution.refresh_from_db()
+    finally:
+        pubsub.close()
+
+
+def get_execution_url(script_execution):
+    """
+    Returns the absolute URL of a script execution for receivers outside of NetBox. The scheme and host are taken from
+    BASE_URL, or from the request which created the execution if not set.
+    """
+    path = script_execution.get_absolute_url()
+
+    if base_url := plugin_config.get("BASE_URL"):
+        return f"{base_url.rstrip('/')}{path}"
+
+    meta = script_execution.data.get("request", {}).get("META", {})
+    host = meta.get("HTTP_X_FORWARDED_HOST") or meta.get("HTTP_HOST")
+    if not host:
+        return path
+
+    scheme = meta.get("HTTP_X_FORWARDED_PROTO") or ("https" if meta.get("SERVER_PORT") == "443" else "http")
+
+    return f"{scheme}://{host.split(',')[0].strip()}{path}"
+
+
+def validate_callback_url(url):
+    """
+    Raise ValueError if the callback URL may not be notified. With CALLBACK_ALLOWED_HOSTS set, the host must be one of
+    the allowed hosts. Otherwise every address the host resolves to must be public, so callbacks can't be used to
+    reach services on internal addresses.
+    """
+    parsed = urlsplit(url)
+
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise ValueError("The callback URL must be an http or https URL.")
+
+    allowed_hosts = plugin_config.get("CALLBACK_ALLOWED_HOSTS")
+    if allowed_hosts is not None:
+        if not validate_host(parsed.hostname, allowed_hosts):
+            raise ValueError(f"Callbacks to {parsed.hostname} are not allowed.")
+        return
+
+    port = parsed.port or (443 if parsed.scheme == "https" else 80)
+
+    try:
+        addresses = {address[4][0] for address in socket.getaddrinfo(parsed.hostname, port, proto=socket.IPPROTO_TCP)}
+    except (socket.gaierror, UnicodeError) as e:
+        raise ValueError(f"The host {parsed.hostname} could not be resolved: {e}")
+
+    for address in addresses:
+        # IPv6 addresses can carry a scope id
+        ip = ipaddress.ip_address(address.split("%")[0])
+
+        if not ip.is_global or ip.is_multicast:
+            raise ValueError(f"Callbacks to {parsed.hostname} are not allowed, as it resolves to the non-public address {ip}.")
+
+
+def get_callback_payload(script_execution):
+    return {
+        "id": script_execution.pk,
+        "url": get_execution_url(script_execution),
+        "script_instance": script_execution.script_instance_id,
+        "status": script_execution.status,
+        "request_id": str(script_execution.request_id),
+        "started": script_execution.started.isoformat() if script_execution.started else None,
+        "completed": script_execution.completed.isoformat() if script_execution.completed else None,
+    }
+
+
+def enqueue_callback(script_execution):
+    """
+    Enqueue a notification of the callback URL of a completed script execution.
+    """
+    import django_rq
+    from rq import Retry
+
+    payload = get_callback_payload(script_execution)
+    queue = django_rq.get_queue(plugin_config.get("DEFAULT_QUEUE"))
+    retry = Retry(max=len(CALLBACK_RETRY_INTERVALS), interval=CALLBACK_RETRY_INTERVALS)
+
+    transaction.on_commit(lambda: queue.enqueue(send_callback, script_execution.callback_url, payload, retry=retry))
+
+
+def send_callback(url, payload):
+    """
+    POST the payload to the callback URL. Failed notifications are retried by RQ. The URL is validated again, as the
+    host may resolve to another address by now, and redirects are not followed.
+    """
+    import requests
+
+    try:
+        validate_callback_url(url)
+    except ValueError as e:
+        logger.warning(f"Not notifying {url} of script execution {payload['id']}: {e}")
+        return
+
+    response = requests.post(url, json=payload, proxies=settings.HTTP_PROXIES, timeout=CALLBACK_TIMEOUT, allow_redirects=False)
+    response.raise_for_status()
+
+    logger.info(f"Notified {url} of script execution {payload['id']} ({payload['status']})")
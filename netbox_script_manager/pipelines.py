@@ -0,0 +1,77 @@
+from graphlib import CycleError, TopologicalSorter
+
+from django.core.exceptions import ValidationError
+
+STEP_KEYS = ("name", "script", "depends_on", "input", "inputs_from", "task_queue")
+
+
+def validate_steps(steps):
+    """
+    Validate the step definitions of a pipeline. Each step is a dict with the keys:
+
+    * `name`: Unique name of the step.
+    * `script`: ID of the script instance run by the step.
+    * `depends_on`: Names of the steps which must complete before the step is run.
+    * `input`: Input of the script, passed as is like input submitted through the API.
+    * `inputs_from`: Maps variables of the input to the name of a step in `depends_on`, whose output is used as value.
+      Outputs are stored as text, so the value is always a string.
+    * `task_queue`: Queue the step is run in. Defaults to `DEFAULT_QUEUE`.
+
+    Only `name` and `script` are required. Raises ValidationError if the steps are invalid or contain a cycle.
+    """
+    if not isinstance(steps, list) or not steps:
+        raise ValidationError("The steps must be a non-empty list of step definitions.")
+
+    names = set()
+
+    for index, step in enumerate(steps, start=1):
+        if not isinstance(step, dict):
+            raise ValidationError(f"Step {index} must be an object.")
+
+        unknown_keys = set(step) - set(STEP_KEYS)
+        if unknown_keys:
+            raise ValidationError(f"Step {index} has unknown keys: {', '.join(sorted(unknown_keys))}")
+
+        name = step.get("name")
+        if not name or not isinstance(name, str):
+            raise ValidationError(f"Step {index} must have a name.")
+        if name in names:
+            raise ValidationError(f"The step name {name} is used more than once.")
+        names.add(name)
+
+        if not isinstance(step.get("script"), int):
+            raise ValidationError(f"Step {name} must have the ID of a script instance as script.")
+        if not isinstance(step.get("depends_on", []), list):
+            raise ValidationError(f"The depends_on of step {name} must be a list of step names.")
+        if not isinstance(step.get("input", {}), dict):
+            raise ValidationError(f"The input of step {name} must be an object.")
+        if not isinstance(step.get("inputs_from", {}), dict):
+            raise ValidationError(f"The inputs_from of step {name} must be an object.")
+
+    for step in steps:
+        depends_on = step.get("depends_on", [])
+
+        for dependency in depends_on:
+            if dependency not in names:
+                raise ValidationError(f"Step {step['name']} depends on the unknown step {dependency}.")
+
+        for variable, dependency in step.get("inputs_from", {}).items():
+            if dependency not in depends_on:
+                raise ValidationError(
+                    f"The input {variable} of step {step['name']} is taken from {dependency}, which is not in depends_on."
+                )
+
+    get_step_order(steps)
+
+
+def get_step_order(steps):
+    """
+    Returns the steps ordered so every step comes after the steps it depends on.
+    """
+    steps_by_name = {step["name"]: step for step in steps}
+    sorter = TopologicalSorter({step["name"]: step.get("depends_on", []) for step in steps})
+
+    try:
+        return [steps_by_name[name] for name in sorter.static_order()]
+    except CycleError as e:
+        raise ValidationError(f"The steps contain a cycle: {' -> '.join(e.args[1])}")
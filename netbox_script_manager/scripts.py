@@ -1,26 +1,67 @@
 import inspect
 import logging
+import os
+import signal
+import time
 import traceback
 import uuid
+from collections import defaultdict
 from datetime import timedelta
 
 import django_rq
 import rq
+from django import forms
 from django.conf import settings
 from django.db import transaction
+from django.db.models import Exists, OuterRef
 from django.forms.fields import BooleanField
-from django.utils.functional import classproperty
+from django.utils import timezone
+from django.utils.functional import cached_property, classproperty
+from rq.exceptions import NoSuchJobError
+from rq.job import Dependency, Job, JobStatus
+from rq.worker import WorkerStatus
+from netbox.context import events_queue
 from netbox.context_managers import event_tracking
+from extras.events import flush_events
 from extras.scripts import ScriptVariable
 from core.signals import clear_events
 from utilities.exceptions import AbortScript, AbortTransaction
-
-from .choices import LogLevelChoices, ScriptExecutionStatusChoices
+from utilities.request import NetBoxFakeRequest
+
+from . import bundles, heartbeat, logbuffer
+from .choices import ConcurrencyPolicyChoices, LogLevelChoices, ScriptExecutionStatusChoices, TransactionModeChoices
+from .concurrency import (
+    acquire_semaphores,
+    fair_share_enqueue,
+    fair_share_release,
+    get_execution_semaphores,
+    get_fair_share_owner,
+    get_fair_share_slots,
+    get_lease_timeout,
+    release_semaphores,
+)
 from .forms import ScriptForm
-from .models import ScriptArtifact, ScriptExecution, ScriptLogLine
+from .limits import LIMIT_SIGNALS, get_resource_limits, get_resource_usage, is_resource_limit_error, run_with_resource_limits
+from .loglimits import LogLimiter
+from .models import ScriptArtifact, ScriptExecution, ScriptInstance, ScriptLogLine, ScriptPipelineRun, ScriptSource
+from .notifications import publish_status
+from .spool import open_spooled_files
+from .util import INPUT_TYPE_API, get_active_script_root, get_request_context
 
 plugin_config = settings.PLUGINS_CONFIG.get("netbox_script_manager")
 
+# Task queue picking the allowed task queue with the lowest expected wait, see TaskQueueSelector
+AUTO_TASK_QUEUE = "auto"
+
+# Number of recent executions used to estimate the job duration of a task queue
+QUEUE_DURATION_SAMPLE = 50
+
+# Job duration assumed for task queues without completed executions, in seconds
+DEFAULT_JOB_DURATION = 10
+
+# Source snapshot ids keyed by the file name, modification time and size of script modules
+source_snapshot_cache = {}
+
 
 class CustomScript:
     """
@@ -37,12 +78,31 @@ class CustomScript:
         self.logger = logging.getLogger(f"netbox.scripts.{self.__module__}.{self.__class__.__name__}")
         self.script_execution = None
         self.request = None
-        self.filename = inspect.getfile(self.__class__)
-        self.source = inspect.getsource(self.__class__)
+        self.shard = None
+        self._chunked = False
+        self._checkpoints = 0
+        self._committed_batches = 0
+        self._truncated_messages = 0
+        self._log_limiter = LogLimiter(
+            deduplicate=self._get_log_setting("LOG_DEDUPLICATE"),
+            rate_limit=self._get_log_setting("LOG_RATE_LIMIT"),
+            rate_burst=self._get_log_setting("LOG_RATE_BURST"),
+            max_lines=self._get_log_setting("LOG_MAX_LINES"),
+            max_bytes=self._get_log_setting("LOG_MAX_BYTES"),
+            max_message_length=self._get_log_setting("LOG_MAX_MESSAGE_LENGTH"),
+        )
 
     def __str__(self):
         return self.name
 
+    @cached_property
+    def filename(self):
+        return inspect.getfile(self.__class__)
+
+    @cached_property
+    def source(self):
+        return inspect.getsource(self.__class__)
+
     @classproperty
     def module(self):
         return self.__module__
@@ -101,6 +161,36 @@ class CustomScript:
     def task_queues(self):
         return getattr(self.Meta, "task_queues", [])
 
+    @classproperty
+    def max_concurrency(self):
+        if getattr(self.Meta, "singleton", False):
+            return 1
+        return getattr(self.Meta, "max_concurrency", None)
+
+    @classproperty
+    def concurrency_policy(self):
+        return getattr(self.Meta, "concurrency_policy", ConcurrencyPolicyChoices.POLICY_QUEUE)
+
+    @classproperty
+    def transaction_mode(self):
+        return getattr(self.Meta, "transaction_mode", TransactionModeChoices.MODE_ATOMIC)
+
+    @classproperty
+    def checkpoint_size(self):
+        return getattr(self.Meta, "checkpoint_size", None)
+
+    @classproperty
+    def memory_limit(self):
+        return getattr(self.Meta, "memory_limit", None)
+
+    @classproperty
+    def cpu_time_limit(self):
+        return getattr(self.Meta, "cpu_time_limit", None)
+
+    @classproperty
+    def open_files_limit(self):
+        return getattr(self.Meta, "open_files_limit", None)
+
     @classmethod
     def _get_vars(cls):
         vars = {}
@@ -126,6 +216,51 @@ class CustomScript:
     def run(self, data, commit):
         raise NotImplementedError("The script must define a run() method.")
 
+    def get_shards(self, data, commit):
+        """
+        Override to split the execution into shards which are run in parallel as child executions. Return an iterable
+        of JSON serializable shard definitions or None to run the script as a single execution. The shard of a child
+        execution is available as `self.shard` when `run()` is called.
+        """
+        return None
+
+    def merge_outputs(self, outputs):
+        """
+        Combine the outputs of the child executions into the output of the parent execution.
+        """
+        return "\n".join(output for output in outputs if output)
+
+    def checkpoint(self, force=False):
+        """
+        Mark a point where the changes made so far can be committed. In the chunked transaction mode the changes are
+        committed every `checkpoint_size` checkpoints, or at every checkpoint if no size is set. Does nothing in the
+        atomic transaction mode and when the script is run without committing.
+        """
+        if not self._chunked:
+            return
+
+        self._checkpoints += 1
+
+        if force or self._checkpoints >= (self.checkpoint_size or 1):
+            self._commit_batch()
+
+    def _commit_batch(self):
+        self._committed_batches += 1
+        self._checkpoints = 0
+
+        # The progress is saved in the same transaction as the batch
+        self.script_execution.data["committed_batches"] = self._committed_batches
+        self.script_execution.save()
+
+        transaction.commit()
+
+        # Send the events of the committed changes right away instead of when the script completes
+        if events := list(events_queue.get().values()):
+            flush_events(events)
+        events_queue.set({})
+
+        self.log_success(f"Committed batch {self._committed_batches}.")
+
     # Form rendering
 
     def get_fieldsets(self, instance=None):
@@ -179,6 +314,23 @@ class CustomScript:
 
         return form
 
+    def as_input_form(self, data=None, files=None):
+        """
+        Return a form containing only the ScriptVars of the script. Used to validate script input outside of the
+        regular script form.
+        """
+        fields = {name: var.as_field() for name, var in self._get_vars().items()}
+        FormClass = type("ScriptInputForm", (forms.Form,), fields)
+
+        return FormClass(data, files)
+
+    @classmethod
+    def _get_log_setting(cls, name):
+        """
+        Log limits can be overridden per script by setting the lowercase name of the setting in the Meta class.
+        """
+        return getattr(cls.Meta, name.lower(), plugin_config.get(name))
+
     def _log_message(self, level, message):
         if not self.script_execution:
             raise RuntimeError("Script execution not set.")
@@ -187,7 +339,56 @@ class CustomScript:
         if not message:
             return
 
-        script_log_line = ScriptLogLine(script_execution=self.script_execution, level=level, message=str(message))
+        for level, message, full_message in self._log_limiter.process(level, str(message)):
+            if full_message is not None:
+                message = self._save_truncated_message(message, full_message)
+
+            self._write_log_line(level, message)
+
+    def _flush_log_limiter(self):
+        """
+        Write the pending summaries of repeated and rate limited messages.
+        """
+        for level, message, _ in self._log_limiter.finish():
+            self._write_log_line(level, message)
+
+    def _log_plugin_message(self, level, message):
+        """
+        Write a message of the plugin itself, like the reason the execution failed. These messages bypass the log
+        limits, so the log of a failed execution always says why it failed.
+        """
+        self.logger.log(logging.ERROR if level == LogLevelChoices.LOG_FAILURE else logging.INFO, message)
+
+        # Write the pending summaries first to keep the log in order
+        self._flush_log_limiter()
+        self._write_log_line(level, message)
+
+    def _log_plugin_failure(self, message):
+        self._log_plugin_message(LogLevelChoices.LOG_FAILURE, message)
+
+    def _log_plugin_info(self, message):
+        self._log_plugin_message(LogLevelChoices.LOG_INFO, message)
+
+    def _save_truncated_message(self, message, full_message):
+        self._truncated_messages += 1
+        name = f"log-message-{self._truncated_messages}.txt"
+
+        # Saved like the log lines, so the artifact isn't rolled back with the changes of the script
+        artifact = ScriptArtifact(script_execution=self.script_execution, data=full_message.encode(), name=name, content_type="text/plain")
+        artifact.full_clean()
+        artifact.save(using="script_log")
+
+        return f"{message}\n\n*Message truncated, the full message is saved as the artifact {name}.*"
+
+    def _write_log_line(self, level, message):
+        if logbuffer.is_enabled():
+            if level not in LogLevelChoices.values():
+                raise ValueError(f"Invalid log level {level}")
+
+            logbuffer.append_log_line(self.script_execution.pk, level, message)
+            return
+
+        script_log_line = ScriptLogLine(script_execution=self.script_execution, level=level, message=message)
         script_log_line.full_clean()
         script_log_line.save(using="script_log")
 
@@ -226,20 +427,199 @@ class CustomScript:
         self._log_message(LogLevelChoices.LOG_FAILURE, message)
 
 
-def run_script(data, request, script_execution, commit=True, **kwargs):
+def get_source_snapshot_id(script_class):
+    """
+    Returns the id of the snapshot of the module source of a script class. The source is only read and stored once
+    per version of the module file, later calls only stat the file.
+    """
+    filename = inspect.getfile(script_class)
+    stat = os.stat(filename)
+    key = (filename, stat.st_mtime_ns, stat.st_size)
+
+    if key not in source_snapshot_cache:
+        with open(filename, encoding="utf-8", errors="replace") as f:
+            source = f.read()
+
+        relative_filename = os.path.relpath(filename, get_active_script_root())
+        source_snapshot_cache[key] = ScriptSource.snapshot(source, filename=relative_filename).pk
+
+    return source_snapshot_cache[key]
+
+
+def run_script(script_execution_id=None, data=None, request=None, script_execution=None, commit=True, **kwargs):
     """
     A wrapper for calling Script.run(). This performs error handling and provides a hook for committing changes. It
     exists outside the Script class to ensure it cannot be overridden by a script author.
+
+    Jobs only carry the id of the script execution. The input, user and request are loaded from the database when the
+    job is run. The data, request and script_execution arguments are accepted for jobs enqueued by earlier versions.
     """
+    # Let the next job of the same owner into the queue, behind the jobs of the other owners
+    fair_share_release(rq.get_current_job())
+
+    if script_execution is None:
+        script_execution = ScriptExecution.objects.select_related("script_instance", "user").filter(pk=script_execution_id).first()
 
-    script_execution.start()
+        if script_execution is None:
+            logging.getLogger("netbox.scripts").warning(f"Script execution {script_execution_id} no longer exists, skipping job")
+            return
+    else:
+        # Store the commit flag of legacy jobs on the execution, as it's used when re-enqueuing the execution
+        script_execution.commit = commit
+
+    if bundles.is_enabled():
+        try:
+            bundles.activate_bundle(script_execution.bundle_id)
+        except Exception as e:
+            script = CustomScript()
+            script.script_execution = script_execution
+            script._log_plugin_failure(f"Failed to fetch the script bundle of the execution: {e}")
+            script_execution.terminate(status=ScriptExecutionStatusChoices.STATUS_ERRORED)
+            return
 
     script = script_execution.script_instance.script
     script.script_execution = script_execution
 
     logger = logging.getLogger(f"netbox.scripts.{script.full_name}")
-    logger.info(f"Running script (commit={commit})")
 
+    if script_execution.pipeline_run_id and not _check_pipeline_upstream(script, script_execution, logger):
+        return
+
+    semaphores = get_execution_semaphores(script_execution)
+    exceeded_scope = acquire_semaphores(semaphores, str(script_execution.pk), lease=get_lease_timeout(rq.get_current_job()))
+
+    if exceeded_scope:
+        deferred = _handle_concurrency_limit(script, script_execution, exceeded_scope, logger)
+
+        # A deferred execution keeps the interval chain going when it's eventually run
+        if not deferred:
+            _schedule_next_execution(script, script_execution, logger)
+            script_execution.release_spooled_files()
+        return
+
+    try:
+        script_execution.source_id = get_source_snapshot_id(script.__class__)
+    except Exception as e:
+        logger.warning(f"Failed to snapshot the script source: {e}")
+
+    files = {}
+
+    try:
+        script_execution.start()
+        heartbeat.get_heartbeat().add(script_execution.pk)
+        commit = script_execution.commit
+        logger.info(f"Running script (commit={commit})")
+
+        if request is None:
+            request = get_execution_request(script_execution)
+
+        if data is None:
+            data = _load_script_input(script, script_execution, files, logger)
+
+        # The input is None if it could not be loaded, in which case the execution has already been terminated
+        if data is not None:
+            if script_execution.parent_id:
+                script.shard = script_execution.data.get("shard")
+                _run_with_resource_limits(script, script_execution, data, request, commit, logger)
+            elif not _fan_out(script, script_execution, data, request, commit, logger):
+                _run_with_resource_limits(script, script_execution, data, request, commit, logger)
+    finally:
+        heartbeat.get_heartbeat().remove(script_execution.pk)
+        release_semaphores(semaphores, str(script_execution.pk))
+
+        for uploaded_file in files.values():
+            uploaded_file.close()
+
+    if script_execution.parent_id:
+        _fan_in(script, script_execution.parent_id, logger)
+
+    _schedule_next_execution(script, script_execution, logger)
+    script_execution.release_spooled_files()
+
+
+def _get_inherited_data(script_execution):
+    """
+    Returns the data of the script execution needed by executions derived from it, like the next execution of an
+    interval or the child executions of a fanned out execution.
+    """
+    keys = ("input", "input_type", "request", "spool_id", "files")
+    return {key: script_execution.data[key] for key in keys if key in script_execution.data}
+
+
+def _load_script_input(script, script_execution, files, logger):
+    """
+    Load the input of the script execution. Input submitted through a form is cleaned with the script variables again,
+    while API input is passed to the script as is. Spooled files are opened and added to `files`, which the caller is
+    responsible for closing. If the input can't be loaded, the execution is terminated and None is returned.
+    """
+    script_input = dict(script_execution.data.get("input") or {})
+
+    if script_execution.data.get("input_type") == INPUT_TYPE_API:
+        return script_input
+
+    if script_execution.data.get("files"):
+        try:
+            files.update(open_spooled_files(script_execution.data["spool_id"], script_execution.data["files"]))
+        except OSError as e:
+            script._log_plugin_failure(f"Failed to open uploaded files: {e}")
+            logger.error(f"Failed to open spooled files: {e}")
+            script_execution.terminate(status=ScriptExecutionStatusChoices.STATUS_ERRORED)
+            return None
+
+    form = script.as_input_form(data=script_input, files=files)
+
+    if not form.is_valid():
+        errors = "\n".join(f"* {field_name}: {' '.join(field_errors)}" for field_name, field_errors in form.errors.items())
+        script._log_plugin_failure(f"The script input is not valid:\n{errors}")
+        logger.error(f"Invalid script input: {form.errors.as_json()}")
+        script_execution.terminate(status=ScriptExecutionStatusChoices.STATUS_ERRORED)
+        return None
+
+    return form.cleaned_data
+
+
+def _run_with_resource_limits(script, script_execution, data, request, commit, logger):
+    """
+    Run the script in a child process with rlimits applied if resource limits are set on the script instance, so a
+    runaway script can't degrade other executions on the same worker. The peak resource usage of the child is recorded
+    on the script execution.
+    """
+    limits = get_resource_limits(script_execution.script_instance)
+
+    if not limits:
+        _run_script_execution(script, script_execution, data, request, commit, logger)
+        return
+
+    logger.info(f"Running script with resource limits {limits}")
+
+    exit_code, rusage = run_with_resource_limits(
+        lambda: _run_script_execution(script, script_execution, data, request, commit, logger),
+        limits,
+    )
+
+    # The result has been saved by the child process
+    script_execution.refresh_from_db()
+    script_execution.data["resource_usage"] = get_resource_usage(rusage)
+
+    if script_execution.status in ScriptExecutionStatusChoices.TERMINAL_STATE_CHOICES:
+        script_execution.save()
+        return
+
+    # The child process was killed before it could save the result
+    if -exit_code in LIMIT_SIGNALS:
+        script._log_plugin_failure(f"The script was killed by {signal.Signals(-exit_code).name} after exceeding a resource limit.")
+        logger.error(f"Script process killed by signal {-exit_code}")
+        script_execution.terminate(status=ScriptExecutionStatusChoices.STATUS_LIMIT_EXCEEDED)
+    else:
+        script._log_plugin_failure(f"The script process exited unexpectedly with exit code {exit_code}.")
+        logger.error(f"Script process exited with exit code {exit_code}")
+        script_execution.terminate(status=ScriptExecutionStatusChoices.STATUS_ERRORED)
+
+
+def _run_script_execution(script, script_execution, data, request, commit, logger):
+    """
+    Run the script and record the result on the script execution.
+    """
     # Add files to form data
     files = request.FILES
     for field_name, fileobj in files.items():
@@ -257,29 +637,43 @@ def run_script(data, request, script_execution, commit=True, **kwargs):
 
         try:
             try:
-                with transaction.atomic():
-                    output = script.run(data=data, commit=commit)
-                    if not commit:
-                        raise AbortTransaction()
+                if commit and script.transaction_mode == TransactionModeChoices.MODE_CHUNKED:
+                    output = _run_chunked(script, data, commit)
+                else:
+                    with transaction.atomic():
+                        output = script.run(data=data, commit=commit)
+                        if not commit:
+                            raise AbortTransaction()
             except AbortTransaction:
-                script.log_info("Database changes have been reverted automatically.")
+                script._log_plugin_info("Database changes have been reverted automatically.")
                 clear_events.send(request)
 
+            script._flush_log_limiter()
             script_execution.data["output"] = str(output)
             script_execution.terminate()
         except Exception as e:
+            status = ScriptExecutionStatusChoices.STATUS_ERRORED
+
             if type(e) is AbortScript:
-                script.log_failure(f"Script aborted with error: {e}")
+                script._log_plugin_failure(f"Script aborted with error: {e}")
                 logger.error(f"Script aborted with error: {e}")
+            elif is_resource_limit_error(e) and get_resource_limits(script_execution.script_instance):
+                status = ScriptExecutionStatusChoices.STATUS_LIMIT_EXCEEDED
+                script._log_plugin_failure(f"The script exceeded a resource limit: `{type(e).__name__}: {e}`")
+                logger.error(f"Script exceeded a resource limit: {e}")
             else:
                 stacktrace = traceback.format_exc()
-                script.log_failure(f"An exception occurred: `{type(e).__name__}: {e}`\n```\n{stacktrace}\n```")
+                script._log_plugin_failure(f"An exception occurred: `{type(e).__name__}: {e}`\n```\n{stacktrace}\n```")
                 logger.error(f"Exception raised during script execution: {e}")
-            script.log_info("Database changes have been reverted due to error.")
+            if script._committed_batches:
+                script._log_plugin_info(f"Database changes since batch {script._committed_batches} have been reverted due to error.")
+            else:
+                script._log_plugin_info("Database changes have been reverted due to error.")
 
+            script._flush_log_limiter()
             script_execution.data["output"] = str(output)
 
-            script_execution.terminate(status=ScriptExecutionStatusChoices.STATUS_ERRORED)
+            script_execution.terminate(status=status)
             clear_events.send(request)
 
         logger.info(f"Script completed in {script_execution.duration}")
@@ -292,18 +686,179 @@ def run_script(data, request, script_execution, commit=True, **kwargs):
     else:
         _run_script()
 
-    # Schedule the next job if an interval has been set
+
+def _run_chunked(script, data, commit):
+    """
+    Run the script in the chunked transaction mode. Instead of a single transaction, the changes are committed in
+    batches at the checkpoints of the script and when the script completes. If the script fails, only the changes
+    made since the last committed batch are reverted.
+    """
+    transaction.set_autocommit(False)
+    script._chunked = True
+
+    try:
+        output = script.run(data=data, commit=commit)
+        script._commit_batch()
+        return output
+    except Exception:
+        transaction.rollback()
+        raise
+    finally:
+        script._chunked = False
+        transaction.set_autocommit(True)
+
+
+def _fan_out(script, script_execution, data, request, commit, logger):
+    """
+    Split the execution into child executions if the script defines shards. Each shard is enqueued as a child
+    execution, and the parent execution is completed by the last child to finish. Returns True if the execution was
+    handled here.
+    """
+    script.request = request
+
+    try:
+        shards = list(script.get_shards(data=data, commit=commit) or [])
+    except Exception as e:
+        stacktrace = traceback.format_exc()
+        script._log_plugin_failure(f"An exception occurred while splitting into shards: `{type(e).__name__}: {e}`\n```\n{stacktrace}\n```")
+        logger.error(f"Exception raised while splitting script execution into shards: {e}")
+        script_execution.terminate(status=ScriptExecutionStatusChoices.STATUS_ERRORED)
+        return True
+
+    if not shards:
+        return False
+
+    logger.info(f"Splitting execution into {len(shards)} shards")
+
+    # The number of shards is saved once all children exist, so fan-in can tell deleted children from children
+    # not created yet
+    script_execution.data["shard_count"] = None
+    script_execution.save()
+
+    for shard in shards:
+        # Changes made by the child are logged with the request id of the child
+        child_execution = ScriptExecution(
+            script_instance=script_execution.script_instance,
+            parent=script_execution,
+            bundle_id=script_execution.bundle_id,
+            task_id=uuid.uuid4(),
+            request_id=uuid.uuid4(),
+            user=script_execution.user,
+            status=ScriptExecutionStatusChoices.STATUS_PENDING,
+            task_queue=script_execution.task_queue,
+            commit=script_execution.commit,
+            data={
+                **_get_inherited_data(script_execution),
+                "shard": shard,
+            },
+        )
+        child_execution.full_clean()
+        child_execution.save()
+
+        enqueue_script_execution(child_execution, job_timeout=script.job_timeout)
+
+    script.log_info(f"Execution split into {len(shards)} shards.")
+
+    script_execution.data["shard_count"] = len(shards)
+    script_execution.save()
+
+    # Children finishing before the number of shards was saved left the parent running
+    _fan_in(script, script_execution.pk, logger)
+
+    return True
+
+
+def _fan_in(script, parent_id, logger):
+    """
+    Complete the parent execution if all of its children have finished. The logs and artifacts of the children are
+    moved to the parent and the outputs are combined with `merge_outputs()`. Children deleted before they finished
+    are counted as failed.
+    """
+    terminal_statuses = ScriptExecutionStatusChoices.TERMINAL_STATE_CHOICES
+
+    with transaction.atomic():
+        # Lock the parent so only the last child to finish completes it
+        parent_execution = ScriptExecution.objects.select_for_update().filter(pk=parent_id).first()
+        if parent_execution is None:
+            return
+
+        children = list(parent_execution.children.order_by("pk"))
+
+        # The shard count is None while the children are being created, and not set for executions fanned out by
+        # earlier versions
+        shard_count = parent_execution.data.get("shard_count", len(children))
+
+        if parent_execution.completed or shard_count is None or any(child.status not in terminal_statuses for child in children):
+            return
+
+        logger.info(f"All shards finished, completing parent execution {parent_id}")
+
+        ScriptLogLine.objects.filter(script_execution__parent=parent_execution).update(script_execution=parent_execution)
+        ScriptArtifact.objects.filter(script_execution__parent=parent_execution).update(script_execution=parent_execution)
+
+        parent_script = type(script)()
+        parent_script.script_execution = parent_execution
+
+        status = ScriptExecutionStatusChoices.STATUS_COMPLETED
+        outputs = []
+
+        for child in children:
+            outputs.append(child.data.get("output"))
+
+            if child.status != ScriptExecutionStatusChoices.STATUS_COMPLETED:
+                status = ScriptExecutionStatusChoices.STATUS_ERRORED
+                parent_script._log_plugin_failure(f"Shard `{child.data.get('shard')}` (execution {child.pk}) finished as {child.status}.")
+
+        try:
+            parent_execution.data["output"] = str(parent_script.merge_outputs(outputs))
+        except Exception as e:
+            stacktrace = traceback.format_exc()
+            parent_script._log_plugin_failure(
+                f"An exception occurred while merging outputs: `{type(e).__name__}: {e}`\n```\n{stacktrace}\n```"
+            )
+            status = ScriptExecutionStatusChoices.STATUS_ERRORED
+
+        missing = shard_count - len(children)
+        if missing > 0:
+            status = ScriptExecutionStatusChoices.STATUS_ERRORED
+            parent_script._log_plugin_failure(f"{missing} shard(s) were deleted before they finished.")
+
+        parent_script.log_info(f"All {len(outputs)} shards finished.")
+        parent_execution.terminate(status=status)
+
+
+def complete_fanned_out_execution(parent_id):
+    """
+    Complete a fanned out execution if none of its children are left to finish it, e.g. after they were deleted.
+    """
+    parent_execution = ScriptExecution.objects.select_related("script_instance").filter(pk=parent_id).first()
+    if parent_execution is None:
+        return
+
+    try:
+        script = parent_execution.script_instance.script
+    except Exception:
+        script = CustomScript()
+
+    _fan_in(script, parent_id, logging.getLogger(f"netbox.scripts.{script.full_name}"))
+
+
+def _schedule_next_execution(script, script_execution, logger):
+    """
+    Schedule the next execution if an interval has been set.
+    """
     if script_execution.interval:
         new_scheduled_time = script_execution.scheduled + timedelta(minutes=script_execution.interval)
         logger.info(f"Scheduling next job for {new_scheduled_time}")
 
         # Generate a new request id
         new_request_id = uuid.uuid4()
+        request = get_execution_request(script_execution)
         request.id = new_request_id
 
         # Maintain the input but clear the output
         new_data = {
-            "input": script_execution.data.get("input"),
+            **_get_inherited_data(script_execution),
             "output": None,
         }
 
@@ -312,29 +867,576 @@ def run_script(data, request, script_execution, commit=True, **kwargs):
                 script_instance=script_execution.script_instance,
                 task_id=uuid.uuid4(),
                 request_id=new_request_id,
-                user=request.user,
+                user=script_execution.user,
                 status=ScriptExecutionStatusChoices.STATUS_SCHEDULED,
                 scheduled=new_scheduled_time,
                 interval=script_execution.interval,
-                task_queue=script_execution.task_queue,
+                # Pick the task queue again if it was picked automatically
+                task_queue=AUTO_TASK_QUEUE if "queue_selection" in script_execution.data else script_execution.task_queue,
+                commit=script_execution.commit,
+                callback_url=script_execution.callback_url,
                 data=new_data,
             )
+            resolve_task_queue(next_execution)
             next_execution.full_clean()
             next_execution.save()
 
-        queue = django_rq.get_queue(next_execution.task_queue)
-
-        queue.enqueue_at(
-            next_execution.scheduled,
-            run_script,
-            job_id=str(next_execution.task_id),
-            data=data,
-            request=request,
-            commit=commit,
-            script_execution=next_execution,
-            interval=next_execution.interval,
+        enqueue_script_execution(next_execution, job_timeout=script.job_timeout)
+
+
+def _handle_concurrency_limit(script, script_execution, scope, logger):
+    """
+    Handle an execution exceeding a concurrency limit. The concurrency policy of the script instance applies to the
+    limit of the script itself, while executions exceeding the user or tenant quotas are always deferred. Deferred
+    executions are enqueued at the back of the queue, letting executions of other users and tenants run in between.
+    Child executions of a fanned out execution are always deferred, as dropping them would lose their shard.
+    Returns True if the execution was deferred to be run later.
+    """
+    script_instance = script_execution.script_instance
+    limit = script_instance.max_concurrency
+    policy = ConcurrencyPolicyChoices.POLICY_QUEUE
+
+    if scope == "script" and not script_execution.parent_id:
+        policy = script_instance.concurrency_policy
+
+    if policy == ConcurrencyPolicyChoices.POLICY_REJECT:
+        logger.info("Concurrency limit reached, rejecting execution")
+        script._log_plugin_failure(f"Execution rejected as the script is limited to {limit} concurrent execution(s).")
+        script_execution.terminate(status=ScriptExecutionStatusChoices.STATUS_REJECTED)
+        return False
+
+    if policy == ConcurrencyPolicyChoices.POLICY_COALESCE:
+        waiting = ScriptExecution.objects.filter(
+            script_instance=script_instance,
+            status=ScriptExecutionStatusChoices.STATUS_WAITING,
+        ).exclude(pk=script_execution.pk)
+
+        if waiting.exists():
+            logger.info("Concurrency limit reached, coalescing execution into a waiting execution")
+            script.log_info(f"Execution coalesced into waiting execution {waiting.first().pk}.")
+            script_execution.terminate(status=ScriptExecutionStatusChoices.STATUS_COALESCED)
+            return False
+
+    retry_delay = plugin_config.get("CONCURRENCY_RETRY_DELAY")
+    logger.info(f"Concurrency limit of {scope} reached, retrying in {retry_delay} seconds")
+
+    # The job of the current attempt is finished when we return, so the retry is enqueued as a new job
+    script_execution.status = ScriptExecutionStatusChoices.STATUS_WAITING
+    script_execution.task_id = uuid.uuid4()
+    script_execution.save()
+    publish_status(script_execution)
+
+    enqueue_script_execution(
+        script_execution,
+        job_timeout=script.job_timeout,
+        enqueue_at=timezone.now() + timedelta(seconds=retry_delay),
+    )
+
+    return True
+
+
+def get_execution_request(script_execution):
+    """
+    Build a request for the script execution from the request context saved when the execution was created.
+    """
+    context = script_execution.data.get("request") or {}
+
+    return NetBoxFakeRequest(
+        {
+            "META": context.get("META", {}),
+            "COOKIES": {},
+            "POST": {},
+            "GET": {},
+            "FILES": {},
+            "user": script_execution.user,
+            "method": context.get("method"),
+            "path": context.get("path", ""),
+            "id": script_execution.request_id,
+        }
+    )
+
+
+def enqueue_script_execution(script_execution, job_timeout=None, enqueue_at=None, pipeline=None, depends_on=None):
+    """
+    Enqueue the job of a script execution on its task queue. Scheduled executions are enqueued for their scheduled
+    time unless `enqueue_at` is given. The job only carries the id of the execution. If `depends_on` is given, the job
+    is only enqueued by RQ once the jobs with the given ids have finished. Other jobs are enqueued with fair share if
+    FAIR_SHARE_QUEUED_JOBS is set.
+    """
+    queue = django_rq.get_queue(script_execution.task_queue)
+    enqueue_at = enqueue_at or script_execution.scheduled
+
+    job_kwargs = {
+        "job_id": str(script_execution.task_id),
+        "job_timeout": job_timeout,
+        "pipeline": pipeline,
+        "script_execution_id": script_execution.pk,
+    }
+
+    if depends_on:
+        job_kwargs["depends_on"] = depends_on
+
+    if enqueue_at:
+        return queue.enqueue_at(enqueue_at, run_script, **job_kwargs)
+
+    if get_fair_share_slots() and not depends_on and pipeline is None:
+        job = _create_fair_share_job(queue, script_execution, job_timeout)
+        fair_share_enqueue(queue, get_fair_share_owner(script_execution), [job])
+        return job
+
+    return queue.enqueue(run_script, **job_kwargs)
+
+
+def _create_fair_share_job(queue, script_execution, job_timeout):
+    """
+    Create the job of a script execution without enqueuing it, to be enqueued by fair share once it's the turn of the
+    owner of the execution.
+    """
+    return queue.create_job(
+        run_script,
+        kwargs={"script_execution_id": script_execution.pk},
+        timeout=job_timeout,
+        job_id=str(script_execution.task_id),
+        status=JobStatus.DEFERRED,
+    )
+
+
+def enqueue_script_executions(script_instance, request, inputs, job_timeout=None):
+    """
+    Create and enqueue an execution of the script instance for each of the given inputs. Each input is a dict with the
+    keys input, input_type, commit, schedule_at, interval and task_queue, and optionally callback_url. The executions
+    are created with a single query and the jobs are enqueued through one redis pipeline per task queue. Executions on
+    the auto task queue are spread over the allowed task queues by a shared selector. Returns the created executions.
+    """
+    request_context = get_request_context(request)
+    script_executions = []
+    selector = None
+
+    # bulk_create doesn't call save, so the executions are pinned to the current bundle here
+    bundle_id = bundles.get_current_bundle_id() if bundles.is_enabled() else None
+
+    for script_input in inputs:
+        status = ScriptExecutionStatusChoices.STATUS_PENDING
+        if script_input["schedule_at"]:
+            status = ScriptExecutionStatusChoices.STATUS_SCHEDULED
+
+        # Every execution gets its own request id to keep the changelogs apart
+        script_execution = ScriptExecution(
+            script_instance=script_instance,
+            task_id=uuid.uuid4(),
+            request_id=uuid.uuid4(),
+            user=request.user,
+            status=status,
+            scheduled=script_input["schedule_at"],
+            interval=script_input["interval"],
+            task_queue=script_input["task_queue"],
+            commit=script_input["commit"],
+            callback_url=script_input.get("callback_url") or "",
+            bundle_id=bundle_id,
+            data={
+                "input": script_input["input"],
+                "input_type": script_input["input_type"],
+                "request": request_context,
+            },
+        )
+
+        if script_execution.task_queue == AUTO_TASK_QUEUE:
+            selector = selector or TaskQueueSelector(script_instance)
+            resolve_task_queue(script_execution, selector)
+
+        script_execution.full_clean()
+        script_executions.append(script_execution)
+
+    ScriptExecution.objects.bulk_create(script_executions)
+
+    executions_by_queue = defaultdict(list)
+    for script_execution in script_executions:
+        executions_by_queue[script_execution.task_queue].append(script_execution)
+
+    for queue_name, queue_executions in executions_by_queue.items():
+        queue = django_rq.get_queue(queue_name)
+        fair_share_jobs = []
+
+        with queue.connection.pipeline() as pipeline:
+            for script_execution in queue_executions:
+                if get_fair_share_slots() and not script_execution.scheduled:
+                    fair_share_jobs.append(_create_fair_share_job(queue, script_execution, job_timeout))
+                else:
+                    enqueue_script_execution(script_execution, job_timeout=job_timeout, pipeline=pipeline)
+
+            pipeline.execute()
+
+        # The executions are created by the same user, so their jobs share the backlog of one owner
+        fair_share_enqueue(queue, get_fair_share_owner(queue_executions[0]), fair_share_jobs)
+
+    return script_executions
+
+
+def _is_job_running(script_execution, connection):
+    """
+    Returns True if the RQ job of the script execution is started on a live worker. Workers are removed from redis
+    when their own heartbeat expires, so a job claimed by a dead worker is not considered running.
+    """
+    try:
+        job = Job.fetch(str(script_execution.task_id), connection=connection)
+    except NoSuchJobError:
+        return False
+
+    if job.get_status() != JobStatus.STARTED or not job.worker_name:
+        return False
+
+    worker = rq.Worker.find_by_key(f"{rq.Worker.redis_worker_namespace_prefix}{job.worker_name}", connection=connection)
+    return worker is not None
+
+
+def get_stale_executions():
+    """
+    Returns the running script executions without a recent heartbeat whose job is not running on a live worker.
+    Executions started before heartbeats were recorded are judged by their start time. Fanned out parent executions
+    are excluded, as they stay running without a job until their last shard finishes, unless their worker died while
+    creating the shards.
+    """
+    timeout = plugin_config.get("HEARTBEAT_TIMEOUT")
+    cutoff = time.time() - timeout
+    beats = heartbeat.get_heartbeats()
+
+    running = (
+        ScriptExecution.objects.select_related("script_instance", "user")
+        .filter(
+            status=ScriptExecutionStatusChoices.STATUS_RUNNING,
+            started__lt=timezone.now() - timedelta(seconds=timeout),
+        )
+        .annotate(has_children=Exists(ScriptExecution.objects.filter(parent=OuterRef("pk"))))
+    )
+    stale = [
+        script_execution
+        for script_execution in running
+        if beats.get(script_execution.pk, 0) < cutoff and not _is_fanned_out(script_execution)
+    ]
+
+    return [
+        script_execution
+        for script_execution in stale
+        if not _is_job_running(script_execution, django_rq.get_connection(script_execution.task_queue))
+    ]
+
+
+def _is_fanned_out(script_execution):
+    """
+    Returns True if all children of the execution have been created. The shard count is not set for executions fanned
+    out by earlier versions.
+    """
+    if "shard_count" in script_execution.data:
+        return script_execution.data["shard_count"] is not None
+
+    return script_execution.has_children
+
+
+def get_orphaned_parents():
+    """
+    Returns the running fanned out executions without unfinished children, which are left running when their last
+    children were deleted or terminated without completing the parent.
+    """
+    unfinished_children = ScriptExecution.objects.filter(parent=OuterRef("pk")).exclude(
+        status__in=ScriptExecutionStatusChoices.TERMINAL_STATE_CHOICES
+    )
+    parents = ScriptExecution.objects.filter(status=ScriptExecutionStatusChoices.STATUS_RUNNING, data__has_key="shard_count").exclude(
+        Exists(unfinished_children)
+    )
+
+    return [parent for parent in parents if parent.data["shard_count"] is not None]
+
+
+def reap_stale_executions(requeue=None):
+    """
+    Terminate the running script executions whose worker died, e.g. after being OOM-killed, as errored. The
+    concurrency slots of the executions are released, interval executions are scheduled again and the parent of a
+    shard is completed if it was the last one running. If `requeue` is True, or REAPER_REQUEUE if not given, a new
+    execution with the same input is enqueued for every reaped top-level execution. Fanned out executions left running
+    without unfinished children are completed as well. Returns the reaped executions.
+    """
+    if requeue is None:
+        requeue = plugin_config.get("REAPER_REQUEUE")
+
+    reaped = []
+
+    for script_execution in get_stale_executions():
+        with transaction.atomic():
+            # Skip executions terminated since they were found
+            locked = ScriptExecution.objects.select_for_update().filter(
+                pk=script_execution.pk,
+                status=ScriptExecutionStatusChoices.STATUS_RUNNING,
+            )
+            if not locked.exists():
+                continue
+
+            try:
+                script = script_execution.script_instance.script
+            except Exception:
+                script = CustomScript()
+            script.script_execution = script_execution
+            logger = logging.getLogger(f"netbox.scripts.{script.full_name}")
+
+            logger.warning(f"Reaping script execution {script_execution.pk} without heartbeat")
+            script._log_plugin_failure(
+                "The execution stopped sending heartbeats and its job is not running, the worker running it has died."
+            )
+            script_execution.terminate(status=ScriptExecutionStatusChoices.STATUS_ERRORED)
+
+        release_semaphores(get_execution_semaphores(script_execution), str(script_execution.pk))
+        heartbeat.remove_heartbeats(script_execution.pk)
+
+        if script_execution.parent_id:
+            _fan_in(script, script_execution.parent_id, logger)
+        elif requeue and not script_execution.interval:
+            _requeue_execution(script, script_execution, logger)
+
+        _schedule_next_execution(script, script_execution, logger)
+        script_execution.release_spooled_files()
+        reaped.append(script_execution)
+
+    for parent_execution in get_orphaned_parents():
+        complete_fanned_out_execution(parent_execution.pk)
+
+    return reaped
+
+
+def _requeue_execution(script, script_execution, logger):
+    """
+    Enqueue a new execution with the input of a reaped execution.
+    """
+    request = get_execution_request(script_execution)
+    request.id = uuid.uuid4()
+
+    with event_tracking(request):
+        new_execution = ScriptExecution(
+            script_instance=script_execution.script_instance,
+            task_id=uuid.uuid4(),
+            request_id=request.id,
+            user=script_execution.user,
+            status=ScriptExecutionStatusChoices.STATUS_PENDING,
+            task_queue=script_execution.task_queue,
+            commit=script_execution.commit,
+            callback_url=script_execution.callback_url,
+            bundle_id=script_execution.bundle_id,
+            data={
+                **_get_inherited_data(script_execution),
+                "requeued_from": script_execution.pk,
+            },
+        )
+        new_execution.full_clean()
+        new_execution.save()
+
+    logger.info(f"Requeued reaped script execution {script_execution.pk} as {new_execution.pk}")
+    enqueue_script_execution(new_execution, job_timeout=script.job_timeout)
+
+
+def run_pipeline(pipeline, request, commit=True):
+    """
+    Start a run of a pipeline. An execution is created for every step and the jobs are enqueued with RQ dependencies
+    on the jobs of the steps they depend on, so independent branches run in parallel and every step is run as soon as
+    its dependencies have finished. Returns the pipeline run.
+    """
+    steps = pipeline.ordered_steps
+    script_instances = ScriptInstance.objects.in_bulk({step["script"] for step in steps})
+    request_context = get_request_context(request)
+    script_executions = {}
+    selectors = {}
+
+    with transaction.atomic():
+        pipeline_run = ScriptPipelineRun.objects.create(pipeline=pipeline, user=request.user, commit=commit)
+
+        for order, step in enumerate(steps):
+            depends_on = step.get("depends_on", [])
+
+            script_execution = ScriptExecution(
+                script_instance=script_instances[step["script"]],
+                pipeline_run=pipeline_run,
+                task_id=uuid.uuid4(),
+                request_id=uuid.uuid4(),
+                user=request.user,
+                status=ScriptExecutionStatusChoices.STATUS_PENDING,
+                task_queue=step.get("task_queue") or plugin_config.get("DEFAULT_QUEUE"),
+                commit=commit,
+                data={
+                    "input": step.get("input", {}),
+                    "input_type": INPUT_TYPE_API,
+                    "request": request_context,
+                    "pipeline_step": step["name"],
+                    "pipeline_order": order,
+                    "pipeline_upstream": {name: script_executions[name].pk for name in depends_on},
+                    "pipeline_inputs": {variable: script_executions[name].pk for variable, name in step.get("inputs_from", {}).items()},
+                },
+            )
+
+            if script_execution.task_queue == AUTO_TASK_QUEUE:
+                if step["script"] not in selectors:
+                    selectors[step["script"]] = TaskQueueSelector(script_execution.script_instance)
+                resolve_task_queue(script_execution, selectors[step["script"]])
+
+            script_execution.full_clean()
+            script_execution.save()
+            script_executions[step["name"]] = script_execution
+
+    # The manifest module imports this module
+    from .manifest import get_manifest_script
+
+    # The jobs are enqueued in dependency order, as RQ requires the jobs a job depends on to exist. Dependents are
+    # also run if a job fails, e.g. by timing out, so the step is skipped instead of waiting forever.
+    for step in steps:
+        script_execution = script_executions[step["name"]]
+        depends_on = step.get("depends_on", [])
+
+        try:
+            job_timeout = get_manifest_script(script_execution.script_instance).job_timeout
+        except Exception:
+            job_timeout = None
+
+        dependency = None
+        if depends_on:
+            dependency = Dependency(jobs=[str(script_executions[name].task_id) for name in depends_on], allow_failure=True)
+
+        enqueue_script_execution(script_execution, job_timeout=job_timeout, depends_on=dependency)
+
+    return pipeline_run
+
+
+def _check_pipeline_upstream(script, script_execution, logger):
+    """
+    Check the upstream executions of a pipeline step before it's run. RQ runs a job once the jobs it depends on have
+    finished, but an upstream execution can still be running at that point, e.g. if it was deferred by a concurrency
+    limit or fanned out. In that case the execution is checked again later. If an upstream execution didn't complete,
+    the execution is skipped. Otherwise the outputs of the upstream executions are added to the input. Returns True if
+    the execution can be run.
+    """
+    upstream_ids = script_execution.data.get("pipeline_upstream")
+
+    if not upstream_ids:
+        return True
+
+    upstream = ScriptExecution.objects.filter(pk__in=upstream_ids.values()).in_bulk()
+    step_names = {pk: name for name, pk in upstream_ids.items()}
+
+    terminal_statuses = ScriptExecutionStatusChoices.TERMINAL_STATE_CHOICES
+
+    if any(upstream_execution.status not in terminal_statuses for upstream_execution in upstream.values()):
+        retry_delay = plugin_config.get("CONCURRENCY_RETRY_DELAY")
+        logger.info(f"Upstream steps are still running, checking again in {retry_delay} seconds")
+
+        script_execution.status = ScriptExecutionStatusChoices.STATUS_WAITING
+        script_execution.task_id = uuid.uuid4()
+        script_execution.save()
+        publish_status(script_execution)
+
+        enqueue_script_execution(
+            script_execution,
             job_timeout=script.job_timeout,
+            enqueue_at=timezone.now() + timedelta(seconds=retry_delay),
         )
+        return False
+
+    # Upstream executions deleted in the meantime are treated as not completed
+    incomplete = [
+        name
+        for pk, name in step_names.items()
+        if pk not in upstream or upstream[pk].status != ScriptExecutionStatusChoices.STATUS_COMPLETED
+    ]
+
+    if incomplete:
+        logger.info(f"Skipping pipeline step as upstream steps {incomplete} did not complete")
+        script.log_info(f"Skipped as the upstream steps {', '.join(incomplete)} did not complete.")
+        script_execution.terminate(status=ScriptExecutionStatusChoices.STATUS_SKIPPED)
+        return False
+
+    pipeline_inputs = script_execution.data.get("pipeline_inputs") or {}
+
+    if pipeline_inputs:
+        script_execution.data["input"] = {
+            **script_execution.data.get("input", {}),
+            **{variable: upstream[pk].data.get("output") for variable, pk in pipeline_inputs.items()},
+        }
+        script_execution.save()
+
+    return True
+
+
+class TaskQueueSelector:
+    """
+    Picks the task queue with the lowest expected wait among the allowed task queues of a script instance. The
+    expected wait of a queue is estimated from its queued jobs, its busy and idle workers and the duration of recent
+    executions in the queue. When several executions are placed with the same selector, the executions already placed
+    are counted as queued jobs.
+    """
+
+    def __init__(self, script_instance):
+        queue_names = [queue["name"] for queue in django_rq.settings.QUEUES_LIST]
+        allowed_queues = [name for name in script_instance.task_queues if name in queue_names] or [plugin_config.get("DEFAULT_QUEUE")]
+
+        self.loads = {name: self.get_load(name) for name in allowed_queues}
+
+    @staticmethod
+    def get_load(queue_name):
+        queue = django_rq.get_queue(queue_name)
+        workers = rq.Worker.all(queue=queue)
+
+        durations = [
+            (completed - started).total_seconds()
+            for started, completed in ScriptExecution.objects.filter(task_queue=queue_name, started__isnull=False, completed__isnull=False)
+            .order_by("-completed")
+            .values_list("started", "completed")[:QUEUE_DURATION_SAMPLE]
+        ]
+
+        return {
+            "queued": queue.count,
+            "workers": len(workers),
+            "busy_workers": sum(1 for worker in workers if worker.get_state() == WorkerStatus.BUSY),
+            "average_duration": round(sum(durations) / len(durations), 3) if durations else DEFAULT_JOB_DURATION,
+        }
+
+    @staticmethod
+    def get_expected_wait(load):
+        """
+        Returns the expected wait in seconds before a new job is started, or None if the queue has no workers.
+        """
+        if not load["workers"]:
+            return None
+
+        # A job is started right away if a worker is idle, otherwise it waits for the jobs ahead of it
+        jobs_ahead = load["queued"] + load["busy_workers"] - load["workers"] + 1
+
+        return round(max(jobs_ahead, 0) * load["average_duration"] / load["workers"], 3)
+
+    def select(self):
+        """
+        Returns the selected task queue and the decision, which holds the load and expected wait of every candidate.
+        """
+        expected_waits = {name: self.get_expected_wait(load) for name, load in self.loads.items()}
+        available = [name for name, expected_wait in expected_waits.items() if expected_wait is not None]
+
+        # Without workers on any of the queues, the first queue is used and the job waits for a worker to start
+        task_queue = min(available, key=expected_waits.get) if available else next(iter(self.loads))
+
+        decision = {
+            "queue": task_queue,
+            "selected": timezone.now().isoformat(),
+            "candidates": {name: {**load, "expected_wait": expected_waits[name]} for name, load in self.loads.items()},
+        }
+
+        self.loads[task_queue]["queued"] += 1
+
+        return task_queue, decision
+
+
+def resolve_task_queue(script_execution, selector=None):
+    """
+    Replace the auto task queue of an unsaved script execution with the queue picked by the selector, and record the
+    decision in the data of the execution. Executions with any other task queue are left as is.
+    """
+    if script_execution.task_queue != AUTO_TASK_QUEUE:
+        return
+
+    selector = selector or TaskQueueSelector(script_execution.script_instance)
+    script_execution.task_queue, script_execution.data["queue_selection"] = selector.select()
 
 
 def task_queue_choices(task_queues):
@@ -344,7 +1446,13 @@ def task_queue_choices(task_queues):
         if queue["name"] not in task_queues:
             continue
 
-        workers = rq.Worker.count(queue=django_rq.get_queue(queue["name"]))
-        description = f"{queue['name']} ({workers} workers)"
+        rq_queue = django_rq.get_queue(queue["name"])
+        workers = rq.Worker.count(queue=rq_queue)
+        description = f"{queue['name']} ({workers} workers, {rq_queue.count} queued)"
         choices.append((queue["name"], description))
+
+    # Picking the queue automatically only makes sense if there's a choice
+    if len(choices) > 1:
+        choices.insert(0, (AUTO_TASK_QUEUE, "Auto (lowest expected wait)"))
+
     return choices
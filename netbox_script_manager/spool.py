@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+import uuid
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+
+plugin_config = settings.PLUGINS_CONFIG.get("netbox_script_manager")
+
+
+def get_spool_root():
+    """
+    Returns the directory uploaded files are spooled to. It must be shared by the web servers and the workers.
+    """
+    return plugin_config.get("SPOOL_ROOT") or os.path.join(tempfile.gettempdir(), "netbox_script_manager_spool")
+
+
+def _get_spool_path(spool_id, *parts):
+    spool_root = os.path.abspath(get_spool_root())
+    path = os.path.abspath(os.path.join(spool_root, spool_id, *parts))
+
+    # The spool id and file names are stored in the database, so make sure they can't point outside the spool
+    if os.path.commonpath([spool_root, path]) != spool_root:
+        raise ValueError(f"Invalid spool path: {path}")
+
+    return path
+
+
+def spool_files(files):
+    """
+    Write uploaded files to a new directory in the spool. Returns the data to store on the script execution, consisting
+    of the id of the spool directory and a small handle for each file.
+    """
+    if not files:
+        return {}
+
+    spool_id = uuid.uuid4().hex
+    os.makedirs(_get_spool_path(spool_id))
+    handles = {}
+
+    for field_name, uploaded_file in files.items():
+        with open(_get_spool_path(spool_id, field_name), "wb") as spool_file:
+            for chunk in uploaded_file.chunks():
+                spool_file.write(chunk)
+
+        handles[field_name] = {
+            "name": uploaded_file.name,
+            "content_type": uploaded_file.content_type,
+            "charset": uploaded_file.charset,
+            "size": uploaded_file.size,
+        }
+
+    return {
+        "spool_id": spool_id,
+        "files": handles,
+    }
+
+
+def open_spooled_files(spool_id, handles):
+    """
+    Open the spooled files of a script execution as uploaded files. The content is streamed from disk as it's read.
+    """
+    return {
+        field_name: UploadedFile(
+            file=open(_get_spool_path(spool_id, field_name), "rb"),
+            name=handle["name"],
+            content_type=handle["content_type"],
+            size=handle["size"],
+            charset=handle["charset"],
+        )
+        for field_name, handle in handles.items()
+    }
+
+
+def remove_spool(spool_id):
+    shutil.rmtree(_get_spool_path(spool_id), ignore_errors=True)
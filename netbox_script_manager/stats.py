@@ -0,0 +1,47 @@
+import bisect
+
+# Upper bounds in seconds of the histogram buckets used to estimate percentiles. The last bucket is unbounded.
+HISTOGRAM_BOUNDS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, 7200, 21600, 86400)
+
+
+def add_to_histogram(histogram, value):
+    """
+    Count the value in its bucket of the histogram, a list of counts per bucket. Returns the updated histogram.
+    """
+    histogram = list(histogram) or [0] * (len(HISTOGRAM_BOUNDS) + 1)
+    histogram[bisect.bisect_left(HISTOGRAM_BOUNDS, value)] += 1
+
+    return histogram
+
+
+def merge_histograms(histograms):
+    merged = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+
+    for histogram in histograms:
+        for index, count in enumerate(histogram):
+            merged[index] += count
+
+    return merged
+
+
+def get_percentile(histogram, percentile, maximum=None):
+    """
+    Estimate a percentile from a histogram as the upper bound of the bucket containing it. The estimate is capped at
+    the maximum value if known, which is also used for the unbounded last bucket.
+    """
+    total = sum(histogram)
+
+    if not total:
+        return None
+
+    rank = total * percentile / 100
+    cumulative = 0
+
+    for index, count in enumerate(histogram):
+        cumulative += count
+
+        if cumulative >= rank:
+            bound = HISTOGRAM_BOUNDS[index] if index < len(HISTOGRAM_BOUNDS) else maximum
+            return min(bound, maximum) if maximum is not None and bound is not None else bound
+
+    return maximum
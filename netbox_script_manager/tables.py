@@ -4,7 +4,7 @@ from django_tables2.tables import Accessor
 from netbox.tables import NetBoxTable, columns
 from tenancy.tables.columns import TenantColumn
 
-from .models import ScriptArtifact, ScriptExecution, ScriptInstance, ScriptLogLine
+from .models import ScriptArtifact, ScriptExecution, ScriptInstance, ScriptLogLine, ScriptPipeline, ScriptPipelineRun, ScriptStatistic
 
 
 class ScriptInstanceTable(NetBoxTable):
@@ -14,16 +14,19 @@ class ScriptInstanceTable(NetBoxTable):
     tenant = TenantColumn(
         verbose_name=_("Tenant"),
     )
+    # Requires the queryset to be annotated with ScriptInstance.objects.with_last_execution()
     last_execution = tables.TemplateColumn(
         template_code="""
-            {% if value %}
-                {{ value.created|isodatetime }}
+            {% if record.last_execution_id %}
+                <a href="{% url 'plugins:netbox_script_manager:scriptexecution' pk=record.last_execution_id %}">
+                    {{ record.last_execution_created|isodatetime }}
+                </a>
             {% else %}
                 <span class="text-muted">Never</span>
             {% endif %}
         """,
-        accessor="last_execution",
-        linkify=lambda value: value.get_absolute_url() if value else None,
+        accessor="last_execution_created",
+        order_by=("last_execution_created",),
     )
 
     class Meta(NetBoxTable.Meta):
@@ -47,12 +50,13 @@ class ScriptInstanceTable(NetBoxTable):
 
 class ScriptExecutionTable(NetBoxTable):
     name = tables.Column(accessor=Accessor("script_instance__name"), linkify=True)
+    parent = tables.Column(linkify=True)
     actions = columns.ActionsColumn(actions=("delete",))
     status = columns.ChoiceFieldColumn()
 
     class Meta(NetBoxTable.Meta):
         model = ScriptExecution
-        fields = ("pk", "id", "name", "user", "created", "started", "completed", "status", "scheduled", "interval", "task_id")
+        fields = ("pk", "id", "name", "parent", "user", "created", "started", "completed", "status", "scheduled", "interval", "task_id")
         default_columns = (
             "id",
             "name",
@@ -88,3 +92,74 @@ class ScriptArtifactTable(NetBoxTable):
         model = ScriptArtifact
         fields = ("id", "name")
         default_columns = ("name",)
+
+
+class ScriptStatisticTable(NetBoxTable):
+    runs = tables.Column(orderable=False)
+    status_counts = tables.TemplateColumn(
+        verbose_name=_("Statuses"),
+        template_code="{% for status, count in value.items %}{{ status }}: {{ count }}{% if not forloop.last %}, {% endif %}{% endfor %}",
+        orderable=False,
+    )
+    duration_min = tables.Column(verbose_name=_("Min Duration"))
+    duration_avg = tables.Column(verbose_name=_("Avg Duration"), orderable=False)
+    duration_p50 = tables.Column(verbose_name=_("P50 Duration"), orderable=False)
+    duration_p95 = tables.Column(verbose_name=_("P95 Duration"), orderable=False)
+    duration_max = tables.Column(verbose_name=_("Max Duration"))
+    queue_wait_avg = tables.Column(verbose_name=_("Avg Queue Wait"), orderable=False)
+    queue_wait_p95 = tables.Column(verbose_name=_("P95 Queue Wait"), orderable=False)
+    queue_wait_max = tables.Column(verbose_name=_("Max Queue Wait"))
+    actions = columns.ActionsColumn(actions=tuple())
+
+    class Meta(NetBoxTable.Meta):
+        model = ScriptStatistic
+        fields = (
+            "date",
+            "runs",
+            "status_counts",
+            "duration_min",
+            "duration_avg",
+            "duration_p50",
+            "duration_p95",
+            "duration_max",
+            "queue_wait_avg",
+            "queue_wait_p95",
+            "queue_wait_max",
+        )
+        default_columns = fields
+
+    def render_duration_min(self, value):
+        return f"{value:.2f}s"
+
+    render_duration_avg = render_duration_p50 = render_duration_p95 = render_duration_max = render_duration_min
+    render_queue_wait_avg = render_queue_wait_p95 = render_queue_wait_max = render_duration_min
+
+
+class ScriptPipelineTable(NetBoxTable):
+    name = tables.Column(linkify=True)
+    steps = tables.Column(orderable=False)
+    tags = columns.TagColumn(url_name="plugins:netbox_script_manager:scriptpipeline_list")
+
+    class Meta(NetBoxTable.Meta):
+        model = ScriptPipeline
+        fields = ("pk", "id", "name", "description", "steps", "created", "last_updated", "tags")
+        default_columns = ("name", "description", "steps", "tags")
+
+    def render_steps(self, value):
+        return len(value)
+
+
+class ScriptPipelineRunTable(NetBoxTable):
+    id = tables.Column(linkify=True)
+    pipeline = tables.Column(linkify=True)
+    status = tables.TemplateColumn(
+        template_code="{% load helpers %}{% badge record.get_status_display bg_color=record.get_status_color %}",
+        orderable=False,
+    )
+    completed = tables.DateTimeColumn(orderable=False)
+    actions = columns.ActionsColumn(actions=tuple())
+
+    class Meta(NetBoxTable.Meta):
+        model = ScriptPipelineRun
+        fields = ("pk", "id", "pipeline", "user", "commit", "created", "completed", "status")
+        default_columns = ("id", "pipeline", "user", "commit", "created", "completed", "status")
@@ -9,6 +9,10 @@ register = template.Library()
 
 @register.filter
 def format_exception(e):
+    # Load errors are stored as strings in the script manifest
+    if isinstance(e, str):
+        return e
+
     return "".join(traceback.format_exception(e))
 
 
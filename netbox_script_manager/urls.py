@@ -11,6 +11,8 @@ urlpatterns = (
     path("script-instances/<int:pk>/edit/", views.ScriptInstanceEditView.as_view(), name="scriptinstance_edit"),
     path("script-instances/<int:pk>/delete/", views.ScriptInstanceDeleteView.as_view(), name="scriptinstance_delete"),
     path("script-instances/<int:pk>/executions/", views.ScriptInstanceScriptExecutionsView.as_view(), name="scriptinstance_execution"),
+    path("script-instances/<int:pk>/statistics/", views.ScriptInstanceStatisticsView.as_view(), name="scriptinstance_statistics"),
+    path("script-instances/<int:pk>/bulk-run/", views.ScriptInstanceBulkRunView.as_view(), name="scriptinstance_bulk_run"),
     path(
         "script-instances/<int:pk>/changelog/",
         ObjectChangeLogView.as_view(),
@@ -23,6 +25,7 @@ urlpatterns = (
     # ScriptExecution
     path("script-executions/", views.ScriptExecutionListView.as_view(), name="scriptexecution_list"),
     path("script-executions/<int:pk>/", views.ScriptExecutionView.as_view(), name="scriptexecution"),
+    path("script-executions/<int:pk>/log/", views.ScriptExecutionLogDownloadView.as_view(), name="scriptexecution_log_download"),
     path("script-executions/<int:pk>/htmx/", views.ScriptExecutionHtmx.as_view(), name="scriptexecution_htmx"),
     path("script-executions/<int:pk>/delete/", views.ScriptExecutionDeleteView.as_view(), name="scriptexecution_delete"),
     path(
@@ -30,10 +33,33 @@ urlpatterns = (
         views.ScriptExecutionObjectChangeView.as_view(),
         name="scriptexecution_changes",
     ),
+    path(
+        "script-executions/<int:pk>/children/",
+        views.ScriptExecutionChildrenView.as_view(),
+        name="scriptexecution_children",
+    ),
     path("script-executions/delete/", views.ScriptExecutionBulkDeleteView.as_view(), name="scriptexecution_bulk_delete"),
     path("script-executions/<int:pk>/data/", views.ScriptExecutionDataView.as_view(), name="scriptexecution_data"),
+    path("script-executions/<int:pk>/source/", views.ScriptExecutionSourceView.as_view(), name="scriptexecution_source"),
     # ScriptArtifact
     path("script-artifacts/", views.ScriptArtifactListView.as_view(), name="scriptartifact_list"),
+    path("script-artifacts/download/", views.ScriptArtifactBulkDownloadView.as_view(), name="scriptartifact_bulk_download"),
     path("script-artifacts/<int:pk>/", views.ScriptArtifactDownloadView.as_view(), name="scriptartifact_download"),
     path("script-artifacts/<int:pk>/delete/", views.ScriptArtifactDeleteView.as_view(), name="scriptartifact_delete"),
+    # ScriptPipeline
+    path("script-pipelines/", views.ScriptPipelineListView.as_view(), name="scriptpipeline_list"),
+    path("script-pipelines/add/", views.ScriptPipelineEditView.as_view(), name="scriptpipeline_add"),
+    path("script-pipelines/delete/", views.ScriptPipelineBulkDeleteView.as_view(), name="scriptpipeline_bulk_delete"),
+    path("script-pipelines/<int:pk>/", views.ScriptPipelineView.as_view(), name="scriptpipeline"),
+    path("script-pipelines/<int:pk>/edit/", views.ScriptPipelineEditView.as_view(), name="scriptpipeline_edit"),
+    path("script-pipelines/<int:pk>/delete/", views.ScriptPipelineDeleteView.as_view(), name="scriptpipeline_delete"),
+    path("script-pipelines/<int:pk>/runs/", views.ScriptPipelineRunsView.as_view(), name="scriptpipeline_runs"),
+    path(
+        "script-pipelines/<int:pk>/changelog/",
+        ObjectChangeLogView.as_view(),
+        name="scriptpipeline_changelog",
+        kwargs={"model": models.ScriptPipeline},
+    ),
+    # ScriptPipelineRun
+    path("script-pipeline-runs/<int:pk>/", views.ScriptPipelineRunView.as_view(), name="scriptpipelinerun"),
 )
@@ -1,4 +1,7 @@
+import csv
+import hashlib
 import inspect
+import io
 import logging
 import os
 import pkgutil
@@ -9,6 +12,7 @@ import importlib
 
 from django.conf import settings
 from utilities.querydict import normalize_querydict
+from utilities.request import copy_safe_request
 
 logger = logging.getLogger("netbox.plugins.netbox_script_manager")
 
@@ -18,20 +22,76 @@ GIT_TIMEOUT = 30
 # Fields not included when saving script input
 EXCLUDED_POST_FIELDS = ["csrfmiddlewaretoken", "_schedule_at", "_interval", "_run", "_commit"]
 
+# Sources of saved script input. Form input is cleaned with the script variables before the script is run.
+INPUT_TYPE_FORM = "form"
+INPUT_TYPE_API = "api"
+
 # Name of the subpackage where custom scripts are stored
 CUSTOM_SCRIPT_SUBPACKAGE = "customscripts"
 
 plugin_config = settings.PLUGINS_CONFIG.get("netbox_script_manager")
-script_root = plugin_config.get("SCRIPT_ROOT") if plugin_config else None
 
-# The script root is appended with customscripts as this is the supported structure of the plugin
-# The main reason is to avoid name collisions with the built-in netbox apps
-custom_script_root = os.path.join(script_root, CUSTOM_SCRIPT_SUBPACKAGE)
+lock = threading.Lock()
 
-# The custom script root needs to be appended to the path for relative imports to work properly
-sys.path.append(script_root)
+# Script classes kept imported by workers, keyed by module path and class name
+script_class_cache = {}
+script_class_cache_version = None
+script_class_cache_enabled = False
+# Whether the code version is checked on every access. Otherwise the owner of the cache checks it with
+# refresh_script_class_cache(), or changed modules are invalidated by the script watcher.
+script_class_cache_check_version = True
 
-lock = threading.Lock()
+# Script root the scripts are currently imported from, like an extracted script bundle. None means SCRIPT_ROOT.
+active_script_root = None
+
+
+def get_script_root():
+    return plugin_config.get("SCRIPT_ROOT")
+
+
+def get_custom_script_root():
+    # The script root is appended with customscripts as this is the supported structure of the plugin
+    # The main reason is to avoid name collisions with the built-in netbox apps
+    return os.path.join(get_script_root(), CUSTOM_SCRIPT_SUBPACKAGE)
+
+
+def add_script_root_to_path():
+    """
+    The script root needs to be on the path for relative imports to work properly. Called when the plugin is ready,
+    so importing the plugin has no side effects.
+    """
+    script_root = get_script_root()
+
+    if script_root not in sys.path:
+        sys.path.append(script_root)
+
+
+def get_active_script_root():
+    return active_script_root or get_script_root()
+
+
+def set_active_script_root(script_root):
+    """
+    Import scripts from another script root, or from SCRIPT_ROOT if None. The root takes precedence over SCRIPT_ROOT
+    on the path, and the imported scripts are dropped when the root changes.
+    """
+    global active_script_root, script_class_cache_version
+
+    with lock:
+        if (script_root or None) == active_script_root:
+            return
+
+        if active_script_root in sys.path:
+            sys.path.remove(active_script_root)
+
+        if script_root:
+            sys.path.insert(0, script_root)
+
+        active_script_root = script_root or None
+
+        clear_module_cache()
+        script_class_cache.clear()
+        script_class_cache_version = None
 
 
 def is_script(obj):
@@ -64,7 +124,7 @@ def load_scripts():
         clear_module_cache()
 
         scripts = {}
-        modules = list(pkgutil.iter_modules([custom_script_root]))
+        modules = list(pkgutil.iter_modules([get_custom_script_root()]))
         failed_modules = {}
 
         # Iterate over all modules in the custom script root
@@ -90,6 +150,79 @@ def load_scripts():
         return scripts, failed_modules
 
 
+def get_code_version():
+    """
+    Returns a fingerprint of the script files, which changes whenever a file in the custom script root is added,
+    removed or modified. Only the file metadata is read, so this is cheap enough to call for every job.
+    """
+    fingerprint = hashlib.sha1()
+
+    for root, dirs, files in os.walk(os.path.join(get_active_script_root(), CUSTOM_SCRIPT_SUBPACKAGE)):
+        dirs[:] = sorted(d for d in dirs if not d.startswith(".") and d != "__pycache__")
+
+        for filename in sorted(files):
+            path = os.path.join(root, filename)
+            stat = os.stat(path)
+            fingerprint.update(f"{path}:{stat.st_mtime_ns}:{stat.st_size}\n".encode())
+
+    return fingerprint.hexdigest()
+
+
+def enable_script_class_cache(check_version=True):
+    """
+    Keep script classes imported between accesses instead of reimporting them every time. The cache is invalidated
+    when the code version changes. If `check_version` is False, the code version is only checked by
+    `refresh_script_class_cache()` and changed modules are dropped by `invalidate_modules()`.
+    """
+    global script_class_cache_enabled, script_class_cache_check_version
+    script_class_cache_enabled = True
+    script_class_cache_check_version = check_version
+
+
+def refresh_script_class_cache():
+    """
+    Drop all imported scripts if the code version changed since the last check. Returns the code version.
+    """
+    global script_class_cache_version
+
+    with lock:
+        code_version = get_code_version()
+        if code_version != script_class_cache_version:
+            clear_module_cache()
+            script_class_cache.clear()
+            script_class_cache_version = code_version
+
+        return code_version
+
+
+def get_script_class(module_path, class_name):
+    """
+    Import and return a script class. Unless the script class cache is enabled, the module cache is cleared first to
+    make sure the current version of the script is used.
+    """
+    global script_class_cache_version
+
+    # Deleting from sys.modules and reloading the module is not thread-safe so we wrap it all in a lock.
+    with lock:
+        if not script_class_cache_enabled:
+            clear_module_cache()
+            module = importlib.import_module(module_path)
+            return getattr(module, class_name, None)
+
+        code_version = get_code_version() if script_class_cache_check_version else script_class_cache_version
+        if code_version != script_class_cache_version:
+            clear_module_cache()
+            script_class_cache.clear()
+            script_class_cache_version = code_version
+
+        key = (module_path, class_name)
+        if key not in script_class_cache:
+            module = importlib.import_module(module_path)
+            script_class_cache[key] = getattr(module, class_name, None)
+
+        return script_class_cache[key]
+
+
 def clear_module_cache():
     """
     Clears the module cache to prevent changes to script inputs being ignored.
@@ -99,6 +232,72 @@ def clear_module_cache():
             del sys.modules[module_name]
 
 
+def is_module_in(module_name, module_names):
+    """
+    Returns whether the module is one of the given modules or a submodule of one of them.
+    """
+    return any(module_name == name or module_name.startswith(f"{name}.") for name in module_names)
+
+
+def _imports_any(module, module_names):
+    """
+    Returns whether a module holds a reference to one of the given modules or to a class or function defined in them.
+    A package referencing its own submodules doesn't count.
+    """
+    for value in list(vars(module).values()):
+        if inspect.ismodule(value):
+            name = value.__name__
+        elif inspect.isclass(value) or inspect.isfunction(value):
+            name = value.__module__
+        else:
+            continue
+
+        if name in module_names and not name.startswith(f"{module.__name__}."):
+            return True
+
+    return False
+
+
+def invalidate_modules(module_names):
+    """
+    Drop the given script modules and their submodules from the module cache and the script class cache, so they are
+    imported again on the next access. Modules importing a dropped module would keep using its old version, so they
+    are dropped as well. All other modules stay imported. Returns the names of the dropped modules.
+    """
+    with lock:
+        custom_modules = {name: module for name, module in sys.modules.items() if is_module_in(name, [CUSTOM_SCRIPT_SUBPACKAGE])}
+        invalidated = {name for name in custom_modules if is_module_in(name, module_names)}
+
+        while True:
+            dependents = {
+                name
+                for name, module in custom_modules.items()
+                if name not in invalidated and module is not None and _imports_any(module, invalidated)
+            }
+            if not dependents:
+                break
+            invalidated |= dependents
+
+        for name in invalidated:
+            del sys.modules[name]
+
+        for key in list(script_class_cache):
+            if key[0] in invalidated or is_module_in(key[0], module_names):
+                del script_class_cache[key]
+
+        return invalidated
+
+
+def get_redis_connection():
+    """
+    Returns the redis connection used for coordination between workers. The connection of the default queue is used,
+    so all workers share the same state regardless of which queue they process.
+    """
+    import django_rq
+
+    return django_rq.get_connection(plugin_config.get("DEFAULT_QUEUE"))
+
+
 def prepare_post_data(request):
     """
     Normalize QueryDict to a normal dict and remove unwanted fields.
@@ -115,6 +314,35 @@ def prepare_post_data(request):
     return post_data
 
 
+def parse_csv_inputs(csv_data):
+    """
+    Parse CSV data into a list of script inputs, one per row. The header row holds the names of the script variables.
+    Empty values are omitted so the defaults of the script variables apply.
+    """
+    if isinstance(csv_data, bytes):
+        csv_data = csv_data.decode("utf-8-sig")
+
+    reader = csv.DictReader(io.StringIO(csv_data.strip()))
+
+    if not reader.fieldnames:
+        raise ValueError("CSV data must contain a header row")
+
+    return [{field: value for field, value in row.items() if field and value not in (None, "")} for row in reader]
+
+
+def get_request_context(request):
+    """
+    Returns the parts of a request needed to rebuild it when a script is run, in a JSON serializable format.
+    """
+    safe_request = copy_safe_request(request)
+
+    return {
+        "META": safe_request.META,
+        "method": safe_request.method,
+        "path": safe_request.path,
+    }
+
+
 def pull_scripts():
     """
     Pulls the git repository at the custom script root.
@@ -124,7 +352,7 @@ def pull_scripts():
     try:
         result = subprocess.run(
             ["git", "pull"],
-            cwd=custom_script_root,  # git recursively checks parent folders until it finds a git directory
+            cwd=get_custom_script_root(),  # git recursively checks parent folders until it finds a git directory
             check=True,
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,  # git uses stderr as stdout for some reason
@@ -132,4 +360,4 @@ def pull_scripts():
         )
         return result.stdout.decode()
     except subprocess.CalledProcessError as e:
-        raise ValueError(f"Failed to pull git repository at {custom_script_root}: {e.output.decode()}")
+        raise ValueError(f"Failed to pull git repository at {get_custom_script_root()}: {e.output.decode()}")
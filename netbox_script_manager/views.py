@@ -1,50 +1,99 @@
 import json
 import uuid
+from datetime import timedelta
 
-import django_rq
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.contenttypes.models import ContentType
-from django.http import HttpResponse
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse, HttpResponseBadRequest
 from django.shortcuts import redirect, render
+from django.utils import timezone
 from django.utils.safestring import mark_safe
 from django.views.generic import View
 from core.filtersets import ObjectChangeFilterSet
 from core.models import ObjectChange
 from core.tables import ObjectChangeTable
 from netbox.views import generic
-from utilities.request import copy_safe_request
 from utilities.querydict import normalize_querydict
 from utilities.views import ContentTypePermissionRequiredMixin, ViewTab, register_model_view
 
-from . import filtersets, forms, models, tables, util
+from . import bundles, export, filtersets, forms, logbuffer, models, spool, tables, util
 from .api.serializers import ScriptLogLineMinimalSerializer
 from .choices import ScriptExecutionStatusChoices
 from .models import ScriptExecution
-from .scripts import run_script
 from .templatetags.scriptmanager import format_exception
 
+# The scripts, manifests and concurrency limits import django_rq, rq and extras.scripts, so the views import them when
+# they are used instead of when the URLs are loaded
+
 plugin_config = settings.PLUGINS_CONFIG.get("netbox_script_manager")
 
+# Number of days summarized on the script instance page
+STATISTICS_SUMMARY_DAYS = 7
+
 
 class ScriptInstanceView(generic.ObjectView):
     queryset = models.ScriptInstance.objects.all()
 
     def get_extra_context(self, request, instance):
+        from .manifest import ManifestError, get_manifest_script
+
+        context = {"statistics": self.get_statistics(request, instance)}
+
         try:
-            script = instance.script
+            script = get_manifest_script(instance)
+        except ManifestError as e:
+            return {**context, "exception": str(e)}
         except Exception as e:
-            return {"exception": e}
+            return {**context, "exception": e}
 
         fieldsets = script.get_fieldsets(instance=instance)
-        return {"form": script.as_form(initial=normalize_querydict(request.GET), script_instance=instance), "fieldsets": fieldsets}
+        return {
+            **context,
+            "form": script.as_form(initial=normalize_querydict(request.GET), script_instance=instance),
+            "fieldsets": fieldsets,
+        }
+
+    def get_statistics(self, request, instance):
+        """
+        Summarize the executions of the last week from the daily statistics.
+        """
+        if not request.user.has_perm("netbox_script_manager.view_scriptstatistic"):
+            return None
+
+        since = timezone.localdate() - timedelta(days=STATISTICS_SUMMARY_DAYS - 1)
+        statistics = instance.statistics.restrict(request.user, "view").filter(date__gte=since)
+
+        return models.ScriptStatistic.combine(statistics)
 
     def post(self, request, pk):
+        from .concurrency import QuotaExceeded, check_queued_quota
+        from .manifest import ManifestError, get_manifest_script
+        from .scripts import enqueue_script_execution, resolve_task_queue
+
         instance = self.get_object(pk=pk)
-        form = instance.script.as_form(request.POST, files=request.FILES, script_instance=instance)
-        fieldsets = instance.script.get_fieldsets(instance=instance)
+
+        try:
+            script = get_manifest_script(instance)
+        except ManifestError as e:
+            messages.error(request, f"Failed to load the script: {e}")
+            return render(request, "netbox_script_manager/scriptinstance.html", {"object": instance, "exception": str(e)})
+
+        form = script.as_form(request.POST, files=request.FILES, script_instance=instance)
+        fieldsets = script.get_fieldsets(instance=instance)
 
         if form.is_valid():
+            try:
+                check_queued_quota(request.user, instance)
+            except QuotaExceeded as e:
+                messages.error(request, str(e))
+                return render(
+                    request,
+                    "netbox_script_manager/scriptinstance.html",
+                    {"form": form, "object": instance, "fieldsets": fieldsets},
+                )
+
             schedule_at = form.cleaned_data.pop("_schedule_at")
             interval = form.cleaned_data.pop("_interval")
 
@@ -63,46 +112,123 @@ class ScriptInstanceView(generic.ObjectView):
                 scheduled=schedule_at,
                 interval=interval,
                 task_queue=task_queue,
+                commit=form.cleaned_data.pop("_commit"),
             )
+            resolve_task_queue(script_execution)
 
-            # Save script input
+            # Save script input and the request context, which are loaded by the worker when the script is run
             script_execution.data["input"] = util.prepare_post_data(request)
+            script_execution.data["input_type"] = util.INPUT_TYPE_FORM
+            script_execution.data["request"] = util.get_request_context(request)
+
+            # Uploaded files are spooled to disk and opened by the worker
+            script_execution.data.update(spool.spool_files(request.FILES))
 
             script_execution.full_clean()
             script_execution.save()
 
-            queue = django_rq.get_queue(task_queue)
-
-            if script_execution.scheduled:
-                queue.enqueue_at(
-                    script_execution.scheduled,
-                    run_script,
-                    job_id=str(script_execution.task_id),
-                    data=form.cleaned_data,
-                    request=copy_safe_request(request),
-                    commit=form.cleaned_data.pop("_commit"),
-                    script_execution=script_execution,
-                    interval=script_execution.interval,
-                    job_timeout=instance.script.job_timeout,
-                )
-            else:
-                queue.enqueue(
-                    run_script,
-                    job_id=str(script_execution.task_id),
-                    data=form.cleaned_data,
-                    request=copy_safe_request(request),
-                    commit=form.cleaned_data.pop("_commit"),
-                    script_execution=script_execution,
-                    job_timeout=instance.script.job_timeout,
-                )
+            enqueue_script_execution(script_execution, job_timeout=script.job_timeout)
 
             return redirect("plugins:netbox_script_manager:scriptexecution", pk=script_execution.pk)
 
         return render(request, "netbox_script_manager/scriptinstance.html", {"form": form, "object": instance, "fieldsets": fieldsets})
 
 
-class ScriptInstanceListView(generic.ObjectListView):
+@register_model_view(models.ScriptInstance, "bulk_run")
+class ScriptInstanceBulkRunView(generic.ObjectView):
     queryset = models.ScriptInstance.objects.all()
+    template_name = "netbox_script_manager/scriptinstance_bulk_run.html"
+    tab = ViewTab(
+        label="Bulk Run",
+        permission="netbox_script_manager.run_scriptinstance",
+        weight=530,
+    )
+
+    def get_form(self, instance, data=None, files=None):
+        from .scripts import task_queue_choices
+
+        form = forms.ScriptBulkRunForm(data, files)
+
+        choices = task_queue_choices(instance.task_queues)
+        if choices:
+            form.fields["_task_queue"].choices = choices
+        else:
+            del form.fields["_task_queue"]
+
+        return form
+
+    def get_extra_context(self, request, instance):
+        return {"form": self.get_form(instance)}
+
+    def post(self, request, pk):
+        from .concurrency import QuotaExceeded, check_queued_quota
+        from .manifest import ManifestError, get_manifest_script
+        from .scripts import enqueue_script_executions
+
+        if not request.user.has_perm("netbox_script_manager.run_scriptinstance"):
+            raise PermissionDenied()
+
+        instance = self.get_object(pk=pk)
+        form = self.get_form(instance, request.POST, request.FILES)
+
+        if form.is_valid():
+            csv_file = form.cleaned_data["csv_file"]
+            csv_data = csv_file.read() if csv_file else form.cleaned_data["csv_data"]
+
+            try:
+                rows = util.parse_csv_inputs(csv_data)
+            except (ValueError, UnicodeDecodeError) as e:
+                rows = []
+                form.add_error(None, f"Invalid CSV data: {e}")
+
+            try:
+                script = get_manifest_script(instance)
+            except ManifestError as e:
+                rows = []
+                form.add_error(None, f"Failed to load the script: {e}")
+
+            # Validate every row against the script variables before anything is enqueued
+            inputs = []
+
+            for index, row in enumerate(rows, start=1):
+                input_form = script.as_input_form(data=row)
+
+                if not input_form.is_valid():
+                    for field_name, errors in input_form.errors.items():
+                        form.add_error(None, f"Row {index}, {field_name}: {' '.join(errors)}")
+                    continue
+
+                inputs.append(
+                    {
+                        "input": row,
+                        "input_type": util.INPUT_TYPE_FORM,
+                        "commit": form.cleaned_data["_commit"],
+                        "schedule_at": None,
+                        "interval": None,
+                        "task_queue": form.cleaned_data.get("_task_queue") or plugin_config.get("DEFAULT_QUEUE"),
+                    }
+                )
+
+            if not inputs and not form.errors:
+                form.add_error(None, "The CSV data contains no rows.")
+
+            if not form.errors:
+                try:
+                    check_queued_quota(request.user, instance, count=len(inputs))
+                except QuotaExceeded as e:
+                    form.add_error(None, str(e))
+
+            if not form.errors:
+                script_executions = enqueue_script_executions(instance, request, inputs, job_timeout=script.job_timeout)
+                messages.success(request, f"Enqueued {len(script_executions)} executions")
+
+                return redirect("plugins:netbox_script_manager:scriptinstance_execution", pk=instance.pk)
+
+        return render(request, self.get_template_name(), {"object": instance, "form": form, "tab": self.tab})
+
+
+class ScriptInstanceListView(generic.ObjectListView):
+    queryset = models.ScriptInstance.objects.for_list()
     table = tables.ScriptInstanceTable
     filterset = filtersets.ScriptInstanceFilterSet
     filterset_form = forms.ScriptInstanceFilterForm
@@ -123,7 +249,7 @@ class ScriptInstanceDeleteView(generic.ObjectDeleteView):
 
 
 class ScriptInstanceBulkDeleteView(generic.BulkDeleteView):
-    queryset = models.ScriptInstance.objects.all()
+    queryset = models.ScriptInstance.objects.for_list()
     filterset = filtersets.ScriptInstanceFilterSet
     table = tables.ScriptInstanceTable
 
@@ -133,6 +259,8 @@ class ScriptInstanceLoadView(ContentTypePermissionRequiredMixin, View):
         return "netbox_script_manager.add_scriptinstance"
 
     def get(self, request):
+        from .manifest import update_manifests
+
         scripts_found = False
 
         scripts, failed_modules = util.load_scripts()
@@ -151,6 +279,11 @@ class ScriptInstanceLoadView(ContentTypePermissionRequiredMixin, View):
                     class_name=class_name,
                     description=script.description,
                     task_queues=script.task_queues,
+                    max_concurrency=script.max_concurrency,
+                    concurrency_policy=script.concurrency_policy,
+                    memory_limit=script.memory_limit,
+                    cpu_time_limit=script.cpu_time_limit,
+                    open_files_limit=script.open_files_limit,
                     group=script.group,
                     weight=script.weight,
                 )
@@ -159,6 +292,11 @@ class ScriptInstanceLoadView(ContentTypePermissionRequiredMixin, View):
 
                 messages.success(request, f'Script "{script_name}" loaded')
 
+        update_manifests(scripts, failed_modules)
+
+        if bundles.is_enabled():
+            messages.info(request, f"Published script bundle {bundles.publish_bundle()}")
+
         for module_name, exception in failed_modules.items():
             # This is hackish but it works. Toast messages are kinda limited in netbox.
             messages.error(
@@ -179,15 +317,21 @@ class ScriptInstanceSyncView(ContentTypePermissionRequiredMixin, View):
         return "netbox_script_manager.sync_scriptinstance"
 
     def get(self, request):
+        from .manifest import update_manifests
+
         try:
             result = util.pull_scripts()
         except Exception as e:
             messages.error(request, f"Failed to pull git repository: {e}")
             return redirect("plugins:netbox_script_manager:scriptinstance_list")
 
+        update_manifests(*util.load_scripts())
+
         message = [f"Pulled git repository"]
         if result:
             message.append(f"<pre>{result}</pre>")
+        if bundles.is_enabled():
+            message.append(f"Published script bundle {bundles.publish_bundle()}")
 
         messages.info(request, mark_safe("\n".join(message)))
 
@@ -214,16 +358,35 @@ class ScriptInstanceScriptExecutionsView(generic.ObjectChildrenView):
     )
 
     def get_children(self, request, parent):
-        return parent.script_executions.restrict(request.user, "view")
+        return parent.script_executions.for_list().restrict(request.user, "view")
+
+
+@register_model_view(models.ScriptInstance, "statistics")
+class ScriptInstanceStatisticsView(generic.ObjectChildrenView):
+    queryset = models.ScriptInstance.objects.all()
+    child_model = models.ScriptStatistic
+    table = tables.ScriptStatisticTable
+    filterset = filtersets.ScriptStatisticFilterSet
+    actions = {}
+    tab = ViewTab(
+        label="Statistics",
+        permission="netbox_script_manager.view_scriptstatistic",
+        weight=530,
+        hide_if_empty=False,
+    )
+
+    def get_children(self, request, parent):
+        return parent.statistics.restrict(request.user, "view")
 
 
 class ScriptExecutionView(generic.ObjectView):
-    queryset = models.ScriptExecution.objects.all()
+    queryset = models.ScriptExecution.objects.select_related("script_instance", "user", "bundle").defer("bundle__data")
     actions = {
         "delete": {"delete"},
     }
 
     def get_extra_context(self, request, instance):
+        # Lines still in the log buffer are fetched by the log view from the API
         log_lines = instance.script_log_lines.all()
         serialized_logs = ScriptLogLineMinimalSerializer(log_lines, many=True).data
 
@@ -232,6 +395,23 @@ class ScriptExecutionView(generic.ObjectView):
         }
 
 
+class ScriptExecutionLogDownloadView(generic.ObjectView):
+    queryset = models.ScriptExecution.objects.all()
+
+    def get(self, request, **kwargs):
+        instance = self.get_object(**kwargs)
+        log_format = request.GET.get("log_format", "text")
+        compress = request.GET.get("gzip", "").lower() in ("1", "true")
+
+        if log_format not in export.LOG_EXPORT_FORMATS:
+            return HttpResponseBadRequest(f"Invalid log format, choices are: {', '.join(export.LOG_EXPORT_FORMATS)}")
+
+        if logbuffer.is_enabled():
+            logbuffer.flush_log_buffer(instance.pk)
+
+        return export.get_log_response(instance, log_format, compress)
+
+
 @register_model_view(models.ScriptExecution, "changes")
 class ScriptExecutionObjectChangeView(generic.ObjectChildrenView):
     queryset = models.ScriptExecution.objects.all()
@@ -245,7 +425,7 @@ class ScriptExecutionObjectChangeView(generic.ObjectChildrenView):
     template_name = "netbox_script_manager/script_execution_objectchange_list.html"
     tab = ViewTab(
         label="Changes",
-        badge=lambda obj: ObjectChange.objects.filter(request_id=str(obj.request_id))
+        badge=lambda obj: ObjectChange.objects.filter(request_id__in=[obj.request_id, *obj.children.values_list("request_id", flat=True)])
         .exclude(changed_object_type=ContentType.objects.get_for_model(ScriptExecution))
         .count(),
         permission="netbox_script_manager.view_scriptexecution",
@@ -254,13 +434,38 @@ class ScriptExecutionObjectChangeView(generic.ObjectChildrenView):
     )
 
     def get_children(self, request, parent):
+        # Changes made by the child executions of a fanned out execution are logged with their own request ids
+        request_ids = [parent.request_id, *parent.children.values_list("request_id", flat=True)]
+
         return (
             ObjectChange.objects.restrict(request.user, "view")
-            .filter(request_id=str(parent.request_id))
+            .filter(request_id__in=request_ids)
             .exclude(changed_object_type=ContentType.objects.get_for_model(ScriptExecution))
         )
 
 
+@register_model_view(models.ScriptExecution, "children")
+class ScriptExecutionChildrenView(generic.ObjectChildrenView):
+    queryset = models.ScriptExecution.objects.all()
+    child_model = models.ScriptExecution
+    table = tables.ScriptExecutionTable
+    filterset = filtersets.ScriptExecutionFilterSet
+    actions = {
+        "delete": {"delete"},
+    }
+    template_name = "netbox_script_manager/script_execution_children_list.html"
+    tab = ViewTab(
+        label="Shards",
+        badge=lambda obj: obj.children.count(),
+        permission="netbox_script_manager.view_scriptexecution",
+        weight=510,
+        hide_if_empty=True,
+    )
+
+    def get_children(self, request, parent):
+        return parent.children.for_list().restrict(request.user, "view")
+
+
 @register_model_view(models.ScriptExecution, "data")
 class ScriptExecutionDataView(generic.ObjectView):
     queryset = models.ScriptExecution.objects.all()
@@ -268,13 +473,20 @@ class ScriptExecutionDataView(generic.ObjectView):
     tab = ViewTab(label="Data", permission="", weight=1000)
 
 
+@register_model_view(models.ScriptExecution, "source")
+class ScriptExecutionSourceView(generic.ObjectView):
+    queryset = models.ScriptExecution.objects.select_related("source")
+    template_name = "netbox_script_manager/scriptexecution_source.html"
+    tab = ViewTab(label="Source", permission="", weight=1010)
+
+
 class ScriptExecutionHtmx(generic.ObjectView):
     queryset = models.ScriptExecution.objects.all()
     template_name = "netbox_script_manager/htmx/script_execution.html"
 
 
 class ScriptExecutionListView(generic.ObjectListView):
-    queryset = models.ScriptExecution.objects.all()
+    queryset = models.ScriptExecution.objects.for_list()
     table = tables.ScriptExecutionTable
     actions = {
         "export": set(),
@@ -283,6 +495,7 @@ class ScriptExecutionListView(generic.ObjectListView):
     }
     filterset = filtersets.ScriptExecutionFilterSet
     filterset_form = forms.ScriptExecutionFilterForm
+    template_name = "netbox_script_manager/script_execution_list.html"
 
 
 class ScriptExecutionDeleteView(generic.ObjectDeleteView):
@@ -290,13 +503,13 @@ class ScriptExecutionDeleteView(generic.ObjectDeleteView):
 
 
 class ScriptExecutionBulkDeleteView(generic.BulkDeleteView):
-    queryset = models.ScriptExecution.objects.all()
+    queryset = models.ScriptExecution.objects.select_related("script_instance")
     filterset = filtersets.ScriptExecutionFilterSet
     table = tables.ScriptExecutionTable
 
 
 class ScriptArtifactListView(generic.ObjectListView):
-    queryset = models.ScriptArtifact.objects.all()
+    queryset = models.ScriptArtifact.objects.for_list()
     table = tables.ScriptArtifactTable
     filterset = filtersets.ScriptArtifactFilterSet
     actions = {}
@@ -314,5 +527,115 @@ class ScriptArtifactDownloadView(generic.ObjectView):
         return response
 
 
+class ScriptArtifactBulkDownloadView(ContentTypePermissionRequiredMixin, View):
+    """
+    Download the artifacts of one or more script executions as a ZIP archive. The executions are selected with
+    `script_execution_id` query parameters, or the `pk` list posted by the bulk action of an execution list.
+    """
+
+    def get_required_permission(self):
+        return "netbox_script_manager.view_scriptartifact"
+
+    def get(self, request):
+        return self.download(request, request.GET.getlist("script_execution_id"), request.GET.get("name"))
+
+    def post(self, request):
+        return self.download(request, request.POST.getlist("pk"), request.POST.get("name"))
+
+    def download(self, request, script_execution_ids, pattern):
+        script_execution_ids = list(
+            models.ScriptExecution.objects.restrict(request.user, "view")
+            .filter(pk__in=[pk for pk in script_execution_ids if str(pk).isdigit()])
+            .values_list("pk", flat=True)
+        )
+
+        if not script_execution_ids:
+            return HttpResponseBadRequest("No script executions selected")
+
+        return export.get_artifacts_response(
+            script_execution_ids,
+            pattern=pattern or None,
+            queryset=models.ScriptArtifact.objects.restrict(request.user, "view"),
+        )
+
+
 class ScriptArtifactDeleteView(generic.ObjectDeleteView):
     queryset = models.ScriptArtifact.objects.all()
+
+
+class ScriptPipelineListView(generic.ObjectListView):
+    queryset = models.ScriptPipeline.objects.all()
+    table = tables.ScriptPipelineTable
+    filterset = filtersets.ScriptPipelineFilterSet
+    filterset_form = forms.ScriptPipelineFilterForm
+
+
+class ScriptPipelineView(generic.ObjectView):
+    queryset = models.ScriptPipeline.objects.all()
+
+    def get_extra_context(self, request, instance):
+        script_instances = models.ScriptInstance.objects.in_bulk({step["script"] for step in instance.steps})
+        steps = [(step, script_instances.get(step["script"])) for step in instance.ordered_steps]
+
+        return {"steps": steps, "form": forms.ScriptPipelineRunForm()}
+
+    def post(self, request, pk):
+        from .concurrency import QuotaExceeded, check_pipeline_quota
+        from .scripts import run_pipeline
+
+        if not request.user.has_perms(("netbox_script_manager.run_scriptpipeline", "netbox_script_manager.run_scriptinstance")):
+            raise PermissionDenied()
+
+        instance = self.get_object(pk=pk)
+        form = forms.ScriptPipelineRunForm(request.POST)
+
+        if not form.is_valid():
+            return redirect(instance.get_absolute_url())
+
+        try:
+            check_pipeline_quota(request.user, instance)
+        except QuotaExceeded as e:
+            messages.error(request, str(e))
+            return redirect(instance.get_absolute_url())
+
+        pipeline_run = run_pipeline(instance, request, commit=form.cleaned_data["_commit"])
+
+        return redirect(pipeline_run.get_absolute_url())
+
+
+class ScriptPipelineEditView(generic.ObjectEditView):
+    queryset = models.ScriptPipeline.objects.all()
+    form = forms.ScriptPipelineForm
+
+
+class ScriptPipelineDeleteView(generic.ObjectDeleteView):
+    queryset = models.ScriptPipeline.objects.all()
+
+
+class ScriptPipelineBulkDeleteView(generic.BulkDeleteView):
+    queryset = models.ScriptPipeline.objects.all()
+    filterset = filtersets.ScriptPipelineFilterSet
+    table = tables.ScriptPipelineTable
+
+
+@register_model_view(models.ScriptPipeline, "runs")
+class ScriptPipelineRunsView(generic.ObjectChildrenView):
+    queryset = models.ScriptPipeline.objects.all()
+    child_model = models.ScriptPipelineRun
+    table = tables.ScriptPipelineRunTable
+    filterset = filtersets.ScriptPipelineRunFilterSet
+    actions = {}
+    tab = ViewTab(
+        label="Runs",
+        badge=lambda obj: obj.runs.count(),
+        permission="netbox_script_manager.view_scriptpipelinerun",
+        weight=520,
+        hide_if_empty=False,
+    )
+
+    def get_children(self, request, parent):
+        return parent.runs.for_list().restrict(request.user, "view")
+
+
+class ScriptPipelineRunView(generic.ObjectView):
+    queryset = models.ScriptPipelineRun.objects.for_list()
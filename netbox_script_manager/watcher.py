@@ -0,0 +1,293 @@
+import ctypes
+import ctypes.util
+import json
+import logging
+import os
+import select
+import struct
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+from redis.exceptions import RedisError
+
+from . import util
+
+logger = logging.getLogger("netbox.plugins.netbox_script_manager")
+
+plugin_config = settings.PLUGINS_CONFIG.get("netbox_script_manager")
+
+INVALIDATION_CHANNEL = "netbox_script_manager:invalidate"
+
+# Seconds to wait for more events after a change, as editors and git write a file in several steps
+DEBOUNCE_DELAY = 0.2
+
+# Seconds to wait before subscribing again after losing the redis connection
+RECONNECT_DELAY = 5
+
+# inotify flags and event masks, see inotify(7)
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+# wd, mask, cookie and name length of an inotify event, followed by the name
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def is_watched_directory(name):
+    return not name.startswith(".") and name != "__pycache__"
+
+
+def get_module_name(path, custom_script_root):
+    """
+    Returns the name of the module or package at a path in the custom script root.
+    """
+    relative_path = os.path.relpath(path, os.path.dirname(custom_script_root))
+    if relative_path.endswith(".py"):
+        relative_path = relative_path[:-3]
+
+    parts = relative_path.split(os.sep)
+    if parts[-1] == "__init__":
+        parts.pop()
+
+    return ".".join(parts)
+
+
+class PollingBackend:
+    """
+    Finds changed script files by comparing the modification time and size of all files on every poll.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.files = self.scan()
+
+    def scan(self):
+        files = {}
+
+        for root, dirs, filenames in os.walk(self.root):
+            dirs[:] = [d for d in dirs if is_watched_directory(d)]
+
+            for filename in filenames:
+                if filename.endswith(".py"):
+                    path = os.path.join(root, filename)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    files[path] = (stat.st_mtime_ns, stat.st_size)
+
+        return files
+
+    def read(self, timeout):
+        time.sleep(timeout)
+
+        files = self.scan()
+        changed = {path for path in files.keys() | self.files.keys() if files.get(path) != self.files.get(path)}
+        self.files = files
+
+        return changed
+
+    def close(self):
+        pass
+
+
+class InotifyBackend:
+    """
+    Finds changed script files with inotify, through the C library as the plugin has no dependencies. Every directory
+    in the tree is watched, and directories created later are added as they appear. Raises OSError where inotify is
+    not available.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+
+        if not hasattr(self.libc, "inotify_init1"):
+            raise OSError("inotify is not supported on this system")
+
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "Failed to initialize inotify")
+
+        # Watched directories by watch descriptor
+        self.watches = {}
+
+        try:
+            self.add_tree(root)
+        except OSError:
+            self.close()
+            raise
+
+    def add_watch(self, directory):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"Failed to watch {directory}")
+
+        self.watches[wd] = directory
+
+    def add_tree(self, root):
+        """
+        Watch a directory and its subdirectories. Returns the script files in the tree, which are changed if the
+        directory was created or moved in after the watcher started.
+        """
+        files = set()
+
+        for directory, dirs, filenames in os.walk(root):
+            dirs[:] = [d for d in dirs if is_watched_directory(d)]
+            self.add_watch(directory)
+            files.update(os.path.join(directory, filename) for filename in filenames if filename.endswith(".py"))
+
+        return files
+
+    def read_events(self):
+        data = b""
+
+        while True:
+            try:
+                chunk = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return data
+
+            if not chunk:
+                return data
+            data += chunk
+
+    def read(self, timeout):
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        time.sleep(DEBOUNCE_DELAY)
+
+        data = self.read_events()
+        changed = set()
+        offset = 0
+
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = os.fsdecode(data[offset + EVENT_HEADER.size : offset + EVENT_HEADER.size + length].rstrip(b"\0"))
+            offset += EVENT_HEADER.size + length
+
+            # Events were dropped, so anything might have changed
+            if mask & IN_Q_OVERFLOW:
+                changed.add(self.root)
+                continue
+
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+
+            directory = self.watches.get(wd)
+            if directory is None or not name:
+                continue
+
+            path = os.path.join(directory, name)
+
+            if mask & IN_ISDIR:
+                if not is_watched_directory(name):
+                    continue
+                if mask & (IN_CREATE | IN_MOVED_TO) and os.path.isdir(path):
+                    changed.update(self.add_tree(path))
+                changed.add(path)
+            elif name.endswith(".py"):
+                changed.add(path)
+
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class ScriptWatcher:
+    """
+    Watches the custom script root for changed script files. The changed modules are dropped from the module cache,
+    the manifests of the script instances in them are refreshed and the script workers are told to drop the modules
+    as well. Uses inotify where available and falls back to polling every SCRIPT_WATCHER_INTERVAL seconds.
+    """
+
+    def __init__(self, polling=False):
+        self.custom_script_root = util.get_custom_script_root()
+        self.backend = None
+
+        if not polling:
+            try:
+                self.backend = InotifyBackend(self.custom_script_root)
+            except OSError as e:
+                logger.info(f"inotify is not available, polling for script changes instead: {e}")
+
+        if self.backend is None:
+            self.backend = PollingBackend(self.custom_script_root)
+
+    def run(self):
+        logger.info(f"Watching {self.custom_script_root} for script changes using {self.backend.__class__.__name__}")
+
+        try:
+            while True:
+                changed = self.backend.read(plugin_config.get("SCRIPT_WATCHER_INTERVAL"))
+                if changed:
+                    self.handle_changes(changed)
+        finally:
+            self.backend.close()
+
+    def handle_changes(self, paths):
+        module_names = sorted({get_module_name(path, self.custom_script_root) for path in paths})
+        logger.info(f"Script modules changed: {', '.join(module_names)}")
+
+        # The manifest module imports the models, which can't be imported when this module is
+        from .manifest import refresh_manifests
+
+        util.invalidate_modules(module_names)
+
+        close_old_connections()
+        refresh_manifests(module_names)
+
+        publish_invalidation(module_names)
+
+
+def publish_invalidation(module_names):
+    """
+    Tell the script workers subscribed to the invalidation channel to drop the given modules.
+    """
+    try:
+        util.get_redis_connection().publish(INVALIDATION_CHANNEL, json.dumps(module_names))
+    except RedisError as e:
+        logger.warning(f"Failed to publish invalidation of script modules {module_names}: {e}")
+
+
+class InvalidationSubscriber(threading.Thread):
+    """
+    Drops the modules published on the invalidation channel from the module cache of the current process. Messages
+    published while the connection to redis is lost are missed, so all script modules are dropped after reconnecting.
+    """
+
+    def __init__(self):
+        super().__init__(name="netbox-script-manager-invalidation", daemon=True)
+
+    def run(self):
+        reconnecting = False
+
+        while True:
+            try:
+                pubsub = util.get_redis_connection().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+
+                if reconnecting:
+                    util.invalidate_modules([util.CUSTOM_SCRIPT_SUBPACKAGE])
+
+                for message in pubsub.listen():
+                    invalidated = util.invalidate_modules(json.loads(message["data"]))
+                    logger.info(f"Invalidated script modules: {', '.join(sorted(invalidated)) or 'none imported'}")
+            except RedisError as e:
+                logger.warning(f"Lost the script invalidation channel, subscribing again: {e}")
+                reconnecting = True
+                time.sleep(RECONNECT_DELAY)
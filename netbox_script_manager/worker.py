@@ -0,0 +1,140 @@
+import logging
+
+from django.conf import settings
+from django.db import connections
+from rq.worker import Worker
+
+from . import bundles, logbuffer, util, watcher
+from .concurrency import reclaim_fair_share_slots
+from .scripts import get_source_snapshot_id, reap_stale_executions
+from .models import ScriptExecution, ScriptInstance
+
+logger = logging.getLogger("netbox.plugins.netbox_script_manager")
+
+plugin_config = settings.PLUGINS_CONFIG.get("netbox_script_manager")
+
+REAPER_LOCK = "netbox_script_manager:reaper"
+
+
+def preload_script(module_path, class_name, snapshot=False):
+    """
+    Import a script class into the script class cache. With `snapshot`, the source snapshot of the script is looked up
+    as well, so the work horses inherit it and only look up the snapshot again if the file changed.
+    """
+    try:
+        script_class = util.get_script_class(module_path, class_name)
+        if snapshot and script_class is not None:
+            get_source_snapshot_id(script_class)
+    except Exception as e:
+        logger.warning(f"Failed to preload script {module_path}.{class_name}: {e}")
+
+
+def preload_scripts():
+    """
+    Import the script classes of all script instances into the script class cache.
+    """
+    for module_path, class_name in ScriptInstance.objects.values_list("module_path", "class_name"):
+        preload_script(module_path, class_name)
+
+
+def activate_bundle(bundle_id):
+    try:
+        bundles.activate_bundle(bundle_id)
+    except Exception as e:
+        # The job activates the bundle again and fails the execution if it's still not available
+        logger.error(f"Failed to activate script bundle {bundle_id}: {e}")
+
+
+class ScriptWorker(Worker):
+    """
+    An RQ worker which keeps the scripts imported in the worker process. Jobs are still run in forked work horses, but
+    the work horses inherit the imported script classes instead of importing the scripts for every job. The scripts
+    are imported again when the code version changes, or with SCRIPT_WATCHER enabled, when the script watcher reports
+    their module changed. As part of the RQ maintenance tasks, the worker also terminates script executions left
+    running by dead workers. With SCRIPT_BUNDLES enabled, the scripts are imported from the bundle the execution of
+    the job is pinned to.
+
+    Usage: `manage.py rqworker --worker-class netbox_script_manager.worker.ScriptWorker`
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # The code version is checked once per job by the worker, or with the script watcher, only the changed
+        # modules are imported again
+        util.enable_script_class_cache(check_version=False)
+        if plugin_config.get("SCRIPT_WATCHER"):
+            watcher.InvalidationSubscriber().start()
+
+        # Code version and script root of the last preload of all scripts
+        self.preload_key = None
+
+        if bundles.is_enabled():
+            activate_bundle(bundles.get_current_bundle_id())
+        self.preload()
+
+        # Write the log lines buffered by workers which died before flushing them
+        if logbuffer.is_enabled():
+            recovered = logbuffer.recover_log_buffers()
+            if recovered:
+                logger.info(f"Recovered {recovered} log buffers")
+
+        connections.close_all()
+
+    def run_maintenance_tasks(self):
+        super().run_maintenance_tasks()
+
+        # Only one worker per maintenance interval needs to look for executions of dead workers. The lock is left to
+        # expire instead of being released, so the other workers skip this round.
+        lock = util.get_redis_connection().lock(REAPER_LOCK, timeout=int(self.maintenance_interval))
+        if not lock.acquire(blocking=False):
+            return
+
+        try:
+            reaped = reap_stale_executions()
+            if reaped:
+                logger.warning(f"Reaped {len(reaped)} script executions of dead workers")
+
+            reclaimed = reclaim_fair_share_slots()
+            if reclaimed:
+                logger.warning(f"Reclaimed {reclaimed} fair share slots of jobs no longer queued")
+        except Exception as e:
+            logger.error(f"Failed to reap stale script executions: {e}")
+        finally:
+            connections.close_all()
+
+    def preload(self):
+        """
+        Import all scripts if the code version or the script root changed since the last preload. The code version is
+        computed once per call, by walking the script root unless the script watcher reports changes instead.
+        """
+        if plugin_config.get("SCRIPT_WATCHER"):
+            code_version = util.script_class_cache_version
+        else:
+            code_version = util.refresh_script_class_cache()
+
+        preload_key = (code_version, util.get_active_script_root())
+        if preload_key != self.preload_key:
+            preload_scripts()
+            self.preload_key = preload_key
+
+    def execute_job(self, job, queue):
+        script_execution = (
+            ScriptExecution.objects.filter(pk=job.kwargs.get("script_execution_id"))
+            .values("bundle_id", "script_instance__module_path", "script_instance__class_name")
+            .first()
+        )
+
+        if script_execution and bundles.is_enabled():
+            activate_bundle(script_execution["bundle_id"])
+
+        # Import changed scripts before forking, so the work horse starts with the script of the job imported. Modules
+        # dropped by the script watcher are only imported again for the scripts which are run.
+        self.preload()
+        if script_execution:
+            preload_script(script_execution["script_instance__module_path"], script_execution["script_instance__class_name"], snapshot=True)
+
+        # Database connections must not be shared with the work horse
+        connections.close_all()
+
+        return super().execute_job(job, queue)
@@ -1,3 +1,1543 @@
 #!/usr/bin/env python
 
 """Tests for `netbox_script_manager` package."""
+
+import csv
+import errno
+import inspect
+import gzip
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from datetime import timedelta
+from unittest import mock
+
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from extras.models import Tag
+from extras.scripts import FileVar, IntegerVar, StringVar
+from users.models import User
+from utilities.testing import APITestCase, TestCase
+
+import django_rq
+from rq import Queue
+from rq.job import Dependency, JobStatus
+
+from netbox_script_manager import (
+    bundles,
+    concurrency,
+    export,
+    heartbeat,
+    limits,
+    logbuffer,
+    manifest,
+    notifications,
+    pipelines,
+    spool,
+    util,
+    watcher,
+    worker,
+)
+from netbox_script_manager.loglimits import LogLimiter
+from netbox_script_manager.choices import ConcurrencyPolicyChoices, ScriptExecutionStatusChoices, TransactionModeChoices
+from netbox_script_manager.concurrency import Semaphore
+from netbox_script_manager.models import (
+    ScriptArtifact,
+    ScriptBundle,
+    ScriptExecution,
+    ScriptInstance,
+    ScriptLogLine,
+    ScriptPipeline,
+    ScriptSource,
+    ScriptStatistic,
+)
+from netbox_script_manager.scripts import (
+    AUTO_TASK_QUEUE,
+    CustomScript,
+    TaskQueueSelector,
+    enqueue_script_execution,
+    reap_stale_executions,
+    resolve_task_queue,
+    run_pipeline,
+    run_script,
+)
+
+
+class EchoScript(CustomScript):
+    def run(self, data, commit):
+        return data.get("message")
+
+
+class FailingScript(CustomScript):
+    def run(self, data, commit):
+        raise ValueError("Script failed")
+
+
+class UploadScript(CustomScript):
+    upload = FileVar()
+
+    def run(self, data, commit):
+        return data["upload"].read().decode()
+
+
+class ShardedScript(CustomScript):
+    def get_shards(self, data, commit):
+        return [1, 2]
+
+    def run(self, data, commit):
+        return f"Shard {self.shard}"
+
+
+class VariableScript(CustomScript):
+    hostname = StringVar(max_length=5)
+    count = IntegerVar(min_value=1, required=False)
+
+    def run(self, data, commit):
+        return data["hostname"]
+
+
+class VerboseScript(CustomScript):
+    class Meta:
+        log_max_message_length = 10
+
+    def run(self, data, commit):
+        self.log_info("A message longer than the limit")
+
+
+class ChunkedScript(CustomScript):
+    class Meta:
+        transaction_mode = TransactionModeChoices.MODE_CHUNKED
+
+    def run(self, data, commit):
+        Tag.objects.create(name="Committed", slug="committed")
+        self.checkpoint()
+        Tag.objects.create(name="Reverted", slug="reverted")
+        raise ValueError("Script failed")
+
+
+# Number of rows the query count of lists is compared at, which is the largest page size
+QUERY_COUNT_ROWS = 1000
+
+
+class QueryCountMixin:
+    """
+    Asserts that list views run the same number of queries regardless of the number of rows returned.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.script_instance = ScriptInstance.objects.create(name="Test Script", module_path="customscripts.test", class_name="TestScript")
+
+    def create_executions(self, count, **kwargs):
+        executions = ScriptExecution.objects.bulk_create(
+            ScriptExecution(script_instance=self.script_instance, task_id=uuid.uuid4(), request_id=uuid.uuid4(), user=self.user, **kwargs)
+            for _ in range(count)
+        )
+
+        ScriptArtifact.objects.bulk_create(
+            ScriptArtifact(script_execution=script_execution, name="artifact.txt", content_type="text/plain", data=b"data")
+            for script_execution in executions
+        )
+        ScriptLogLine.objects.bulk_create(
+            ScriptLogLine(script_execution=script_execution, level="info", message="Test") for script_execution in executions
+        )
+
+        return executions
+
+    def create_script_instances(self, count):
+        script_instances = ScriptInstance.objects.bulk_create(
+            ScriptInstance(name=f"Script {i}", module_path="customscripts.test", class_name=f"TestScript{uuid.uuid4().hex}")
+            for i in range(count)
+        )
+
+        ScriptExecution.objects.bulk_create(
+            ScriptExecution(script_instance=script_instance, task_id=uuid.uuid4(), request_id=uuid.uuid4(), user=self.user)
+            for script_instance in script_instances
+        )
+
+        return script_instances
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, **getattr(self, "header", {}))
+
+        self.assertEqual(response.status_code, 200)
+
+        return len(queries)
+
+    def assertConstantQueries(self, url, create_rows):
+        create_rows(1)
+        single = self.count_queries(url)
+
+        create_rows(QUERY_COUNT_ROWS - 1)
+        many = self.count_queries(url)
+
+        self.assertEqual(single, many, f"{url} ran {single} queries for 1 row and {many} queries for {QUERY_COUNT_ROWS} rows")
+
+
+class ScriptRunMixin:
+    """
+    Runs script executions in the test process instead of a worker. The script instance runs `script_class`, and log
+    lines are collected in `log_lines`, as the script_log connection can't see the rows created by the test. Enqueued
+    jobs are recorded by the `enqueue` mock.
+    """
+
+    script_class = EchoScript
+
+    def setUp(self):
+        super().setUp()
+
+        self.script_instance = ScriptInstance.objects.create(
+            name="Test Script", module_path="customscripts.test", class_name=self.script_class.__name__
+        )
+        self.log_lines = []
+
+        patchers = (
+            mock.patch.object(ScriptInstance, "script", new_callable=mock.PropertyMock, side_effect=lambda: self.script_class()),
+            mock.patch.object(CustomScript, "_write_log_line", lambda script, level, message: self.log_lines.append((level, message))),
+        )
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        enqueue_patcher = mock.patch("netbox_script_manager.scripts.enqueue_script_execution")
+        self.enqueue = enqueue_patcher.start()
+        self.addCleanup(enqueue_patcher.stop)
+
+    def create_execution(self, script_input=None, commit=False, **kwargs):
+        return ScriptExecution.objects.create(
+            script_instance=self.script_instance,
+            task_id=uuid.uuid4(),
+            request_id=uuid.uuid4(),
+            user=self.user,
+            commit=commit,
+            data={"input": script_input or {}, "input_type": util.INPUT_TYPE_API},
+            **kwargs,
+        )
+
+    def run_execution(self, script_execution):
+        run_script(script_execution_id=script_execution.pk)
+        script_execution.refresh_from_db()
+
+        return script_execution
+
+
+@override_settings(EXEMPT_VIEW_PERMISSIONS=["*"])
+class APIQueryCountTestCase(QueryCountMixin, APITestCase):
+    def test_script_instance_list(self):
+        url = reverse("plugins-api:netbox_script_manager-api:scriptinstance-list") + "?limit=1000"
+        self.assertConstantQueries(url, self.create_script_instances)
+
+    def test_script_instance_list_defers_manifest(self):
+        url = reverse("plugins-api:netbox_script_manager-api:scriptinstance-list")
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, **self.header)
+
+        self.assertFalse(any('."manifest"' in query["sql"] for query in queries.captured_queries))
+
+    def test_script_execution_list(self):
+        url = reverse("plugins-api:netbox_script_manager-api:scriptexecution-list") + "?limit=1000"
+        self.assertConstantQueries(url, self.create_executions)
+
+    def test_script_execution_list_with_parents(self):
+        parent = self.create_executions(1)[0]
+        url = reverse("plugins-api:netbox_script_manager-api:scriptexecution-list") + "?limit=1000"
+        self.assertConstantQueries(url, lambda count: self.create_executions(count, parent=parent))
+
+    def test_script_artifact_list(self):
+        url = reverse("plugins-api:netbox_script_manager-api:scriptartifact-list") + "?limit=1000"
+        self.assertConstantQueries(url, self.create_executions)
+
+    def test_script_log_line_list(self):
+        url = reverse("plugins-api:netbox_script_manager-api:scriptlogline-list") + "?limit=1000"
+        self.assertConstantQueries(url, self.create_executions)
+
+
+@override_settings(EXEMPT_VIEW_PERMISSIONS=["*"])
+class ViewQueryCountTestCase(QueryCountMixin, TestCase):
+    def test_script_instance_list(self):
+        url = reverse("plugins:netbox_script_manager:scriptinstance_list") + "?per_page=1000"
+        self.assertConstantQueries(url, self.create_script_instances)
+
+    def test_script_execution_list(self):
+        url = reverse("plugins:netbox_script_manager:scriptexecution_list") + "?per_page=1000"
+        self.assertConstantQueries(url, self.create_executions)
+
+    def test_script_instance_execution_list(self):
+        url = reverse("plugins:netbox_script_manager:scriptinstance_execution", kwargs={"pk": self.script_instance.pk}) + "?per_page=1000"
+        self.assertConstantQueries(url, self.create_executions)
+
+    def test_script_artifact_list(self):
+        url = reverse("plugins:netbox_script_manager:scriptartifact_list") + "?per_page=1000"
+        self.assertConstantQueries(url, self.create_executions)
+
+
+class ScriptStatisticTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.script_instance = ScriptInstance.objects.create(name="Test Script", module_path="customscripts.test", class_name="TestScript")
+
+    def run_execution(self, duration, queue_wait, status="completed"):
+        created = timezone.now() - timedelta(seconds=duration + queue_wait)
+        execution = ScriptExecution.objects.create(
+            script_instance=self.script_instance, task_id=uuid.uuid4(), request_id=uuid.uuid4(), user=self.user
+        )
+        ScriptExecution.objects.filter(pk=execution.pk).update(created=created)
+        execution.refresh_from_db()
+        execution.started = created + timedelta(seconds=queue_wait)
+        execution.save()
+        execution.terminate(status)
+        return execution
+
+    def test_statistics_updated_on_terminate(self):
+        self.run_execution(duration=1, queue_wait=2)
+        self.run_execution(duration=3, queue_wait=0, status="failed")
+
+        statistic = ScriptStatistic.objects.get(script_instance=self.script_instance)
+        self.assertEqual(statistic.status_counts, {"completed": 1, "failed": 1})
+        self.assertEqual(statistic.runs, 2)
+        self.assertEqual(statistic.duration_count, 2)
+        self.assertAlmostEqual(statistic.duration_min, 1, places=0)
+        self.assertAlmostEqual(statistic.duration_max, 3, places=0)
+        self.assertAlmostEqual(statistic.duration_avg, 2, places=0)
+        self.assertAlmostEqual(statistic.queue_wait_max, 2, places=0)
+        self.assertLessEqual(statistic.duration_p95, statistic.duration_max)
+
+    def test_combine(self):
+        self.run_execution(duration=1, queue_wait=0)
+        statistic = ScriptStatistic.objects.get(script_instance=self.script_instance)
+
+        combined = ScriptStatistic.combine([statistic, statistic])
+        self.assertEqual(combined.runs, 2)
+        self.assertEqual(combined.duration_count, 2)
+        self.assertEqual(combined.duration_max, statistic.duration_max)
+
+    def test_statistics_empty_state(self):
+        self.add_permissions("netbox_script_manager.view_scriptinstance", "netbox_script_manager.view_scriptstatistic")
+        url = reverse("plugins:netbox_script_manager:scriptinstance", kwargs={"pk": self.script_instance.pk})
+
+        response = self.client.get(url)
+        self.assertContains(response, "No executions in the last 7 days")
+
+        self.run_execution(duration=1, queue_wait=0)
+        response = self.client.get(url)
+        self.assertNotContains(response, "No executions in the last 7 days")
+        self.assertContains(response, "Queue Wait")
+
+
+class CallbackURLTestCase(SimpleTestCase):
+    def test_public_address_allowed(self):
+        notifications.validate_callback_url("https://8.8.8.8/callback")
+
+    def test_internal_addresses_rejected(self):
+        urls = (
+            "http://127.0.0.1:6379/",
+            "http://169.254.169.254/latest/meta-data/",
+            "http://10.0.0.1/",
+            "http://[::1]/",
+            "file:///etc/passwd",
+        )
+
+        for url in urls:
+            with self.subTest(url=url), self.assertRaises(ValueError):
+                notifications.validate_callback_url(url)
+
+    def test_allowed_hosts(self):
+        with mock.patch.dict(notifications.plugin_config, {"CALLBACK_ALLOWED_HOSTS": [".example.com"]}):
+            notifications.validate_callback_url("https://hooks.example.com/callback")
+
+            with self.assertRaises(ValueError):
+                notifications.validate_callback_url("https://8.8.8.8/callback")
+
+
+class ScriptBundleTestCase(TestCase):
+    def setUp(self):
+        self.script_root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.script_root, "customscripts", "package"))
+        self.write_script("package/test.py", "class TestScript:\n    pass\n")
+
+        plugin_config = {"SCRIPT_ROOT": self.script_root, "SCRIPT_BUNDLES": True, "BUNDLE_CACHE_ROOT": tempfile.mkdtemp()}
+        patcher = mock.patch.dict(util.plugin_config, plugin_config)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.script_instance = ScriptInstance.objects.create(
+            name="Test Script", module_path="customscripts.package.test", class_name="TestScript"
+        )
+
+    def write_script(self, path, content):
+        with open(os.path.join(self.script_root, "customscripts", path), "w") as f:
+            f.write(content)
+
+    def test_publish_is_content_addressed(self):
+        bundle = bundles.publish_bundle()
+        self.assertEqual(bundles.publish_bundle().pk, bundle.pk)
+
+        self.write_script("package/test.py", "class TestScript:\n    version = 2\n")
+        changed_bundle = bundles.publish_bundle()
+        self.assertNotEqual(changed_bundle.hash, bundle.hash)
+        self.assertEqual(ScriptBundle.objects.count(), 2)
+        self.assertEqual(bundles.get_current_bundle_id(), changed_bundle.pk)
+
+    def test_execution_pinned_to_current_bundle(self):
+        bundle = bundles.publish_bundle()
+        execution = ScriptExecution.objects.create(
+            script_instance=self.script_instance, task_id=uuid.uuid4(), request_id=uuid.uuid4(), user=self.user
+        )
+        self.assertEqual(execution.bundle_id, bundle.pk)
+
+    def test_bundle_extracted_to_cache(self):
+        bundle = bundles.publish_bundle()
+        bundle_root = bundles.get_bundle_root(bundle.pk)
+
+        with open(os.path.join(bundle_root, "customscripts", "package", "test.py")) as f:
+            self.assertEqual(f.read(), "class TestScript:\n    pass\n")
+        self.assertEqual(bundles.get_bundle_root(bundle.pk), bundle_root)
+
+
+class ScriptSourceTestCase(TestCase):
+    def test_snapshot_deduplicated(self):
+        snapshot = ScriptSource.snapshot("class TestScript:\n    pass\n", filename="customscripts/test.py")
+
+        self.assertEqual(ScriptSource.snapshot("class TestScript:\n    pass\n", filename="customscripts/test.py").pk, snapshot.pk)
+        self.assertNotEqual(ScriptSource.snapshot("class TestScript:\n    version = 2\n", filename="customscripts/test.py").pk, snapshot.pk)
+        self.assertEqual(ScriptSource.objects.count(), 2)
+
+
+class ScriptWatcherTestCase(SimpleTestCase):
+    def setUp(self):
+        self.custom_script_root = os.path.join(tempfile.mkdtemp(), "customscripts")
+        os.makedirs(os.path.join(self.custom_script_root, "package"))
+        self.write_script("package/__init__.py", "")
+        self.write_script("package/test.py", "")
+        self.write_script("other.py", "")
+
+    def write_script(self, path, content):
+        with open(os.path.join(self.custom_script_root, path), "w") as f:
+            f.write(content)
+
+    def test_get_module_name(self):
+        root = self.custom_script_root
+
+        self.assertEqual(watcher.get_module_name(os.path.join(root, "package", "test.py"), root), "customscripts.package.test")
+        self.assertEqual(watcher.get_module_name(os.path.join(root, "package", "__init__.py"), root), "customscripts.package")
+        self.assertEqual(watcher.get_module_name(root, root), "customscripts")
+
+    def test_polling_backend_finds_changed_files(self):
+        backend = watcher.PollingBackend(self.custom_script_root)
+        self.write_script("package/test.py", "class TestScript:\n    pass\n")
+
+        self.assertEqual(backend.read(0), {os.path.join(self.custom_script_root, "package", "test.py")})
+        self.assertEqual(backend.read(0), set())
+
+
+WORKER_SCRIPT = """from netbox_script_manager.scripts import CustomScript
+
+
+class WorkerScript(CustomScript):
+    pass
+"""
+
+
+class ScriptWorkerTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.script_root = self.create_script_root()
+        self.script_instance = ScriptInstance.objects.create(
+            name="Worker Script", module_path="customscripts.worker_script", class_name="WorkerScript"
+        )
+
+        # The worker changes the script class cache of the process, and must not close the connection of the test
+        patchers = (
+            mock.patch.object(util, "script_class_cache", {}),
+            mock.patch.object(util, "script_class_cache_version", None),
+            mock.patch.object(util, "script_class_cache_enabled", False),
+            mock.patch.object(util, "script_class_cache_check_version", True),
+            mock.patch.object(worker, "connections"),
+        )
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        util.set_active_script_root(self.script_root)
+        self.addCleanup(util.set_active_script_root, None)
+
+        queue = django_rq.get_queue("default")
+        self.worker = worker.ScriptWorker([queue], connection=queue.connection)
+
+    def create_script_root(self):
+        script_root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(script_root, "customscripts"))
+
+        for filename, content in (("__init__.py", ""), ("worker_script.py", WORKER_SCRIPT)):
+            with open(os.path.join(script_root, "customscripts", filename), "w") as f:
+                f.write(content)
+
+        return script_root
+
+    def get_script_class(self):
+        return util.get_script_class(self.script_instance.module_path, self.script_instance.class_name)
+
+    def test_preloaded_class_reused(self):
+        script_class = util.script_class_cache[(self.script_instance.module_path, self.script_instance.class_name)]
+
+        self.worker.preload()
+
+        self.assertIs(self.get_script_class(), script_class)
+
+    def test_reloaded_after_module_change(self):
+        script_class = self.get_script_class()
+
+        with open(os.path.join(self.script_root, "customscripts", "worker_script.py"), "a") as f:
+            f.write("\n# Changed\n")
+        self.worker.preload()
+
+        self.assertIsNot(self.get_script_class(), script_class)
+
+    def test_reloaded_after_bundle_activated(self):
+        script_class = self.get_script_class()
+        bundle_root = self.create_script_root()
+
+        with mock.patch("netbox_script_manager.bundles.get_bundle_root", return_value=bundle_root):
+            worker.activate_bundle(1)
+        self.worker.preload()
+
+        reloaded_class = self.get_script_class()
+        self.assertIsNot(reloaded_class, script_class)
+        self.assertTrue(inspect.getfile(reloaded_class).startswith(bundle_root))
+
+
+class SemaphoreTestCase(SimpleTestCase):
+    def setUp(self):
+        self.semaphore = Semaphore(f"test:{uuid.uuid4().hex}", 2)
+        self.addCleanup(self.semaphore.connection.delete, self.semaphore.key)
+
+    def test_acquire_up_to_limit(self):
+        self.assertTrue(self.semaphore.acquire("a"))
+        self.assertTrue(self.semaphore.acquire("b"))
+        self.assertFalse(self.semaphore.acquire("c"))
+
+        # A holder acquiring again keeps its slot
+        self.assertTrue(self.semaphore.acquire("a"))
+
+        self.semaphore.release("a")
+        self.assertTrue(self.semaphore.acquire("c"))
+        self.assertEqual(sorted(self.semaphore.holders()), ["b", "c"])
+
+    def test_expired_holder_reclaimed(self):
+        self.assertTrue(self.semaphore.acquire("a", lease=60))
+        self.assertTrue(self.semaphore.acquire("b", lease=600))
+
+        # The holder "a" crashed without releasing its slot
+        with mock.patch("netbox_script_manager.concurrency.time.time", return_value=time.time() + 120):
+            self.assertTrue(self.semaphore.acquire("c"))
+            self.assertEqual(sorted(self.semaphore.holders()), ["b", "c"])
+
+
+class ConcurrencyLimitTestCase(ScriptRunMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.semaphore = Semaphore(f"script:{self.script_instance.pk}", 1)
+        self.semaphore.connection.delete(self.semaphore.key)
+        self.addCleanup(self.semaphore.connection.delete, self.semaphore.key)
+
+    def limit_concurrency(self, policy):
+        ScriptInstance.objects.filter(pk=self.script_instance.pk).update(max_concurrency=1, concurrency_policy=policy)
+
+        # Another execution holds the only slot
+        self.semaphore.acquire("other")
+
+    def test_rejected_over_limit(self):
+        self.limit_concurrency(ConcurrencyPolicyChoices.POLICY_REJECT)
+
+        script_execution = self.run_execution(self.create_execution())
+
+        self.assertEqual(script_execution.status, ScriptExecutionStatusChoices.STATUS_REJECTED)
+        self.enqueue.assert_not_called()
+
+    def test_queued_over_limit(self):
+        self.limit_concurrency(ConcurrencyPolicyChoices.POLICY_QUEUE)
+
+        script_execution = self.run_execution(self.create_execution())
+
+        self.assertEqual(script_execution.status, ScriptExecutionStatusChoices.STATUS_WAITING)
+        self.assertIsNone(script_execution.started)
+        self.assertIsNotNone(self.enqueue.call_args.kwargs["enqueue_at"])
+
+    def test_slot_released_on_failure(self):
+        ScriptInstance.objects.filter(pk=self.script_instance.pk).update(max_concurrency=1)
+        self.script_class = FailingScript
+
+        script_execution = self.run_execution(self.create_execution())
+
+        self.assertEqual(script_execution.status, ScriptExecutionStatusChoices.STATUS_ERRORED)
+        self.assertEqual(self.semaphore.holders(), [])
+
+
+class FairShareTestCase(SimpleTestCase):
+    def setUp(self):
+        self.queue = Queue(f"test-{uuid.uuid4().hex}", connection=util.get_redis_connection())
+        self.jobs = []
+        self.addCleanup(self.cleanup)
+
+        patchers = (
+            mock.patch.dict(concurrency.plugin_config, {"FAIR_SHARE_QUEUED_JOBS": 1}),
+            mock.patch("netbox_script_manager.concurrency.django_rq.get_queue", return_value=self.queue),
+        )
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def cleanup(self):
+        for job in self.jobs:
+            job.delete()
+        for key in self.queue.connection.scan_iter(match=f"{concurrency.FAIR_SHARE_KEY_PREFIX}:{self.queue.name}:*"):
+            self.queue.connection.delete(key)
+
+    def enqueue(self, owner, count):
+        jobs = [self.queue.create_job(run_script, job_id=f"{owner}-{i}", status=JobStatus.DEFERRED) for i in range(count)]
+        self.jobs.extend(jobs)
+        concurrency.fair_share_enqueue(self.queue, owner, jobs)
+
+    def start_job(self, job_id):
+        """
+        Take a job from the queue like a worker does when starting it.
+        """
+        job = self.queue.fetch_job(job_id)
+        self.queue.remove(job)
+        concurrency.fair_share_release(job)
+
+    def test_owners_interleaved(self):
+        self.enqueue("a", 3)
+        self.enqueue("b", 2)
+
+        self.assertEqual(self.queue.job_ids, ["a-0", "b-0"])
+
+        self.start_job("a-0")
+        self.assertEqual(self.queue.job_ids, ["b-0", "a-1"])
+
+        self.start_job("b-0")
+        self.start_job("a-1")
+        self.assertEqual(self.queue.job_ids, ["b-1", "a-2"])
+
+    def test_canceled_jobs_skipped(self):
+        self.enqueue("a", 3)
+        self.queue.fetch_job("a-1").cancel()
+
+        self.start_job("a-0")
+        self.assertEqual(self.queue.job_ids, ["a-2"])
+
+    def test_usage(self):
+        self.enqueue("a", 3)
+
+        usage = [owner for owner in concurrency.get_fair_share_usage() if owner["queue"] == self.queue.name]
+        self.assertEqual(usage, [{"queue": self.queue.name, "owner": "a", "queued": 1, "backlog": 2}])
+
+
+class FanOutTestCase(ScriptRunMixin, TestCase):
+    script_class = ShardedScript
+
+    def fan_out(self):
+        parent = self.run_execution(self.create_execution())
+        children = list(parent.children.order_by("pk"))
+
+        self.assertEqual(parent.status, ScriptExecutionStatusChoices.STATUS_RUNNING)
+        self.assertEqual(parent.data["shard_count"], 2)
+        self.assertEqual([child.data["shard"] for child in children], [1, 2])
+        self.assertEqual(self.enqueue.call_count, 2)
+
+        return parent, children
+
+    def test_parent_completed_by_last_child(self):
+        parent, children = self.fan_out()
+
+        self.run_execution(children[0])
+        parent.refresh_from_db()
+        self.assertEqual(parent.status, ScriptExecutionStatusChoices.STATUS_RUNNING)
+
+        self.run_execution(children[1])
+        parent.refresh_from_db()
+        self.assertEqual(parent.status, ScriptExecutionStatusChoices.STATUS_COMPLETED)
+        self.assertEqual(parent.data["output"], "Shard 1\nShard 2")
+
+    def test_deleted_child_counted_as_failed(self):
+        parent, children = self.fan_out()
+
+        self.run_execution(children[0])
+        children[1].delete()
+
+        parent.refresh_from_db()
+        self.assertEqual(parent.status, ScriptExecutionStatusChoices.STATUS_ERRORED)
+
+    def test_reaper_completes_orphaned_parent(self):
+        parent = self.create_execution(status=ScriptExecutionStatusChoices.STATUS_RUNNING, started=timezone.now())
+        parent.data["shard_count"] = 2
+        parent.save()
+
+        reap_stale_executions()
+
+        parent.refresh_from_db()
+        self.assertEqual(parent.status, ScriptExecutionStatusChoices.STATUS_ERRORED)
+
+
+class PipelineStepTestCase(SimpleTestCase):
+    def test_cycle_rejected(self):
+        steps = [{"name": "a", "script": 1, "depends_on": ["b"]}, {"name": "b", "script": 1, "depends_on": ["a"]}]
+
+        with self.assertRaisesMessage(ValidationError, "The steps contain a cycle"):
+            pipelines.validate_steps(steps)
+
+    def test_unknown_dependency_rejected(self):
+        with self.assertRaisesMessage(ValidationError, "Step a depends on the unknown step b."):
+            pipelines.validate_steps([{"name": "a", "script": 1, "depends_on": ["b"]}])
+
+    def test_inputs_from_outside_depends_on_rejected(self):
+        steps = [{"name": "a", "script": 1}, {"name": "b", "script": 1, "inputs_from": {"message": "a"}}]
+
+        with self.assertRaisesMessage(ValidationError, "which is not in depends_on"):
+            pipelines.validate_steps(steps)
+
+    def test_step_order(self):
+        steps = [
+            {"name": "report", "script": 1, "depends_on": ["reconcile", "cleanup"]},
+            {"name": "reconcile", "script": 1, "depends_on": ["sync"]},
+            {"name": "cleanup", "script": 1, "depends_on": ["sync"]},
+            {"name": "sync", "script": 1},
+        ]
+        pipelines.validate_steps(steps)
+
+        order = [step["name"] for step in pipelines.get_step_order(steps)]
+
+        self.assertEqual(order[0], "sync")
+        self.assertEqual(order[-1], "report")
+        self.assertEqual(sorted(order[1:3]), ["cleanup", "reconcile"])
+
+
+class PipelineRunMixin(ScriptRunMixin):
+    def run_pipeline(self):
+        pipeline = ScriptPipeline.objects.create(
+            name="Test Pipeline",
+            steps=[
+                {"name": "second", "script": self.script_instance.pk, "depends_on": ["first"], "inputs_from": {"message": "first"}},
+                {"name": "first", "script": self.script_instance.pk, "input": {"message": "Hello"}},
+            ],
+        )
+
+        request = RequestFactory().post("/")
+        request.user = self.user
+        request.id = uuid.uuid4()
+
+        pipeline_run = run_pipeline(pipeline, request, commit=False)
+        script_executions = {
+            script_execution.data["pipeline_step"]: script_execution for script_execution in pipeline_run.script_executions.all()
+        }
+
+        return script_executions["first"], script_executions["second"]
+
+
+class PipelineRunTestCase(PipelineRunMixin, TestCase):
+    def test_jobs_depend_on_upstream_jobs(self):
+        first, second = self.run_pipeline()
+
+        self.assertEqual([call.args[0] for call in self.enqueue.call_args_list], [first, second])
+        self.assertIsNone(self.enqueue.call_args_list[0].kwargs["depends_on"])
+
+        dependency = self.enqueue.call_args_list[1].kwargs["depends_on"]
+        self.assertIsInstance(dependency, Dependency)
+        self.assertEqual(dependency.dependencies, [str(first.task_id)])
+        self.assertTrue(dependency.allow_failure)
+
+    def test_upstream_output_passed_to_input(self):
+        first, second = self.run_pipeline()
+
+        self.assertEqual(self.run_execution(first).data["output"], "Hello")
+
+        second = self.run_execution(second)
+        self.assertEqual(second.status, ScriptExecutionStatusChoices.STATUS_COMPLETED)
+        self.assertEqual(second.data["input"]["message"], "Hello")
+        self.assertEqual(second.data["output"], "Hello")
+
+
+class FailingPipelineRunTestCase(PipelineRunMixin, TestCase):
+    script_class = FailingScript
+
+    def test_step_skipped_when_upstream_failed(self):
+        first, second = self.run_pipeline()
+
+        self.assertEqual(self.run_execution(first).status, ScriptExecutionStatusChoices.STATUS_ERRORED)
+        self.assertEqual(self.run_execution(second).status, ScriptExecutionStatusChoices.STATUS_SKIPPED)
+
+
+@override_settings(EXEMPT_VIEW_PERMISSIONS=["*"])
+class WaitTestCase(APITestCase):
+    def setUp(self):
+        super().setUp()
+
+        script_instance = ScriptInstance.objects.create(name="Test Script", module_path="customscripts.test", class_name="TestScript")
+        self.script_execution = ScriptExecution.objects.create(
+            script_instance=script_instance, task_id=uuid.uuid4(), request_id=uuid.uuid4(), user=self.user
+        )
+        self.url = reverse("plugins-api:netbox_script_manager-api:scriptexecution-wait", kwargs={"pk": self.script_execution.pk})
+
+    def test_terminal_execution_returned_immediately(self):
+        self.script_execution.status = ScriptExecutionStatusChoices.STATUS_COMPLETED
+        self.script_execution.save()
+
+        with mock.patch("netbox_script_manager.api.views.wait_for_status_change") as wait_for_status_change:
+            response = self.client.get(self.url, **self.header)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["status"], ScriptExecutionStatusChoices.STATUS_COMPLETED)
+        wait_for_status_change.assert_not_called()
+
+    def test_timeout_clamped(self):
+        with mock.patch("netbox_script_manager.api.views.wait_for_status_change") as wait_for_status_change:
+            with mock.patch.dict(notifications.plugin_config, {"MAX_WAIT_TIMEOUT": 5}):
+                response = self.client.get(f"{self.url}?timeout=600", **self.header)
+
+        self.assertEqual(response.status_code, 200)
+        wait_for_status_change.assert_called_once_with(self.script_execution, ScriptExecutionStatusChoices.STATUS_PENDING, 5)
+
+    def test_status_published(self):
+        pubsub = util.get_redis_connection().pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(notifications.get_channel(self.script_execution.pk))
+        self.addCleanup(pubsub.close)
+
+        self.script_execution.status = ScriptExecutionStatusChoices.STATUS_RUNNING
+
+        # Published once the transaction is committed
+        with self.captureOnCommitCallbacks(execute=True):
+            notifications.publish_status(self.script_execution)
+
+        message = pubsub.get_message(timeout=5)
+        self.assertEqual(message["data"], ScriptExecutionStatusChoices.STATUS_RUNNING.encode())
+
+    def test_wait_returns_on_published_change(self):
+        # The status is changed by the worker, so it's read as pending first and as running after the change is published
+        statuses = [ScriptExecutionStatusChoices.STATUS_PENDING, ScriptExecutionStatusChoices.STATUS_RUNNING]
+
+        def refresh_from_db(script_execution):
+            script_execution.status = statuses.pop(0)
+
+        channel = notifications.get_channel(self.script_execution.pk)
+        publisher = threading.Timer(0.5, util.get_redis_connection().publish, args=(channel, ScriptExecutionStatusChoices.STATUS_RUNNING))
+
+        with mock.patch.object(ScriptExecution, "refresh_from_db", autospec=True, side_effect=refresh_from_db):
+            publisher.start()
+            start = time.monotonic()
+            notifications.wait_for_status_change(self.script_execution, ScriptExecutionStatusChoices.STATUS_PENDING, 30)
+        publisher.join()
+
+        self.assertLess(time.monotonic() - start, 30)
+        self.assertEqual(self.script_execution.status, ScriptExecutionStatusChoices.STATUS_RUNNING)
+
+
+class RqStatusTestCase(APITestCase):
+    def setUp(self):
+        super().setUp()
+
+        script_instance = ScriptInstance.objects.create(name="Test Script", module_path="customscripts.test", class_name="TestScript")
+        self.other_user = User.objects.create_user(username="otheruser")
+
+        for user in (self.user, self.other_user):
+            ScriptExecution.objects.create(script_instance=script_instance, task_id=uuid.uuid4(), request_id=uuid.uuid4(), user=user)
+
+        self.url = reverse("plugins-api:netbox_script_manager-api:rq-status-list")
+
+    def get_quota_users(self):
+        response = self.client.get(self.url, **self.header)
+        self.assertEqual(response.status_code, 200)
+
+        return sorted(owner["name"] for owner in response.data["quotas"]["users"])
+
+    def test_usage_limited_to_own_user(self):
+        self.assertEqual(self.get_quota_users(), [self.user.username])
+
+    def test_superuser_sees_all_usage(self):
+        self.user.is_superuser = True
+        self.user.save()
+
+        self.assertEqual(self.get_quota_users(), sorted([self.user.username, self.other_user.username]))
+
+
+class ReaperTestCase(ScriptRunMixin, TestCase):
+    def create_running_execution(self):
+        script_execution = self.create_execution(
+            status=ScriptExecutionStatusChoices.STATUS_RUNNING,
+            started=timezone.now() - timedelta(hours=1),
+        )
+        self.addCleanup(heartbeat.remove_heartbeats, script_execution.pk)
+
+        return script_execution
+
+    def test_execution_without_heartbeat_reaped(self):
+        script_execution = self.create_running_execution()
+
+        self.assertEqual(reap_stale_executions(requeue=False), [script_execution])
+
+        script_execution.refresh_from_db()
+        self.assertEqual(script_execution.status, ScriptExecutionStatusChoices.STATUS_ERRORED)
+
+    def test_execution_with_heartbeat_kept(self):
+        script_execution = self.create_running_execution()
+        heartbeat.beat(script_execution.pk)
+
+        self.assertEqual(reap_stale_executions(requeue=False), [])
+
+        script_execution.refresh_from_db()
+        self.assertEqual(script_execution.status, ScriptExecutionStatusChoices.STATUS_RUNNING)
+
+
+@override_settings(EXEMPT_VIEW_PERMISSIONS=["*"])
+class BulkRunTestCase(ScriptRunMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.add_permissions("netbox_script_manager.run_scriptinstance")
+        self.url = reverse("plugins-api:netbox_script_manager-api:scriptinstance-bulk-run", kwargs={"pk": self.script_instance.pk})
+
+        # Jobs are enqueued through the recorded enqueue_script_execution() when fair share is disabled
+        patcher = mock.patch.dict(concurrency.plugin_config, {"FAIR_SHARE_QUEUED_JOBS": None})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_messages(self):
+        executions = ScriptExecution.objects.filter(script_instance=self.script_instance)
+        self.assertEqual(len({script_execution.request_id for script_execution in executions}), len(executions))
+
+        return sorted(script_execution.data["input"]["message"] for script_execution in executions)
+
+    def test_bulk_run(self):
+        inputs = [{"data": {"message": f"Message {i}"}, "commit": False} for i in range(3)]
+        response = self.client.post(self.url, inputs, format="json", **self.header)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 3)
+        self.assertEqual(self.get_messages(), ["Message 0", "Message 1", "Message 2"])
+        self.assertEqual(self.enqueue.call_count, 3)
+
+    def test_bulk_run_csv(self):
+        csv_file = SimpleUploadedFile("inputs.csv", b"message\nfirst\nsecond\n", content_type="text/csv")
+        response = self.client.post(self.url, {"csv": csv_file, "commit": "false"}, format="multipart", **self.header)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get_messages(), ["first", "second"])
+
+    def test_invalid_input_enqueues_nothing(self):
+        inputs = [{"data": {"message": "Valid"}, "commit": False}, {"data": {}}]
+        response = self.client.post(self.url, inputs, format="json", **self.header)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ScriptExecution.objects.exists())
+        self.enqueue.assert_not_called()
+
+
+class JobPayloadTestCase(ScriptRunMixin, TestCase):
+    def test_job_carries_only_execution_id(self):
+        script_execution = self.create_execution({"message": "Hello"})
+        queue = mock.Mock()
+
+        with mock.patch("netbox_script_manager.scripts.django_rq.get_queue", return_value=queue):
+            with mock.patch.dict(concurrency.plugin_config, {"FAIR_SHARE_QUEUED_JOBS": None}):
+                # Imported before ScriptRunMixin replaced it with a mock
+                enqueue_script_execution(script_execution)
+
+        queue.enqueue.assert_called_once_with(
+            run_script,
+            job_id=str(script_execution.task_id),
+            job_timeout=None,
+            pipeline=None,
+            script_execution_id=script_execution.pk,
+        )
+
+    def test_input_loaded_from_execution(self):
+        script_execution = self.run_execution(self.create_execution({"message": "Hello"}))
+
+        self.assertEqual(script_execution.status, ScriptExecutionStatusChoices.STATUS_COMPLETED)
+        self.assertEqual(script_execution.data["output"], "Hello")
+
+    def test_deleted_execution_skipped(self):
+        script_execution = self.create_execution()
+        script_execution_id = script_execution.pk
+        script_execution.delete()
+
+        self.assertIsNone(run_script(script_execution_id=script_execution_id))
+
+
+class SpoolTestCase(ScriptRunMixin, TestCase):
+    script_class = UploadScript
+
+    def setUp(self):
+        super().setUp()
+
+        patcher = mock.patch.dict(spool.plugin_config, {"SPOOL_ROOT": tempfile.mkdtemp()})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def spool_upload(self):
+        return spool.spool_files({"upload": SimpleUploadedFile("input.txt", b"Uploaded data", content_type="text/plain")})
+
+    def test_spooled_files_opened_as_uploads(self):
+        spooled = self.spool_upload()
+        files = spool.open_spooled_files(spooled["spool_id"], spooled["files"])
+
+        with files["upload"] as upload:
+            self.assertEqual(upload.name, "input.txt")
+            self.assertEqual(upload.content_type, "text/plain")
+            self.assertEqual(upload.read(), b"Uploaded data")
+
+    def test_spool_path_escape_rejected(self):
+        with self.assertRaises(ValueError):
+            spool.open_spooled_files("../..", {"etc": {"name": "passwd", "content_type": None, "size": 0, "charset": None}})
+
+    def test_spool_removed_after_run(self):
+        script_execution = self.create_execution()
+        script_execution.data.update({"input_type": util.INPUT_TYPE_FORM, **self.spool_upload()})
+        script_execution.save()
+
+        script_execution = self.run_execution(script_execution)
+
+        self.assertEqual(script_execution.status, ScriptExecutionStatusChoices.STATUS_COMPLETED)
+        self.assertEqual(script_execution.data["output"], "Uploaded data")
+        self.assertFalse(os.path.exists(os.path.join(spool.get_spool_root(), script_execution.data["spool_id"])))
+
+
+class ResourceLimitTestCase(SimpleTestCase):
+    def test_child_exits_normally(self):
+        exit_code, rusage = limits.run_with_resource_limits(lambda: None, {"memory_limit": 4096})
+
+        self.assertEqual(exit_code, 0)
+        self.assertGreater(limits.get_resource_usage(rusage)["peak_memory"], 0)
+
+    def test_memory_limit(self):
+        exit_code, _ = limits.run_with_resource_limits(lambda: bytearray(8 * 1024**3), {"memory_limit": 4096})
+
+        # The MemoryError is raised in the child, which exits with an error
+        self.assertEqual(exit_code, 1)
+
+    def test_cpu_time_limit(self):
+        def spin():
+            while True:
+                pass
+
+        exit_code, rusage = limits.run_with_resource_limits(spin, {"cpu_time_limit": 1})
+
+        self.assertIn(-exit_code, limits.LIMIT_SIGNALS)
+        self.assertGreater(limits.get_resource_usage(rusage)["cpu_time"], 0.5)
+
+    def test_resource_limit_errors(self):
+        self.assertTrue(limits.is_resource_limit_error(MemoryError()))
+        self.assertTrue(limits.is_resource_limit_error(OSError(errno.EMFILE, "Too many open files")))
+        self.assertFalse(limits.is_resource_limit_error(ValueError()))
+
+
+class ChunkedCommitTestCase(ScriptRunMixin, TransactionTestCase):
+    """
+    Transactions are committed by the script, so the test can't run in a transaction.
+    """
+
+    script_class = ChunkedScript
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser")
+        super().setUp()
+
+    def test_changes_before_checkpoint_kept_on_error(self):
+        script_execution = self.run_execution(self.create_execution(commit=True))
+
+        self.assertEqual(script_execution.status, ScriptExecutionStatusChoices.STATUS_ERRORED)
+        self.assertEqual(script_execution.data["committed_batches"], 1)
+        self.assertTrue(Tag.objects.filter(slug="committed").exists())
+        self.assertFalse(Tag.objects.filter(slug="reverted").exists())
+
+    def test_checkpoint_ignored_without_commit(self):
+        script_execution = self.run_execution(self.create_execution())
+
+        self.assertEqual(script_execution.status, ScriptExecutionStatusChoices.STATUS_ERRORED)
+        self.assertNotIn("committed_batches", script_execution.data)
+        self.assertFalse(Tag.objects.exists())
+
+
+class ManifestTestCase(TestCase):
+    def get_manifest(self):
+        # Manifests are stored as JSON
+        return json.loads(json.dumps(manifest.build_manifest(VariableScript)))
+
+    def create_broken_script_instance(self):
+        return ScriptInstance.objects.create(
+            name="Broken Script",
+            module_path="customscripts.broken",
+            class_name="BrokenScript",
+            manifest={"version": manifest.MANIFEST_VERSION, "error": "SyntaxError: invalid syntax"},
+        )
+
+    def test_manifest_form_validates_like_script_form(self):
+        manifest_script = manifest.ManifestScript(self.get_manifest())
+
+        for data in ({"hostname": "Test", "count": "2"}, {"hostname": "Too long"}, {"hostname": "Test", "count": "0"}, {}):
+            manifest_form = manifest_script.as_input_form(data=data)
+            script_form = VariableScript().as_input_form(data=data)
+
+            self.assertEqual(list(manifest_form.fields), list(script_form.fields))
+            self.assertEqual(manifest_form.is_valid(), script_form.is_valid(), data)
+            self.assertEqual(manifest_form.errors, script_form.errors)
+
+    def test_manifest_error_raised(self):
+        script_instance = self.create_broken_script_instance()
+
+        with self.assertRaisesMessage(manifest.ManifestError, "SyntaxError: invalid syntax"):
+            manifest.get_manifest_script(script_instance)
+
+    def test_run_with_manifest_error_shows_error(self):
+        self.add_permissions("netbox_script_manager.view_scriptinstance", "netbox_script_manager.run_scriptinstance")
+        script_instance = self.create_broken_script_instance()
+
+        url = reverse("plugins:netbox_script_manager:scriptinstance", kwargs={"pk": script_instance.pk})
+        response = self.client.post(url, {"_commit": "on"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "SyntaxError: invalid syntax")
+        self.assertFalse(ScriptExecution.objects.exists())
+
+
+class LogExportTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+
+        script_instance = ScriptInstance.objects.create(name="Test Script", module_path="customscripts.test", class_name="TestScript")
+        self.script_execution = ScriptExecution.objects.create(
+            script_instance=script_instance, task_id=uuid.uuid4(), request_id=uuid.uuid4(), user=self.user
+        )
+
+        start = timezone.now()
+        messages = [("info", "First"), ("warning", 'Quoted "message", with comma'), ("failure", "Multi\nline")]
+        self.log_lines = [
+            ScriptLogLine.objects.create(
+                script_execution=self.script_execution, level=level, message=message, timestamp=start + timedelta(seconds=i)
+            )
+            for i, (level, message) in enumerate(messages)
+        ]
+
+    def export(self, log_format, compress=False):
+        return b"".join(export.export_log(self.script_execution, log_format, compress))
+
+    def test_export_ndjson(self):
+        rows = [json.loads(line) for line in self.export("ndjson").decode().splitlines()]
+
+        self.assertEqual(
+            rows,
+            [
+                {"timestamp": log_line.timestamp.isoformat(), "level": log_line.level, "message": log_line.message}
+                for log_line in self.log_lines
+            ],
+        )
+
+    def test_export_csv(self):
+        rows = list(csv.reader(io.StringIO(self.export("csv").decode())))
+
+        self.assertEqual(rows[0], ["timestamp", "level", "message"])
+        self.assertEqual(rows[1:], [[log_line.timestamp.isoformat(), log_line.level, log_line.message] for log_line in self.log_lines])
+
+    def test_export_text(self):
+        self.assertEqual(
+            self.export("text").decode(),
+            "".join(f"{log_line.timestamp.isoformat()} [{log_line.level.upper()}] {log_line.message}\n" for log_line in self.log_lines),
+        )
+
+    def test_export_compressed(self):
+        for log_format in export.LOG_EXPORT_FORMATS:
+            self.assertEqual(gzip.decompress(self.export(log_format, compress=True)), self.export(log_format))
+
+
+class ArtifactExportTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+
+        script_instance = ScriptInstance.objects.create(name="Test Script", module_path="customscripts.test", class_name="TestScript")
+        self.script_executions = [
+            ScriptExecution.objects.create(script_instance=script_instance, task_id=uuid.uuid4(), request_id=uuid.uuid4(), user=self.user)
+            for _ in range(2)
+        ]
+
+    def create_artifact(self, name, data=b"data", script_execution=None):
+        return ScriptArtifact.objects.create(
+            script_execution=script_execution or self.script_executions[0], name=name, content_type="text/plain", data=data
+        )
+
+    def read_archive(self, script_executions, pattern=None):
+        data = b"".join(export.export_artifacts([script_execution.pk for script_execution in script_executions], pattern))
+
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            return {name: archive.read(name) for name in archive.namelist()}
+
+    def test_archive_contents(self):
+        self.create_artifact("report.txt", b"Report")
+        self.create_artifact("data/devices.csv", b"name\nrouter1\n")
+
+        self.assertEqual(
+            self.read_archive(self.script_executions[:1]),
+            {"report.txt": b"Report", "data/devices.csv": b"name\nrouter1\n"},
+        )
+
+    def test_names_kept_inside_archive(self):
+        self.create_artifact("../../etc/passwd")
+        self.create_artifact("/absolute/./path.txt")
+        self.create_artifact("..")
+
+        self.assertEqual(sorted(self.read_archive(self.script_executions[:1])), ["absolute/path.txt", "artifact", "etc/passwd"])
+
+    def test_pattern_filter(self):
+        self.create_artifact("report.txt")
+        self.create_artifact("report.csv")
+
+        self.assertEqual(list(self.read_archive(self.script_executions[:1], pattern="*.csv")), ["report.csv"])
+
+    def test_duplicate_names_renamed(self):
+        self.create_artifact("report.txt", b"First")
+        duplicate = self.create_artifact("report.txt", b"Second")
+
+        self.assertEqual(
+            self.read_archive(self.script_executions[:1]),
+            {"report.txt": b"First", f"report-{duplicate.pk}.txt": b"Second"},
+        )
+
+    def test_folder_per_execution(self):
+        for script_execution in self.script_executions:
+            self.create_artifact("report.txt", script_execution=script_execution)
+
+        self.assertEqual(
+            sorted(self.read_archive(self.script_executions)),
+            sorted(f"{script_execution.pk}/report.txt" for script_execution in self.script_executions),
+        )
+
+
+@override_settings(EXEMPT_VIEW_PERMISSIONS=["*"])
+class CursorPaginationTestCase(APITestCase):
+    def setUp(self):
+        super().setUp()
+
+        script_instance = ScriptInstance.objects.create(name="Test Script", module_path="customscripts.test", class_name="TestScript")
+        self.script_execution = ScriptExecution.objects.create(
+            script_instance=script_instance, task_id=uuid.uuid4(), request_id=uuid.uuid4(), user=self.user
+        )
+        self.log_line_ids = [
+            ScriptLogLine.objects.create(script_execution=self.script_execution, level="info", message=f"Line {i}").pk for i in range(5)
+        ]
+        self.url = reverse("plugins-api:netbox_script_manager-api:scriptlogline-list")
+
+    def test_cursor_pages(self):
+        url = f"{self.url}?script_execution={self.script_execution.pk}&cursor=&limit=2"
+        ids = []
+        pages = 0
+
+        while url:
+            response = self.client.get(url, **self.header)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("count", response.data)
+            self.assertLessEqual(len(response.data["results"]), 2)
+
+            ids.extend(log_line["id"] for log_line in response.data["results"])
+            url = response.data["next"]
+            pages += 1
+
+        self.assertEqual(ids, self.log_line_ids)
+        self.assertEqual(pages, 3)
+
+    def test_offset_pagination_without_cursor(self):
+        response = self.client.get(f"{self.url}?script_execution={self.script_execution.pk}&limit=2", **self.header)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 5)
+        self.assertEqual([log_line["id"] for log_line in response.data["results"]], self.log_line_ids[:2])
+
+
+class TaskQueueSelectorTestCase(SimpleTestCase):
+    def get_selector(self, loads):
+        script_instance = ScriptInstance(name="Test Script", module_path="customscripts.test", task_queues=list(loads))
+
+        with mock.patch.object(TaskQueueSelector, "get_load", side_effect=lambda name: dict(loads[name])):
+            return TaskQueueSelector(script_instance)
+
+    def test_expected_wait(self):
+        load = {"queued": 0, "workers": 0, "busy_workers": 0, "average_duration": 10}
+        self.assertIsNone(TaskQueueSelector.get_expected_wait(load))
+
+        load.update(workers=2, busy_workers=1)
+        self.assertEqual(TaskQueueSelector.get_expected_wait(load), 0)
+
+        load.update(busy_workers=2, queued=3)
+        self.assertEqual(TaskQueueSelector.get_expected_wait(load), 20)
+
+    def test_executions_spread_over_queues(self):
+        selector = self.get_selector(
+            {
+                "default": {"queued": 0, "workers": 1, "busy_workers": 1, "average_duration": 10},
+                "low": {"queued": 0, "workers": 2, "busy_workers": 0, "average_duration": 10},
+            }
+        )
+
+        # The idle workers of low are used first, after which the queue with the lowest expected wait is picked
+        self.assertEqual([selector.select()[0] for _ in range(5)], ["low", "low", "low", "default", "low"])
+
+    def test_first_queue_used_without_workers(self):
+        selector = self.get_selector(
+            {
+                "default": {"queued": 0, "workers": 0, "busy_workers": 0, "average_duration": 10},
+                "low": {"queued": 5, "workers": 0, "busy_workers": 0, "average_duration": 10},
+            }
+        )
+
+        task_queue, decision = selector.select()
+
+        self.assertEqual(task_queue, "default")
+        self.assertIsNone(decision["candidates"]["low"]["expected_wait"])
+
+    def test_auto_task_queue_resolved(self):
+        selector = self.get_selector({"low": {"queued": 0, "workers": 1, "busy_workers": 0, "average_duration": 10}})
+        script_execution = ScriptExecution(task_queue=AUTO_TASK_QUEUE, data={})
+
+        resolve_task_queue(script_execution, selector)
+
+        self.assertEqual(script_execution.task_queue, "low")
+        self.assertEqual(script_execution.data["queue_selection"]["queue"], "low")
+        self.assertEqual(script_execution.data["queue_selection"]["candidates"]["low"]["expected_wait"], 0)
+
+
+class LogLimiterTestCase(SimpleTestCase):
+    def setUp(self):
+        self.now = 0
+
+        patcher = mock.patch("netbox_script_manager.loglimits.time.monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_repeats_collapsed(self):
+        limiter = LogLimiter()
+
+        self.assertEqual(limiter.process("info", "First"), [("info", "First", None)])
+        self.assertEqual(limiter.process("info", "First"), [])
+        self.assertEqual(limiter.process("info", "First"), [])
+        self.assertEqual(
+            limiter.process("info", "Second"),
+            [("info", "Previous message repeated 2 more times.", None), ("info", "Second", None)],
+        )
+
+    def test_rate_limit(self):
+        limiter = LogLimiter(deduplicate=False, rate_limit=1, rate_burst=2)
+
+        self.assertEqual(limiter.process("info", "First"), [("info", "First", None)])
+        self.assertEqual(limiter.process("info", "Second"), [("info", "Second", None)])
+        self.assertEqual(limiter.process("info", "Third"), [])
+
+        # Other levels have their own bucket
+        self.assertEqual(limiter.process("warning", "Fourth"), [("warning", "Fourth", None)])
+
+        self.now = 1
+        self.assertEqual(
+            limiter.process("info", "Fifth"),
+            [("warning", "1 info messages were dropped by the log rate limit.", None), ("info", "Fifth", None)],
+        )
+
+    def test_repeats_of_dropped_message_dropped(self):
+        limiter = LogLimiter(rate_limit=1, rate_burst=1)
+
+        self.assertEqual(limiter.process("info", "First"), [("info", "First", None)])
+        self.assertEqual(limiter.process("info", "Second"), [])
+        self.assertEqual(limiter.process("info", "Second"), [])
+        self.assertEqual(limiter.finish(), [("warning", "2 info messages were dropped by the log rate limit.", None)])
+
+    def test_max_lines(self):
+        limiter = LogLimiter(max_lines=2)
+        overflow = ("warning", "The log limit of the execution was reached, further messages are discarded.", None)
+
+        self.assertEqual(limiter.process("info", "First"), [("info", "First", None)])
+        self.assertEqual(limiter.process("info", "Second"), [("info", "Second", None)])
+        self.assertEqual(limiter.process("info", "Third"), [overflow])
+        self.assertEqual(limiter.process("info", "Fourth"), [])
+
+    def test_max_bytes(self):
+        limiter = LogLimiter(max_bytes=5)
+        overflow = ("warning", "The log limit of the execution was reached, further messages are discarded.", None)
+
+        self.assertEqual(limiter.process("info", "abc"), [("info", "abc", None)])
+        self.assertEqual(limiter.process("info", "def"), [overflow])
+
+    def test_long_message_truncated(self):
+        limiter = LogLimiter(max_message_length=3)
+
+        self.assertEqual(limiter.process("info", "abcdef"), [("info", "abc", "abcdef")])
+
+    def test_finish(self):
+        limiter = LogLimiter()
+        limiter.process("info", "First")
+        limiter.process("info", "First")
+
+        self.assertEqual(limiter.finish(), [("info", "Previous message repeated 1 more times.", None)])
+        self.assertEqual(limiter.finish(), [])
+
+
+class TruncatedMessageTestCase(ScriptRunMixin, TestCase):
+    # The full message is saved on the connection of the log lines
+    databases = {"default", "script_log"}
+    script_class = VerboseScript
+
+    def test_full_message_saved_as_artifact(self):
+        script_execution = self.run_execution(self.create_execution())
+
+        self.assertIn(
+            ("info", "A message \n\n*Message truncated, the full message is saved as the artifact log-message-1.txt.*"),
+            self.log_lines,
+        )
+
+        artifact = ScriptArtifact.objects.using("script_log").get(script_execution=script_execution)
+        self.assertEqual(artifact.name, "log-message-1.txt")
+        self.assertEqual(bytes(artifact.data), b"A message longer than the limit")
+
+
+class LogBufferTestCase(TestCase):
+    # Buffered log lines are written on the connection of the log lines
+    databases = {"default", "script_log"}
+
+    def setUp(self):
+        super().setUp()
+
+        script_instance = ScriptInstance.objects.create(name="Test Script", module_path="customscripts.test", class_name="TestScript")
+        self.script_execution = ScriptExecution.objects.create(
+            script_instance=script_instance, task_id=uuid.uuid4(), request_id=uuid.uuid4(), user=self.user
+        )
+        self.addCleanup(util.get_redis_connection().delete, logbuffer.get_stream(self.script_execution.pk))
+
+        # The buffer is flushed by the tests instead of the flusher thread
+        patcher = mock.patch("netbox_script_manager.logbuffer.get_flusher")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        logbuffer.append_log_line(self.script_execution.pk, "info", "First")
+        logbuffer.append_log_line(self.script_execution.pk, "warning", "Second")
+
+    def get_log_lines(self):
+        log_lines = ScriptLogLine.objects.using("script_log").filter(script_execution=self.script_execution)
+
+        return list(log_lines.order_by("pk").values_list("level", "message"))
+
+    def test_buffered_lines_read(self):
+        log_lines = logbuffer.get_buffered_log_lines(self.script_execution.pk)
+
+        self.assertEqual([(log_line.level, log_line.message) for log_line in log_lines], [("info", "First"), ("warning", "Second")])
+        self.assertEqual(self.get_log_lines(), [])
+
+    def test_flush(self):
+        self.assertTrue(logbuffer.flush_log_buffer(self.script_execution.pk))
+
+        self.assertEqual(self.get_log_lines(), [("info", "First"), ("warning", "Second")])
+        self.assertEqual(logbuffer.get_buffered_log_lines(self.script_execution.pk), [])
+
+    def test_interrupted_flush_not_written_twice(self):
+        with mock.patch("redis.Redis.xdel", side_effect=ConnectionError("Connection lost")):
+            with self.assertRaises(ConnectionError):
+                logbuffer.flush_log_buffer(self.script_execution.pk)
+
+        self.assertEqual(len(logbuffer.get_buffered_log_lines(self.script_execution.pk)), 2)
+
+        logbuffer.flush_log_buffer(self.script_execution.pk)
+        self.assertEqual(self.get_log_lines(), [("info", "First"), ("warning", "Second")])
+
+    def test_recover_log_buffers(self):
+        self.assertGreaterEqual(logbuffer.recover_log_buffers(), 1)
+
+        self.assertEqual(self.get_log_lines(), [("info", "First"), ("warning", "Second")])
+        self.assertEqual(logbuffer.get_buffered_log_lines(self.script_execution.pk), [])
+
+
+# Budget for the plugin modules imported at startup, in milliseconds
+IMPORT_TIME_BUDGET = int(os.environ.get("NETBOX_SCRIPT_MANAGER_IMPORT_BUDGET_MS", 100))
+
+# Budget for the plugin modules imported when the URLs are loaded by the first request, in milliseconds
+URLS_IMPORT_TIME_BUDGET = int(os.environ.get("NETBOX_SCRIPT_MANAGER_URLS_IMPORT_BUDGET_MS", 250))
+
+# Plugin modules importing django_rq, rq and extras.scripts, which are only imported when a script is run or managed
+LAZY_MODULES = ("netbox_script_manager.scripts", "netbox_script_manager.concurrency", "netbox_script_manager.manifest")
+
+
+def get_plugin_import_time(importtime_output, package="netbox_script_manager"):
+    """
+    Returns the time in milliseconds spent importing the package, from the output of `python -X importtime`. Modules
+    first imported by the package, like its dependencies, count towards the package.
+    """
+    lines = [line for line in importtime_output.splitlines() if line.startswith("import time:") and "imported package" not in line]
+    total = 0
+    # Stack of (depth, inside package) of the enclosing imports
+    stack = []
+
+    # Imports are listed after the modules they import, so walk backwards to visit the enclosing import first
+    for line in reversed(lines):
+        _, cumulative, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        name = name.strip()
+
+        while stack and stack[-1][0] >= depth:
+            stack.pop()
+
+        inside_package = bool(stack) and stack[-1][1]
+        in_package = name == package or name.startswith(f"{package}.")
+
+        if in_package and not inside_package:
+            total += int(cumulative)
+
+        stack.append((depth, inside_package or in_package))
+
+    return total / 1000
+
+
+class ImportTimeTestCase(SimpleTestCase):
+    def get_importtime_output(self, code):
+        """
+        Run the code in a fresh interpreter and return the output of `-X importtime`.
+        """
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+
+        return result.stderr
+
+    def test_import_time_budget(self):
+        """
+        Setting up NetBox imports the plugin and its models. Time the setup in a fresh interpreter and fail if the
+        plugin modules take longer than the budget.
+        """
+        import_time = get_plugin_import_time(self.get_importtime_output("import django; django.setup()"))
+
+        self.assertGreater(import_time, 0, "The plugin was not imported")
+        self.assertLess(import_time, IMPORT_TIME_BUDGET, f"Importing the plugin took {import_time:.1f} ms")
+
+    def test_urls_import_time_budget(self):
+        """
+        The first request loads the URLs of NetBox, which import the views of the plugin. These must not import the
+        modules needed to run scripts.
+        """
+        output = self.get_importtime_output("import django; django.setup(); import netbox.urls")
+        import_time = get_plugin_import_time(output)
+        imported = {line.rsplit("|", 1)[1].strip() for line in output.splitlines() if line.startswith("import time:")}
+
+        self.assertIn("netbox_script_manager.urls", imported)
+        self.assertLess(import_time, URLS_IMPORT_TIME_BUDGET, f"Importing the plugin URLs took {import_time:.1f} ms")
+        for module in LAZY_MODULES:
+            self.assertNotIn(module, imported, f"{module} was imported with the URLs")